@@ -0,0 +1,163 @@
+"""Measure how long ICSCalendarData.async_get_events blocks the event loop.
+
+Run from the top of the repository:
+
+    python -m benchmarks.event_loop_blocking [--parser rie] [FILE ...]
+
+For each calendar file, async_get_events is called repeatedly for the same
+window, and a heartbeat task records the longest time the event loop could
+not run it.  The "inline" rows repeat the measurement with the events read
+in the event loop, as async_get_events used to do, for comparison.  The
+calendar is given to the parser again before each call, so no call reuses
+the occurrences expanded by the one before it.
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import timedelta
+from unittest.mock import AsyncMock, patch
+
+from dateutil import parser as dtparser
+
+from custom_components.ics_calendar.calendar import ICSCalendarData
+from custom_components.ics_calendar.calendardata import CalendarData
+
+# How often the heartbeat task asks to run, in seconds
+HEARTBEAT = 0.001
+
+# The start of a window with events, for the calendars in tests
+DEFAULT_STARTS = {
+    "tests/issue5.ics": "2019-11-01T00:00:00+00:00",
+    "tests/issue34.ics": "2021-11-01T00:00:00+00:00",
+}
+
+
+class BenchmarkHass:  # pylint: disable=R0903
+    """The parts of HomeAssistant used by ICSCalendarData."""
+
+    def __init__(self):
+        """Construct BenchmarkHass object."""
+        self.data = {}
+
+    def async_add_executor_job(self, target, *args):
+        """Run target in the default executor."""
+        return asyncio.get_running_loop().run_in_executor(None, target, *args)
+
+    def async_create_task(self, target, name=None):
+        """Run target in a task."""
+        return asyncio.get_running_loop().create_task(target, name=name)
+
+
+def device_data(path: str, parser: str) -> dict:
+    """Return the description of a calendar for path."""
+    return {
+        "name": path,
+        "url": f"file://{path}",
+        "username": "",
+        "password": "",
+        "user_agent": "",
+        "accept_header": "",
+        "download_interval": 15,
+        "parser": parser,
+        "days": 1,
+        "include_all_day": True,
+        "offset_hours": 0,
+        "prefix": "",
+        "exclude": "",
+        "include": "",
+    }
+
+
+async def measure(call) -> tuple[float, float]:
+    """Await call() while a heartbeat task runs.
+
+    :return: The time call took, and the longest the heartbeat was delayed,
+        both in milliseconds
+    """
+    done = False
+    longest = 0.0
+
+    async def heartbeat():
+        nonlocal longest
+        last = time.perf_counter()
+        while not done:
+            await asyncio.sleep(HEARTBEAT)
+            now = time.perf_counter()
+            longest = max(longest, now - last - HEARTBEAT)
+            last = now
+
+    task = asyncio.create_task(heartbeat())
+    await asyncio.sleep(0)
+    start = time.perf_counter()
+    await call()
+    elapsed = time.perf_counter() - start
+    done = True
+    await task
+    return elapsed * 1000, longest * 1000
+
+
+async def benchmark(path: str, args: argparse.Namespace):
+    """Print the event loop blocking time of async_get_events for path."""
+    hass = BenchmarkHass()
+    data = ICSCalendarData(device_data(path, args.parser))
+    feed = data._get_feed(hass)  # pylint: disable=W0212
+    with open(path, encoding="utf-8") as file_handle:
+        content = file_handle.read().replace("\0", "")
+    feed.calendar_data._calendar_data = content  # pylint: disable=W0212
+    feed.parser.set_content(content)
+    start = dtparser.parse(
+        args.start or DEFAULT_STARTS.get(path, "2022-01-01T00:00:00+00:00")
+    )
+    end = start + timedelta(days=args.days)
+
+    def reset():
+        # Expand and find the events again, instead of reusing the last ones
+        feed.parser.set_content(content)
+        data._events = {}  # pylint: disable=W0212
+
+    async def executor():
+        return await data.async_get_events(hass, start, end)
+
+    async def inline():
+        await feed.async_update(hass)
+        return data._get_events(feed, start, end)  # pylint: disable=W0212
+
+    with patch.object(
+        CalendarData, "async_download_calendar", AsyncMock(return_value=False)
+    ):
+        for mode, call in (("executor", executor), ("inline", inline)):
+            results = []
+            for _ in range(args.calls):
+                reset()
+                results.append(await measure(call))
+            blocked = [result[1] for result in results]
+            print(
+                f"{path:24} {args.parser:4} {mode:8} "
+                f"{len(await call()):5} events  "
+                f"call {statistics.median(r[0] for r in results):8.1f} ms  "
+                f"loop blocked median {statistics.median(blocked):7.1f} ms  "
+                f"max {max(blocked):7.1f} ms"
+            )
+
+
+def main():
+    """Run the benchmark."""
+    argparser = argparse.ArgumentParser(
+        description=__doc__.split("\n", maxsplit=1)[0]
+    )
+    argparser.add_argument("files", nargs="*", default=list(DEFAULT_STARTS))
+    argparser.add_argument(
+        "--parser", default="rie", choices=["rie", "ics", "fast"]
+    )
+    argparser.add_argument("--start")
+    argparser.add_argument("--days", type=int, default=42)
+    argparser.add_argument("--calls", type=int, default=5)
+    args = argparser.parse_args()
+    for path in args.files:
+        asyncio.run(benchmark(path, args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Measure the time and memory it takes to import the parsers.
+
+Run from the top of the repository:
+
+    python -m benchmarks.parser_import [--runs 5]
+
+Each row imports GetParser in a new Python process, then requests the
+given parsers, and reports the median time the imports took, and the
+largest resident memory of the process.  The "both" row loads every parser,
+as importing GetParser used to do, for comparison.
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+# The parsers each row requests
+CASES = {
+    "none": [],
+    "rie": ["rie"],
+    "ics": ["ics"],
+    "both": ["rie", "ics"],
+}
+
+# Run in a new process, so no module is imported already
+SCRIPT = """
+import json, resource, sys, time
+import custom_components.ics_calendar.icalendarparser
+start = time.perf_counter()
+from custom_components.ics_calendar.getparser import GetParser
+for name in sys.argv[1:]:
+    GetParser.get_class(name)
+elapsed = time.perf_counter() - start
+print(json.dumps([elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss]))
+"""
+
+
+def measure(parsers: list[str]) -> tuple[float, int]:
+    """Import GetParser and parsers in a new process.
+
+    :return: The time the imports took in milliseconds, and the largest
+        resident memory of the process in kilobytes
+    """
+    output = subprocess.run(
+        [sys.executable, "-c", SCRIPT, *parsers],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    elapsed, memory = json.loads(output)
+    return elapsed * 1000, memory
+
+
+def main():
+    """Run the benchmark."""
+    argparser = argparse.ArgumentParser(
+        description=__doc__.split("\n", maxsplit=1)[0]
+    )
+    argparser.add_argument("--runs", type=int, default=5)
+    args = argparser.parse_args()
+    for case, parsers in CASES.items():
+        results = [measure(parsers) for _ in range(args.runs)]
+        print(
+            f"{case:5} import {statistics.median(r[0] for r in results):7.1f}"
+            f" ms  memory {statistics.median(r[1] for r in results) / 1024:6.1f}"
+            " MB"
+        )
+
+
+if __name__ == "__main__":
+    main()
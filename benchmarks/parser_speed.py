@@ -0,0 +1,74 @@
+"""Measure how long each parser takes to parse a calendar and get events.
+
+Run from the top of the repository:
+
+    python -m benchmarks.parser_speed [--parser rie --parser fast] [FILE ...]
+
+For each calendar file and parser, set_content is called on a new parser,
+then get_event_list is called for a window, and the median time of each
+is reported.
+"""
+
+import argparse
+import statistics
+import time
+from datetime import timedelta
+
+from dateutil import parser as dtparser
+
+from custom_components.ics_calendar.getparser import GetParser
+
+from .event_loop_blocking import DEFAULT_STARTS
+
+
+def measure(name: str, content: str, start, end) -> tuple[float, float, int]:
+    """Parse content with a new parser, and get the events from start to end.
+
+    :return: The time parsing took, and the time getting events took, both
+        in milliseconds, and the number of events
+    """
+    parser = GetParser.get_parser(name)
+    before = time.perf_counter()
+    parser.set_content(content)
+    parsed = time.perf_counter()
+    events = parser.get_event_list(start, end, True)
+    done = time.perf_counter()
+    return (parsed - before) * 1000, (done - parsed) * 1000, len(events)
+
+
+def benchmark(path: str, args: argparse.Namespace):
+    """Print the parse and get_event_list times of each parser for path."""
+    with open(path, encoding="utf-8") as file_handle:
+        content = file_handle.read().replace("\0", "")
+    start = dtparser.parse(
+        args.start or DEFAULT_STARTS.get(path, "2022-01-01T00:00:00+00:00")
+    )
+    end = start + timedelta(days=args.days)
+    for name in args.parser or GetParser.get_names():
+        results = [
+            measure(name, content, start, end) for _ in range(args.runs)
+        ]
+        print(
+            f"{path:24} {name:4} {results[0][2]:5} events  "
+            f"parse {statistics.median(r[0] for r in results):8.1f} ms  "
+            f"events {statistics.median(r[1] for r in results):8.1f} ms"
+        )
+
+
+def main():
+    """Run the benchmark."""
+    argparser = argparse.ArgumentParser(
+        description=__doc__.split("\n", maxsplit=1)[0]
+    )
+    argparser.add_argument("files", nargs="*", default=list(DEFAULT_STARTS))
+    argparser.add_argument("--parser", action="append")
+    argparser.add_argument("--start")
+    argparser.add_argument("--days", type=int, default=42)
+    argparser.add_argument("--runs", type=int, default=5)
+    args = argparser.parse_args()
+    for path in args.files:
+        benchmark(path, args)
+
+
+if __name__ == "__main__":
+    main()
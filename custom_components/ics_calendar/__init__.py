@@ -23,21 +23,36 @@ from homeassistant.helpers.issue_registry import (
 )
 from homeassistant.helpers.typing import ConfigType
 
+from .calendardata import CalendarData
 from .const import (
     CONF_ACCEPT_HEADER,
     CONF_ADV_CONNECT_OPTS,
     CONF_CALENDARS,
+    CONF_COMPRESSION,
     CONF_CONNECTION_TIMEOUT,
     CONF_DAYS,
     CONF_DOWNLOAD_INTERVAL,
     CONF_INCLUDE_ALL_DAY,
+    CONF_MAX_BODY_SIZE,
+    CONF_MAX_DOWNLOADS,
+    CONF_MAX_DOWNLOADS_PER_HOST,
     CONF_OFFSET_HOURS,
+    CONF_PARSE_IN_PROCESS,
     CONF_PARSER,
+    CONF_PERSISTENT_CACHE,
     CONF_REQUIRES_AUTH,
+    CONF_RETAIN_FUTURE_DAYS,
+    CONF_RETAIN_PAST_DAYS,
+    CONF_SERVE_STALE,
     CONF_SET_TIMEOUT,
     CONF_USER_AGENT,
+    DEFAULT_MAX_BODY_SIZE,
+    DEFAULT_MAX_DOWNLOADS,
+    DEFAULT_MAX_DOWNLOADS_PER_HOST,
     DOMAIN,
 )
+from .downloadscheduler import DownloadScheduler
+from .feedcache import FeedCache
 
 _LOGGER = logging.getLogger(__name__)
 PLATFORMS: list[Platform] = [Platform.CALENDAR]
@@ -47,6 +62,13 @@ CONFIG_SCHEMA = vol.Schema(
         DOMAIN: vol.Schema(
             {
                 # pylint: disable=no-value-for-parameter
+                vol.Optional(
+                    CONF_MAX_DOWNLOADS, default=DEFAULT_MAX_DOWNLOADS
+                ): cv.positive_int,
+                vol.Optional(
+                    CONF_MAX_DOWNLOADS_PER_HOST,
+                    default=DEFAULT_MAX_DOWNLOADS_PER_HOST,
+                ): cv.positive_int,
                 vol.Optional(CONF_CALENDARS, default=[]): vol.All(
                     cv.ensure_list,
                     vol.Schema(
@@ -94,17 +116,50 @@ CONFIG_SCHEMA = vol.Schema(
                                     vol.Optional(
                                         CONF_CONNECTION_TIMEOUT, default=300
                                     ): cv.positive_float,
+                                    vol.Optional(
+                                        CONF_PERSISTENT_CACHE, default=False
+                                    ): cv.boolean,
+                                    vol.Optional(
+                                        CONF_MAX_BODY_SIZE,
+                                        default=DEFAULT_MAX_BODY_SIZE,
+                                    ): cv.positive_int,
+                                    vol.Optional(
+                                        CONF_COMPRESSION, default=True
+                                    ): cv.boolean,
+                                    vol.Optional(
+                                        CONF_PARSE_IN_PROCESS, default=False
+                                    ): cv.boolean,
+                                    vol.Optional(
+                                        CONF_SERVE_STALE, default=False
+                                    ): cv.boolean,
+                                    vol.Optional(
+                                        CONF_RETAIN_PAST_DAYS, default=0
+                                    ): cv.positive_int,
+                                    vol.Optional(
+                                        CONF_RETAIN_FUTURE_DAYS, default=0
+                                    ): cv.positive_int,
                                 }
                             )
                         ]
                     ),
-                )
+                ),
             }
         )
     },
     extra=vol.ALLOW_EXTRA,
 )
 
+# The defaults of calendar options missing from older config entries
+OPTION_DEFAULTS = {
+    CONF_PERSISTENT_CACHE: False,
+    CONF_MAX_BODY_SIZE: DEFAULT_MAX_BODY_SIZE,
+    CONF_PARSE_IN_PROCESS: False,
+    CONF_SERVE_STALE: False,
+    CONF_RETAIN_PAST_DAYS: 0,
+    CONF_RETAIN_FUTURE_DAYS: 0,
+    CONF_COMPRESSION: True,
+}
+
 STORAGE_KEY = DOMAIN
 STORAGE_VERSION_MAJOR = 1
 STORAGE_VERSION_MINOR = 0
@@ -114,8 +169,9 @@ async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
     """Set up calendars."""
     _LOGGER.debug("Setting up ics_calendar component")
     hass.data.setdefault(DOMAIN, {})
+    _set_download_limits(config.get(DOMAIN) or {})
 
-    if DOMAIN in config and config[DOMAIN]:
+    if DOMAIN in config and config[DOMAIN].get(CONF_CALENDARS):
         _LOGGER.debug("discovery.load_platform called")
         discovery.load_platform(
             hass=hass,
@@ -165,6 +221,20 @@ async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
     return True
 
 
+def _set_download_limits(domain_config: dict):
+    """Limit the downloads of every calendar as configured.
+
+    The limits are shared by all calendars, so they are only set for the
+    integration, and not per calendar.
+    """
+    CalendarData.download_scheduler = DownloadScheduler(
+        domain_config.get(CONF_MAX_DOWNLOADS, DEFAULT_MAX_DOWNLOADS),
+        domain_config.get(
+            CONF_MAX_DOWNLOADS_PER_HOST, DEFAULT_MAX_DOWNLOADS_PER_HOST
+        ),
+    )
+
+
 @callback
 def _async_find_matching_config_entry(hass):
     for entry in hass.config_entries.async_entries(DOMAIN):
@@ -271,6 +341,10 @@ def add_missing_defaults(  # noqa: C901,R701 # pylint: disable=R0912,R0915
     else:
         data[CONF_SET_TIMEOUT] = False
         data[CONF_CONNECTION_TIMEOUT] = 300.0
+    for key, default in OPTION_DEFAULTS.items():
+        data[key] = entry.data.get(key, default)
+    if CONF_COMPRESSION in entry.data:
+        data[CONF_ADV_CONNECT_OPTS] = True
 
     return data
 
@@ -284,3 +358,18 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         hass.data[DOMAIN].pop(entry.entry_id)
 
     return unload_ok
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry):
+    """Remove the cached calendar data of a removed entry.
+
+    The data is kept if another entry shares the cache.
+    """
+    device_data = add_missing_defaults(entry)
+    key = FeedCache.storage_key(device_data)
+    for other in hass.config_entries.async_entries(DOMAIN):
+        if other.entry_id != entry.entry_id and key == FeedCache.storage_key(
+            add_missing_defaults(other)
+        ):
+            return
+    await FeedCache(hass, device_data).async_remove()
@@ -0,0 +1,242 @@
+"""Provide BodyDecoder class."""
+
+import codecs
+import zlib
+from hashlib import blake2b
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+from .const import DEFAULT_MAX_BODY_SIZE
+
+# The number of bytes needed to recognize a byte order mark
+BOM_SIZE = 3
+
+# The number of bytes checked for the NUL bytes of UTF-16 without a byte
+# order mark
+UTF16_SAMPLE_SIZE = 8
+
+DECOMPRESS_ERRORS = (
+    (zlib.error,) if brotli is None else (zlib.error, brotli.error)
+)
+
+
+class BodyDecoder:  # pylint: disable=R0902
+    """BodyDecoder class.
+
+    The BodyDecoder class turns an HTTP response body into text while it is
+    downloaded.  Write each chunk of the body as it arrives, then call close
+    to get the text.  The body is uncompressed according to its
+    Content-Encoding, decoded as UTF-8 or UTF-16 depending on its byte order
+    mark, or on the NUL bytes of UTF-16 at its start, and stripped of NUL
+    characters one chunk at a time, so only the text is kept in memory.  A
+    ValueError is raised if the body cannot be uncompressed or decoded, or if
+    it is larger than max_size after uncompressing it.
+    """
+
+    def __init__(
+        self,
+        content_encoding: str | None = None,
+        max_size: int = DEFAULT_MAX_BODY_SIZE * 1024 * 1024,
+    ):
+        """Construct BodyDecoder object.
+
+        :param content_encoding: The Content-Encoding header of the response
+        :type content_encoding: str | None
+        :param max_size: The maximum size of the uncompressed body, in bytes
+        :type max_size: int
+        """
+        self.max_size = max_size
+        self.size = 0
+        # Content-Encoding lists the encodings in the order they were applied
+        self._encodings = [
+            encoding.strip().lower()
+            for encoding in reversed((content_encoding or "").split(","))
+            if encoding.strip().lower() not in ("", "identity")
+        ]
+        for encoding in self._encodings:
+            if encoding not in BodyDecoder.supported_encodings() + ["x-gzip"]:
+                raise ValueError(f"Unsupported Content-Encoding: {encoding}")
+        # Created when the first data arrives for each encoding
+        self._decompressors: list = [None] * len(self._encodings)
+        self._hash = blake2b(digest_size=16)
+        self._head = b""
+        self._text_decoder: codecs.IncrementalDecoder = None
+        self._parts: list[str] = []
+
+    @staticmethod
+    def supported_encodings() -> list[str]:
+        """Return the content encodings that can be uncompressed.
+
+        :return: The names of the encodings, for an Accept-Encoding header
+        :rtype: list[str]
+        """
+        encodings = ["gzip", "deflate"]
+        if brotli is not None:
+            encodings.append("br")
+        return encodings
+
+    def write(self, chunk: bytes):
+        """Uncompress and decode the next chunk of the body.
+
+        :param chunk: The next chunk of the body, as sent by the server
+        :type chunk: bytes
+        """
+        for index, decompressor in enumerate(self._decompressors):
+            chunk = self._decompress(index, decompressor, chunk)
+        self._add(chunk)
+
+    def close(self) -> str:
+        """Finish decoding the body.
+
+        :return: The text of the body
+        :rtype: str
+        """
+        for index, decompressor in enumerate(self._decompressors):
+            chunk = self._flush(index, decompressor)
+            for next_index in range(index + 1, len(self._decompressors)):
+                chunk = self._decompress(
+                    next_index, self._decompressors[next_index], chunk
+                )
+            self._add(chunk)
+        if self._text_decoder is None:
+            self._start_text(final=True)
+        self._add_text(self._text_decoder.decode(b"", final=True))
+        text = "".join(self._parts)
+        self._parts = []
+        return text
+
+    def get_digest(self) -> bytes:
+        """Get a digest of the uncompressed body written so far.
+
+        :return: The digest
+        :rtype: bytes
+        """
+        return self._hash.digest()
+
+    @staticmethod
+    def _make_decompressor(encoding: str, data: bytes):
+        """Return a decompressor for encoding, given its first data.
+
+        Servers send both zlib-wrapped and raw data for "deflate"; a zlib
+        header is recognized by its compression method and check bits.
+        """
+        if encoding == "br":
+            return brotli.Decompressor()
+        if encoding != "deflate":
+            return zlib.decompressobj(16 + zlib.MAX_WBITS)
+        if (
+            len(data) >= 2
+            and data[0] & 0x0F == 8
+            and (data[0] << 8 | data[1]) % 31 == 0
+        ):
+            return zlib.decompressobj(zlib.MAX_WBITS)
+        return zlib.decompressobj(-zlib.MAX_WBITS)
+
+    def _decompress(self, index: int, decompressor, data: bytes) -> bytes:
+        """Uncompress data, without exceeding max_size."""
+        if not data:
+            return data
+        encoding = self._encodings[index]
+        if decompressor is None:
+            decompressor = BodyDecoder._make_decompressor(encoding, data)
+            self._decompressors[index] = decompressor
+        try:
+            if encoding == "br":
+                return decompressor.process(data)
+            return self._inflate(decompressor, data)
+        except DECOMPRESS_ERRORS as error:
+            raise ValueError(
+                f"Failed to uncompress {encoding} data: {error}"
+            ) from error
+
+    def _inflate(self, decompressor, data: bytes) -> bytes:
+        """Uncompress gzip or deflate data, without exceeding max_size."""
+        output = bytearray()
+        while data:
+            # Limit the output, so a small body cannot inflate unbounded
+            output += decompressor.decompress(
+                data, self.max_size - self.size - len(output) + 1
+            )
+            if self.size + len(output) > self.max_size:
+                self._raise_too_large()
+            data = decompressor.unconsumed_tail
+        return bytes(output)
+
+    def _flush(self, index: int, decompressor) -> bytes:
+        """Return the rest of the uncompressed data, and check it is whole."""
+        encoding = self._encodings[index]
+        if decompressor is None:
+            # The body is empty
+            return b""
+        if encoding == "br":
+            if not decompressor.is_finished():
+                raise ValueError("Failed to uncompress br data: truncated")
+            return b""
+        if not decompressor.eof:
+            raise ValueError(
+                f"Failed to uncompress {encoding} data: truncated"
+            )
+        return decompressor.flush()
+
+    def _add(self, data: bytes):
+        """Decode the next chunk of the uncompressed body."""
+        if not data:
+            return
+        self.size += len(data)
+        if self.size > self.max_size:
+            self._raise_too_large()
+        self._hash.update(data)
+        if self._text_decoder is None:
+            self._head += data
+            if len(self._head) >= BOM_SIZE:
+                self._start_text(final=False)
+            return
+        self._add_text(self._text_decoder.decode(data))
+
+    def _start_text(self, final: bool):
+        """Choose the text encoding from the start of the body, and decode it.
+
+        A body without a byte order mark whose start is not UTF-8 is decoded
+        as UTF-16 in little endian order, which most machines use.
+        """
+        head = self._head
+        self._head = b""
+        encoding = BodyDecoder._get_encoding(head)
+        self._text_decoder = codecs.getincrementaldecoder(encoding)()
+        try:
+            text = self._text_decoder.decode(head, final)
+        except UnicodeDecodeError:
+            if encoding != "utf-8":
+                raise
+            self._text_decoder = codecs.getincrementaldecoder("utf-16-le")()
+            text = self._text_decoder.decode(head, final)
+        self._add_text(text)
+
+    @staticmethod
+    def _get_encoding(head: bytes) -> str:
+        """Get the text encoding of a body starting with head."""
+        if head.startswith(codecs.BOM_UTF8):
+            return "utf-8-sig"
+        if head.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+            return "utf-16"
+        # A calendar starts with ASCII, which UTF-16 pads with NUL bytes
+        sample = head[:UTF16_SAMPLE_SIZE]
+        if all(sample[::2]) and not any(sample[1::2]):
+            return "utf-16-le"
+        if all(sample[1::2]) and not any(sample[::2]):
+            return "utf-16-be"
+        return "utf-8"
+
+    def _add_text(self, text: str):
+        """Keep text, without NUL characters."""
+        if text:
+            self._parts.append(text.replace("\0", ""))
+
+    def _raise_too_large(self):
+        """Raise the error for a body larger than max_size."""
+        raise ValueError(
+            f"Uncompressed data is larger than {self.max_size} bytes"
+        )
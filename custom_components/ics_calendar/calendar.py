@@ -1,7 +1,9 @@
 """Support for ICS Calendar."""
 
+import asyncio
 import logging
 from datetime import datetime, timedelta
+from time import monotonic
 from typing import Any, Optional
 
 # import homeassistant.helpers.config_validation as cv
@@ -23,37 +25,44 @@ from homeassistant.const import (
     CONF_URL,
     CONF_USERNAME,
 )
-from homeassistant.core import HomeAssistant
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
 from homeassistant.helpers.entity import generate_entity_id
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.event import async_track_point_in_time
 from homeassistant.helpers.typing import ConfigType, DiscoveryInfoType
-from homeassistant.util import Throttle
 from homeassistant.util.dt import now as hanow
 
-from .calendardata import CalendarData
 from .const import (
     CONF_ACCEPT_HEADER,
     CONF_CALENDARS,
+    CONF_COMPRESSION,
     CONF_CONNECTION_TIMEOUT,
     CONF_DAYS,
     CONF_DOWNLOAD_INTERVAL,
     CONF_INCLUDE_ALL_DAY,
+    CONF_MAX_BODY_SIZE,
     CONF_OFFSET_HOURS,
+    CONF_PARSE_IN_PROCESS,
     CONF_PARSER,
-    CONF_SET_TIMEOUT,
+    CONF_PERSISTENT_CACHE,
+    CONF_RETAIN_FUTURE_DAYS,
+    CONF_RETAIN_PAST_DAYS,
+    CONF_SERVE_STALE,
     CONF_USER_AGENT,
     DOMAIN,
 )
+from .feed import Feed
+from .feedregistry import FeedRegistry
 from .filter import Filter
-from .getparser import GetParser
 
 _LOGGER = logging.getLogger(__name__)
 
 
 OFFSET = "!!"
 
-
-MIN_TIME_BETWEEN_UPDATES = timedelta(minutes=15)
+# How long, in seconds, the events found for a time frame are reused for
+# requests for the same time frame, while the calendar does not change
+EVENTS_TTL = 30
 
 
 async def async_setup_entry(
@@ -129,6 +138,13 @@ def setup_platform(
             CONF_OFFSET_HOURS: calendar.get(CONF_OFFSET_HOURS),
             CONF_ACCEPT_HEADER: calendar.get(CONF_ACCEPT_HEADER),
             CONF_CONNECTION_TIMEOUT: calendar.get(CONF_CONNECTION_TIMEOUT),
+            CONF_PERSISTENT_CACHE: calendar.get(CONF_PERSISTENT_CACHE),
+            CONF_MAX_BODY_SIZE: calendar.get(CONF_MAX_BODY_SIZE),
+            CONF_COMPRESSION: calendar.get(CONF_COMPRESSION),
+            CONF_PARSE_IN_PROCESS: calendar.get(CONF_PARSE_IN_PROCESS),
+            CONF_SERVE_STALE: calendar.get(CONF_SERVE_STALE),
+            CONF_RETAIN_PAST_DAYS: calendar.get(CONF_RETAIN_PAST_DAYS),
+            CONF_RETAIN_FUTURE_DAYS: calendar.get(CONF_RETAIN_FUTURE_DAYS),
         }
         device_id = f"{device_data[CONF_NAME]}"
         entity_id = generate_entity_id(ENTITY_ID_FORMAT, device_id, hass=hass)
@@ -137,7 +153,7 @@ def setup_platform(
     add_entities(calendar_devices)
 
 
-class ICSCalendarEntity(CalendarEntity):
+class ICSCalendarEntity(CalendarEntity):  # pylint: disable=R0902
     """A CalendarEntity for an ICS Calendar."""
 
     def __init__(self, entity_id: str, device_data, unique_id: str = None):
@@ -158,7 +174,10 @@ class ICSCalendarEntity(CalendarEntity):
         self._attr_unique_id = f"ICSCalendar.{unique_id}"
         self._event = None
         self._attr_name = device_data[CONF_NAME]
-        self._last_call = None
+        # The transition the entity will wake up at, and how to cancel it
+        self._transition: Optional[datetime] = None
+        self._cancel_transition: Optional[CALLBACK_TYPE] = None
+        self._removed = False
 
     @property
     def event(self) -> Optional[CalendarEvent]:
@@ -173,19 +192,12 @@ class ICSCalendarEntity(CalendarEntity):
     def should_poll(self) -> bool:
         """Indicate if the calendar should be polled.
 
-        If the last call to update or get_api_events was not within the minimum
-        update time, then async_schedule_update_ha_state(True) is also called.
-        :return: True
+        The calendar is downloaded by the FeedCoordinator of its Feed, which
+        tells the entity when it changed.
+        :return: False
         :rtype: boolean
         """
-        this_call = hanow()
-        if (
-            self._last_call is None
-            or (this_call - self._last_call) > MIN_TIME_BETWEEN_UPDATES
-        ):
-            self._last_call = this_call
-            self.async_schedule_update_ha_state(True)
-        return True
+        return False
 
     async def async_get_events(
         self, hass: HomeAssistant, start_date: datetime, end_date: datetime
@@ -204,9 +216,99 @@ class ICSCalendarEntity(CalendarEntity):
         )
         return await self.data.async_get_events(hass, start_date, end_date)
 
-    def update(self):
-        """Get the current or next event."""
-        self.data.update()
+    async def async_added_to_hass(self):
+        """Show the cached calendar, if any, and start downloading it."""
+        if await self.data.async_restore(self.hass):
+            self._set_event()
+            self.async_write_ha_state()
+            self._schedule_transition()
+        self.async_on_remove(
+            self.data.async_add_listener(self.hass, self._handle_feed_update)
+        )
+        self.async_schedule_update_ha_state(True)
+
+    async def async_will_remove_from_hass(self):
+        """Stop using the shared calendar data."""
+        await super().async_will_remove_from_hass()
+        self._removed = True
+        self._unschedule_transition()
+        await self.data.async_release()
+
+    async def async_update(self):
+        """Refresh the calendar, and get the current or next event."""
+        await self.data.async_update(self.hass)
+        self._set_event()
+        self._schedule_transition()
+
+    @callback
+    def _handle_feed_update(self):
+        """Get the current or next event when the calendar changed."""
+        self.hass.async_create_task(self._async_update_event())
+
+    async def _async_update_event(self):
+        """Get the current or next event, and write the state.
+
+        Nothing is done once the entity is removed, so the calendar is not
+        used again after it was released.
+        """
+        if self._removed:
+            return
+        await self.data.async_update_event(self.hass)
+        if self._removed:
+            return
+        self._set_event()
+        self.async_write_ha_state()
+        self._schedule_transition()
+
+    async def _async_transition(self, when: datetime):
+        """Update the event at the next transition, without downloading.
+
+        :param when: The time the transition was scheduled for
+        :type when: datetime
+        """
+        self._transition = None
+        self._cancel_transition = None
+        await self.data.async_refresh(self.hass)
+        if self._removed:
+            return
+        self._set_event()
+        self.async_write_ha_state()
+        # Only schedule a later transition, so a clock that did not reach the
+        # transition cannot wake the entity up over and over.
+        self._schedule_transition(when)
+
+    def _schedule_transition(self, after: Optional[datetime] = None):
+        """Wake up at the next transition of data, if it is after after."""
+        transition = self.data.next_transition
+        if (
+            self._cancel_transition is not None
+            and transition == self._transition
+        ):
+            return
+        self._unschedule_transition()
+        if (
+            transition is None
+            or (after is not None and transition <= after)
+            or self._removed
+            or self.hass.is_stopping
+        ):
+            return
+        self._transition = transition
+        self._cancel_transition = async_track_point_in_time(
+            self.hass,
+            self._async_transition,
+            transition,
+        )
+
+    def _unschedule_transition(self):
+        """Cancel the scheduled transition, if any."""
+        if self._cancel_transition is not None:
+            self._cancel_transition()
+            self._transition = None
+            self._cancel_transition = None
+
+    def _set_event(self):
+        """Set the current or next event and the attributes from data."""
         self._event = self.data.event
         self._attr_extra_state_attributes = {
             "offset_reached": (
@@ -217,6 +319,10 @@ class ICSCalendarEntity(CalendarEntity):
                 else False
             )
         }
+        if self.data.serve_stale:
+            self._attr_extra_state_attributes["stale_age"] = (
+                self.data.get_stale_age()
+            )
 
     async def async_create_event(self, **kwargs: Any):
         """Raise error, this is a read-only calendar."""
@@ -248,45 +354,44 @@ class ICSCalendarData:  # pylint: disable=R0902
     def __init__(self, device_data):
         """Set up how we are going to connect to the URL.
 
+        The calendar is downloaded and parsed by a Feed, which is shared with
+        the other calendars using the same URL and settings.
+
         :param device_data Information about the calendar
         """
         self.name = device_data[CONF_NAME]
+        self._device_data = device_data
         self._days = device_data[CONF_DAYS]
         self._offset_hours = device_data[CONF_OFFSET_HOURS]
         self.include_all_day = device_data[CONF_INCLUDE_ALL_DAY]
+        self.serve_stale = bool(device_data.get(CONF_SERVE_STALE))
         self._summary_prefix: str = device_data[CONF_PREFIX]
-        self.parser = GetParser.get_parser(device_data[CONF_PARSER])
-        self.parser.set_filter(
-            Filter(device_data[CONF_EXCLUDE], device_data[CONF_INCLUDE])
+        self._filter = Filter(
+            device_data[CONF_EXCLUDE], device_data[CONF_INCLUDE]
         )
         self.offset = None
         self.event = None
-
-        self._calendar_data = CalendarData(
-            _LOGGER,
-            self.name,
-            device_data[CONF_URL],
-            timedelta(minutes=device_data[CONF_DOWNLOAD_INTERVAL]),
-        )
-
-        self._calendar_data.set_headers(
-            device_data[CONF_USERNAME],
-            device_data[CONF_PASSWORD],
-            device_data[CONF_USER_AGENT],
-            device_data[CONF_ACCEPT_HEADER],
-        )
-
-        if CONF_SET_TIMEOUT in device_data:
-            if device_data[CONF_SET_TIMEOUT]:
-                self._calendar_data.set_timeout(
-                    device_data[CONF_CONNECTION_TIMEOUT]
-                )
+        # The next time the event or offset_reached can change, if known
+        self.next_transition: Optional[datetime] = None
+        # The digest of the calendar next_transition was found for
+        self._digest: Optional[str] = None
+        self._registry: FeedRegistry = None
+        self._feed: Feed = None
+        # The requests in progress, by time frame
+        self._pending: dict[tuple, asyncio.Task] = {}
+        # The events found, by digest and time frame, with when they expire
+        self._events: dict[tuple, tuple[float, list[CalendarEvent]]] = {}
 
     async def async_get_events(
         self, hass: HomeAssistant, start_date: datetime, end_date: datetime
     ) -> list[CalendarEvent]:
         """Get all events in a specific time frame.
 
+        Requests for a time frame that is already being requested wait for
+        that request, instead of downloading and expanding the events again.
+        Overlapping time frames share the expanded occurrences of the
+        parser.
+
         :param hass: Home Assistant object
         :type hass: HomeAssistant
         :param start_date: The first starting date to consider
@@ -294,18 +399,174 @@ class ICSCalendarData:  # pylint: disable=R0902
         :param end_date: The last starting date to consider
         :type end_date: datetime
         """
-        event_list = []
-        if await hass.async_add_executor_job(
-            self._calendar_data.download_calendar
+        key = (start_date, end_date)
+        task = self._pending.get(key)
+        if task is None:
+            task = hass.async_create_task(
+                self._async_get_events(hass, start_date, end_date),
+                f"{self.name} - get events",
+            )
+            if not task.done():
+                self._pending[key] = task
+                task.add_done_callback(lambda _: self._pending.pop(key, None))
+        # Shielded, so a caller going away does not cancel the others
+        return list(await asyncio.shield(task))
+
+    async def _async_get_events(
+        self, hass: HomeAssistant, start_date: datetime, end_date: datetime
+    ) -> list[CalendarEvent]:
+        """Get all events in a specific time frame, for async_get_events.
+
+        The download runs in the event loop; parsing, expanding, and
+        filtering the events run in the executor.  With serve_stale, the
+        events are read from the calendar already parsed, and if it is due
+        to be downloaded again, a refresh is requested from the
+        FeedCoordinator in the background.  The events found are reused for
+        EVENTS_TTL seconds, unless the calendar changes.
+        """
+        feed = self._get_feed(hass)
+        if not self.serve_stale or feed.content_digest is None:
+            await feed.async_update(hass)
+        elif feed.is_due():
+            hass.async_create_background_task(
+                feed.get_coordinator(hass).async_request_refresh(),
+                f"{self.name} - refresh",
+            )
+
+        key = (feed.content_digest, start_date, end_date)
+        now = monotonic()
+        cached = self._events.get(key)
+        if cached is not None and now < cached[0]:
+            return cached[1]
+        events = await hass.async_add_executor_job(
+            self._get_events, feed, start_date, end_date
+        )
+        now = monotonic()
+        self._events = {
+            other: value
+            for other, value in self._events.items()
+            if other[0] == key[0] and now < value[0]
+        }
+        if key[0] is not None:
+            self._events[key] = (now + EVENTS_TTL, events)
+        return events
+
+    async def async_update(self, hass: HomeAssistant):
+        """Refresh the calendar, and get the current or next event.
+
+        The refresh is requested from the FeedCoordinator, which coalesces
+        requests made close together.  The download runs in the event loop,
+        the parsing runs in the executor.
+
+        :param hass: Home Assistant object
+        :type hass: HomeAssistant
+        """
+        _LOGGER.debug("%s: Update was called", self.name)
+        coordinator = self._get_feed(hass).get_coordinator(hass)
+        await coordinator.async_request_refresh()
+        return await self.async_update_event(hass)
+
+    async def async_update_event(self, hass: HomeAssistant):
+        """Get the current or next event, without downloading the calendar.
+
+        The event is only looked for again if the calendar changed, or the
+        next transition was reached.
+
+        :param hass: Home Assistant object
+        :type hass: HomeAssistant
+        """
+        feed = self._get_feed(hass)
+        if (
+            self.next_transition is not None
+            and feed.content_digest == self._digest
+            and _now() < self.next_transition
         ):
-            _LOGGER.debug("%s: Setting calendar content", self.name)
-            self.parser.set_content(self._calendar_data.get())
+            _LOGGER.debug(
+                "%s: Event unchanged until %s", self.name, self.next_transition
+            )
+            return self.event is not None
+        return await hass.async_add_executor_job(self._update, feed)
+
+    async def async_refresh(self, hass: HomeAssistant):
+        """Get the current or next event, without downloading the calendar.
+
+        :param hass: Home Assistant object
+        :type hass: HomeAssistant
+        """
+        feed = self._get_feed(hass)
+        return await hass.async_add_executor_job(self._update, feed)
+
+    def async_add_listener(
+        self, hass: HomeAssistant, update_callback: CALLBACK_TYPE
+    ) -> CALLBACK_TYPE:
+        """Call update_callback when the calendar changes, or is downloaded.
+
+        The calendar is downloaded every download interval while there are
+        listeners.
+
+        :param hass: Home Assistant object
+        :type hass: HomeAssistant
+        :param update_callback: The function to call
+        :type update_callback: CALLBACK_TYPE
+        :return: A function that removes the listener
+        :rtype: CALLBACK_TYPE
+        """
+        coordinator = self._get_feed(hass).get_coordinator(hass)
+        return coordinator.async_add_listener(update_callback)
+
+    async def async_restore(self, hass: HomeAssistant) -> bool:
+        """Restore the calendar from the persistent cache, if enabled.
+
+        :param hass: Home Assistant object
+        :type hass: HomeAssistant
+        :return: True if the calendar was restored
+        :rtype: bool
+        """
+        feed = self._get_feed(hass)
+        if not await feed.async_restore(hass):
+            return False
+        await hass.async_add_executor_job(self._update, feed)
+        return True
+
+    def get_stale_age(self) -> Optional[int]:
+        """Get the time since the calendar was last downloaded.
+
+        :return: The time in seconds, or None if it was not downloaded yet
+        :rtype: Optional[int]
+        """
+        if self._feed is None or self._feed.downloaded_at is None:
+            return None
+        return int((hanow() - self._feed.downloaded_at).total_seconds())
+
+    async def async_release(self):
+        """Stop using the shared Feed."""
+        self._events = {}
+        if self._feed is not None:
+            self._feed = None
+            await self._registry.async_release(self._device_data)
+
+    def _get_feed(self, hass: HomeAssistant) -> Feed:
+        """Return the shared Feed for this calendar, acquiring it if needed."""
+        if self._feed is None:
+            self._registry = FeedRegistry.get_registry(hass)
+            self._feed = self._registry.acquire(self._device_data)
+        return self._feed
+
+    def _get_events(
+        self, feed: Feed, start_date: datetime, end_date: datetime
+    ) -> list[CalendarEvent]:
+        """Get the filtered and prefixed events in a specific time frame.
+
+        This runs in the executor, since expanding the recurring events of a
+        large calendar can take a long time.
+        """
         try:
-            event_list = self.parser.get_event_list(
+            event_list = feed.parser.get_event_list(
                 start=start_date,
                 end=end_date,
                 include_all_day=self.include_all_day,
                 offset_hours=self._offset_hours,
+                filt=self._filter,
             )
         except:  # pylint: disable=W0702
             _LOGGER.error(
@@ -313,31 +574,39 @@ class ICSCalendarData:  # pylint: disable=R0902
                 self.name,
                 exc_info=True,
             )
-            event_list = []
+            return []
 
+        # The occurrences of a recurring event share their summary, so it is
+        # prefixed once for all of them
+        summaries: dict[str, str] = {}
         for event in event_list:
-            event.summary = self._summary_prefix + event.summary
+            summary = summaries.get(event.summary)
+            if summary is None:
+                summary = self._summary_prefix + event.summary
+                summaries[event.summary] = summary
+            event.summary = summary
 
         return event_list
 
-    @Throttle(MIN_TIME_BETWEEN_UPDATES)
-    def update(self):
-        """Get the current or next event."""
-        _LOGGER.debug("%s: Update was called", self.name)
-        if self._calendar_data.download_calendar():
-            _LOGGER.debug("%s: Setting calendar content", self.name)
-            self.parser.set_content(self._calendar_data.get())
+    def _update(self, feed: Feed):
+        """Get the current event, and the next transition."""
+        now = hanow()
+        self.next_transition = None
+        self._digest = feed.content_digest
         try:
-            self.event = self.parser.get_current_event(
+            self.event = feed.parser.get_current_event(
                 include_all_day=self.include_all_day,
-                now=hanow(),
+                now=now,
                 days=self._days,
                 offset_hours=self._offset_hours,
+                filt=self._filter,
             )
         except:  # pylint: disable=W0702
             _LOGGER.error(
                 "update: %s: Failed to parse ICS!", self.name, exc_info=True
             )
+            return False
+        self.offset = None
         if self.event is not None:
             _LOGGER.debug(
                 "%s: got event: %s; start: %s; end: %s; all_day: %s",
@@ -350,7 +619,52 @@ class ICSCalendarData:  # pylint: disable=R0902
             (summary, offset) = extract_offset(self.event.summary, OFFSET)
             self.event.summary = self._summary_prefix + summary
             self.offset = offset
-            return True
+        else:
+            _LOGGER.debug("%s: No event found!", self.name)
+        self.next_transition = self._get_next_transition(feed, now)
+        return self.event is not None
+
+    def _get_next_transition(
+        self, feed: Feed, now: datetime
+    ) -> Optional[datetime]:
+        """Get the next time the event or offset_reached can change.
+
+        The event can only change when an event starts or ends, or when an
+        event starts within days of now.  Events that start more than twice
+        days from now cannot change it before days from now.
+        """
+        now = _now(now)
+        days = timedelta(days=self._days)
+        try:
+            events = feed.parser.get_event_list(
+                start=now,
+                end=now + days * 2,
+                include_all_day=self.include_all_day,
+                offset_hours=self._offset_hours,
+                filt=self._filter,
+            )
+        except:  # pylint: disable=W0702
+            _LOGGER.error(
+                "update: %s: Failed to parse ICS!", self.name, exc_info=True
+            )
+            return None
+
+        transitions = [now + days]
+        for event in events:
+            start = event.start_datetime_local
+            transitions += [start - days, start, event.end_datetime_local]
+        if self.event is not None and self.offset is not None:
+            transitions.append(self.event.start_datetime_local + self.offset)
+        return min(
+            (transition for transition in transitions if transition > now),
+            default=None,
+        )
 
-        _LOGGER.debug("%s: No event found!", self.name)
-        return False
+
+def _now(now: Optional[datetime] = None) -> datetime:
+    """Return now, or the current time, with a time zone."""
+    if now is None:
+        now = hanow()
+    if now.tzinfo is None:
+        now = now.astimezone()
+    return now
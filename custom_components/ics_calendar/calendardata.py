@@ -1,36 +1,95 @@
 """Provide CalendarData class."""
 
-import zlib
-from datetime import timedelta
-from gzip import BadGzipFile, GzipFile
+from base64 import b64encode
+from datetime import datetime, timedelta
+from http import HTTPStatus
 from logging import Logger
 from socket import (  # type: ignore[attr-defined]  # private, not in typeshed
     _GLOBAL_DEFAULT_TIMEOUT,
 )
-from threading import Lock
 from urllib.error import ContentTooShortError, HTTPError, URLError
+from urllib.parse import urlsplit
 from urllib.request import (
     HTTPBasicAuthHandler,
     HTTPDigestAuthHandler,
     HTTPPasswordMgrWithDefaultRealm,
+    Request,
     build_opener,
-    install_opener,
     urlopen,
 )
 
+import httpx
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.httpx_client import get_async_client
 from homeassistant.util.dt import now as hanow
 
+from .bodydecoder import BodyDecoder
+from .const import DEFAULT_MAX_BODY_SIZE
+from .downloadscheduler import DownloadScheduler
 
-class CalendarData:
+# The number of bytes read from the connection at a time
+CHUNK_SIZE = 65536
+
+
+class BasicOrDigestAuth(httpx.DigestAuth):
+    """Authenticate with HTTP Digest Auth or HTTP Basic Auth.
+
+    Like HTTPDigestAuthHandler and HTTPBasicAuthHandler together, credentials
+    are only sent after the server asks for them, using the scheme the server
+    asked for.  Digest is preferred if the server offers both.
+    """
+
+    def __init__(self, user_name: str, password: str):
+        """Construct BasicOrDigestAuth object.
+
+        :param user_name: The user name
+        :type user_name: str
+        :param password: The password
+        :type password: str
+        """
+        super().__init__(user_name, password)
+        credentials = b64encode(f"{user_name}:{password}".encode("utf-8"))
+        self._basic_auth_header = f"Basic {credentials.decode('ascii')}"
+
+    def auth_flow(self, request: httpx.Request):
+        """Answer the authentication challenge in the response, if any."""
+        digest_flow = super().auth_flow(request)
+        response = yield digest_flow.send(None)
+        challenges = [
+            challenge.lower()
+            for challenge in response.headers.get_list("www-authenticate")
+        ]
+        if (
+            response.status_code == 401
+            and not any(c.startswith("digest ") for c in challenges)
+            and any(c.startswith("basic") for c in challenges)
+        ):
+            request.headers["Authorization"] = self._basic_auth_header
+            yield request
+            return
+        try:
+            yield digest_flow.send(response)
+        except StopIteration:
+            return
+
+
+class CalendarData:  # pylint: disable=R0902
     """CalendarData class.
 
     The CalendarData class is used to download and cache calendar data from a
     given URL.  Use the get method to retrieve the data after constructing your
-    instance.
+    instance.  Use download_calendar from a worker thread, or
+    async_download_calendar from the event loop.
+
+    Neither changes process-wide state: download_calendar calls the opener
+    built by set_headers directly, and async_download_calendar uses Home
+    Assistant's shared httpx client, which keeps connections to each host
+    open between downloads.
     """
 
-    # Allow only one download at a time globally
-    download_singleton_lock = Lock()
+    # Serialize downloads per URL, and limit how many run at once; set up
+    # again with the configured limits by the integration
+    download_scheduler = DownloadScheduler()
 
     def __init__(
         self,
@@ -55,29 +114,34 @@ class CalendarData:
         self._last_download = None
         self._min_update_time = min_update_time
         self._opener = None
+        self._auth: httpx.Auth | None = None
+        self._headers: dict[str, str] = {}
+        # Conditional request headers for the last URL downloaded
+        self._validators: dict[str, dict[str, str]] = {}
+        # Digest of the body the current data was decoded from
+        self._digest: bytes | None = None
+        self._changed = False
         self.logger = logger
         self.name = name
         self.url = url
         self.connection_timeout = _GLOBAL_DEFAULT_TIMEOUT
+        self.max_body_size = DEFAULT_MAX_BODY_SIZE * 1024 * 1024
+        self._accept_encoding = ", ".join(BodyDecoder.supported_encodings())
 
     def download_calendar(self) -> bool:
         """Download the calendar data.
 
         This only downloads data if self.min_update_time has passed since the
-        last download.
+        last download.  If the server supports conditional requests and the
+        data did not change, the previous data is kept.
 
-        returns: True if data was downloaded, otherwise False.
+        returns: True if the data changed, otherwise False.
         rtype: bool
         """
         self.logger.debug("%s: download_calendar start", self.name)
-        with CalendarData.download_singleton_lock:
-            self.logger.debug("%s: download_calendar lock acquired", self.name)
-            if (
-                self._calendar_data is None
-                or self._last_download is None
-                or (hanow() - self._last_download) > self._min_update_time
-            ):
-                self._calendar_data = None
+        with CalendarData.download_scheduler.slot(self.url):
+            self.logger.debug("%s: download_calendar slot acquired", self.name)
+            if self._should_download():
                 next_url: str = self._make_url()
                 self.logger.debug(
                     "%s: Downloading calendar data from: %s",
@@ -87,11 +151,129 @@ class CalendarData:
                 self._download_data(next_url)
                 self._last_download = hanow()
                 self.logger.debug("%s: download_calendar done", self.name)
-                return self._calendar_data is not None
+                return self.changed_since_last()
 
         self.logger.debug("%s: download_calendar skipped download", self.name)
         return False
 
+    async def async_download_calendar(self, hass: HomeAssistant) -> bool:
+        """Download the calendar data without blocking the event loop.
+
+        This only downloads data if self.min_update_time has passed since the
+        last download.  HTTP and HTTPS data is streamed with Home Assistant's
+        shared httpx client, so no executor thread is used; other URLs, such
+        as file URIs, are read in the executor.  If the server supports
+        conditional requests and the data did not change, the previous data is
+        kept.
+
+        :param hass: Home Assistant object
+        :type hass: HomeAssistant
+        returns: True if the data changed, otherwise False.
+        rtype: bool
+        """
+        self.logger.debug("%s: async_download_calendar start", self.name)
+        async with CalendarData.download_scheduler.async_slot(self.url):
+            self.logger.debug(
+                "%s: async_download_calendar slot acquired", self.name
+            )
+            if self._should_download():
+                next_url: str = self._make_url()
+                self.logger.debug(
+                    "%s: Downloading calendar data from: %s",
+                    self.name,
+                    next_url,
+                )
+                if urlsplit(next_url).scheme in ("http", "https"):
+                    await self._async_download_data(
+                        get_async_client(hass), next_url
+                    )
+                else:
+                    # httpx only supports HTTP; read other URLs, such as
+                    # file URIs, with urllib in the executor
+                    await hass.async_add_executor_job(
+                        self._download_data, next_url
+                    )
+                self._last_download = hanow()
+                self.logger.debug(
+                    "%s: async_download_calendar done", self.name
+                )
+                return self.changed_since_last()
+
+        self.logger.debug(
+            "%s: async_download_calendar skipped download", self.name
+        )
+        return False
+
+    def changed_since_last(self) -> bool:
+        """Indicate if the last download returned different data.
+
+        The data is compared with the data from the previous successful
+        download, so a 304 response, a failed download, or a download of
+        identical data all return False.
+
+        :return: True if the last download changed the data
+        :rtype: bool
+        """
+        return self._changed and self._calendar_data is not None
+
+    def get_digest(self) -> str | None:
+        """Get a digest identifying the downloaded calendar data.
+
+        :return: The hex digest of the data, or None if there is no data
+        :rtype: str | None
+        """
+        if self._calendar_data is None or self._digest is None:
+            return None
+        return self._digest.hex()
+
+    def get_last_download(self) -> datetime | None:
+        """Get the time the calendar data was last downloaded.
+
+        A download that returned 304 Not Modified, or the same data, counts
+        as a download of the data.
+
+        :return: The time of the last download, or None if there is no data
+        :rtype: datetime | None
+        """
+        if self._calendar_data is None:
+            return None
+        return self._last_download
+
+    def get_cache_data(self) -> dict:
+        """Get the data needed to restore this object later.
+
+        :return: The downloaded data, its digest, the HTTP validators, and
+            the time of the last download
+        :rtype: dict
+        """
+        return {
+            "url": self.url,
+            "data": self.get(),
+            "digest": self.get_digest(),
+            "validators": self._validators,
+            "last_download": (
+                self._last_download.isoformat()
+                if self._last_download is not None
+                else None
+            ),
+        }
+
+    def set_cache_data(self, cache_data: dict):
+        """Restore the data returned by get_cache_data.
+
+        :param cache_data: The data returned by get_cache_data
+        :type cache_data: dict
+        """
+        self._calendar_data = cache_data.get("data")
+        digest = cache_data.get("digest")
+        self._digest = bytes.fromhex(digest) if digest else None
+        self._validators = cache_data.get("validators") or {}
+        last_download = cache_data.get("last_download")
+        self._last_download = (
+            datetime.fromisoformat(last_download) if last_download else None
+        )
+        self._changed = False
+
     def get(self) -> str:
         """Get the calendar data that was downloaded.
 
@@ -112,7 +294,8 @@ class CalendarData:
         The user name and password will be set with HTTPBasicAuthHandler and
         HTTPDigestAuthHandler.  Both are attached to a new urlopener, so
         that HTTP Basic Auth and HTTP Digest Auth will be supported when
-        opening the URL.
+        opening the URL.  async_download_calendar uses BasicOrDigestAuth for
+        the same purpose.
 
         If the user_agent parameter is not "", a User-agent header will be
         added to the urlopener.
@@ -134,6 +317,7 @@ class CalendarData:
             self._opener = build_opener(
                 digest_auth_handler, basic_auth_handler
             )
+            self._auth = BasicOrDigestAuth(user_name, password)
 
         additional_headers = []
         if user_agent != "":
@@ -144,6 +328,7 @@ class CalendarData:
             if self._opener is None:
                 self._opener = build_opener()
             self._opener.addheaders = additional_headers
+        self._headers = dict(additional_headers)
 
     def set_timeout(self, connection_timeout: float):
         """Set the connection timeout.
@@ -153,49 +338,157 @@ class CalendarData:
         """
         self.connection_timeout = connection_timeout
 
-    def _decode_data(self, conn):
-        if (
-            "Content-Encoding" in conn.headers
-            and conn.headers["Content-Encoding"] == "gzip"
-        ):
-            reader = GzipFile(fileobj=conn)
-        else:
-            reader = conn
+    def set_compression(self, compression: bool):
+        """Set whether the server may compress the calendar data.
+
+        If compression is True, the Accept-Encoding header lists every
+        encoding BodyDecoder supports; otherwise it asks for identity.
+
+        :param compression: True to accept compressed data
+        :type compression: bool
+        """
+        self._accept_encoding = (
+            ", ".join(BodyDecoder.supported_encodings())
+            if compression
+            else "identity"
+        )
+
+    def set_max_body_size(self, max_body_size: int):
+        """Set the maximum size of the calendar data.
+
+        Downloads that are larger after uncompressing them are discarded,
+        without reading the rest of the data.
+
+        :param max_body_size: The maximum size in megabytes.
+        :type max_body_size: int
+        """
+        self.max_body_size = max_body_size * 1024 * 1024
+
+    def _decode_data(self, conn, previous_data: str | None):
+        """Read and decode the response body from conn."""
+        try:
+            decoder = BodyDecoder(
+                conn.headers.get("Content-Encoding"), self.max_body_size
+            )
+            while chunk := conn.read(CHUNK_SIZE):
+                decoder.write(chunk)
+            return self._decode_body(decoder, previous_data)
+        except ValueError as decode_error:
+            self.logger.error(
+                "%s: Failed to decode data from url(%s): %s",
+                self.name,
+                self.url,
+                decode_error,
+            )
+        return None
+
+    async def _async_download_data(self, client: httpx.AsyncClient, url):
+        """Download the calendar data with client."""
+        self.logger.debug("%s: _async_download_data start", self.name)
+        headers = self._request_headers(url)
+        previous_data = self._calendar_data
+        self._calendar_data = None
+        self._changed = False
         try:
-            return self._decode_stream(reader.read()).replace("\0", "")
-        except zlib.error:
+            status, response_headers, decoder = await self._async_read(
+                client, url, headers
+            )
+            if status == HTTPStatus.NOT_MODIFIED:
+                self.logger.debug("%s: calendar data not modified", self.name)
+                self._calendar_data = previous_data
+                return
+            self._calendar_data = self._decode_body(decoder, previous_data)
+            self._save_validators(url, response_headers)
+            self.logger.debug("%s: _async_download_data done", self.name)
+        except httpx.HTTPStatusError as http_error:
             self.logger.error(
-                "%s: Failed to uncompress gzip data from url(%s): zlib",
+                "%s: Failed to open url(%s): %s",
                 self.name,
                 self.url,
+                http_error.response.reason_phrase,
             )
-        except BadGzipFile as gzip_error:
+        except ValueError as decode_error:
             self.logger.error(
-                "%s: Failed to uncompress gzip data from url(%s): %s",
+                "%s: Failed to decode data from url(%s): %s",
                 self.name,
                 self.url,
-                gzip_error.strerror,
+                decode_error,
+            )
+        except httpx.RequestError as request_error:
+            self.logger.error(
+                "%s: Failed to open url: %s", self.name, request_error
+            )
+        except:  # pylint: disable=W0702
+            self.logger.error(
+                "%s: Failed to open url!", self.name, exc_info=True
             )
-        return None
 
-    def _decode_stream(self, strm):
-        for encoding in "utf-8-sig", "utf-8", "utf-16":
-            try:
-                return strm.decode(encoding)
-            except UnicodeDecodeError:
-                continue
-        return None
+    async def _async_read(
+        self, client: httpx.AsyncClient, url, headers: dict[str, str]
+    ) -> tuple[int, httpx.Headers, BodyDecoder | None]:
+        """Stream the response for url.
+
+        Return the status code, the headers, and a BodyDecoder holding the
+        body, which is None if the status is 304 Not Modified.
+        """
+        timeout = self.connection_timeout
+        if timeout is _GLOBAL_DEFAULT_TIMEOUT:
+            timeout = None
+        decoder = None
+        async with client.stream(
+            "GET",
+            url,
+            headers={**self._headers, **headers},
+            auth=self._auth,
+            timeout=timeout,
+            follow_redirects=True,
+        ) as response:
+            if response.status_code != HTTPStatus.NOT_MODIFIED:
+                response.raise_for_status()
+                decoder = BodyDecoder(
+                    response.headers.get("Content-Encoding"),
+                    self.max_body_size,
+                )
+                # Uncompressed by decoder, so max_body_size is enforced
+                async for chunk in response.aiter_raw():
+                    decoder.write(chunk)
+        return response.status_code, response.headers, decoder
+
+    def _decode_body(self, decoder: BodyDecoder, previous_data: str | None):
+        """Finish decoding the response body written to decoder.
+
+        If the body is the same as the body previous_data was decoded from,
+        previous_data is returned instead.
+        """
+        data = decoder.close()
+        digest = decoder.get_digest()
+        if previous_data is not None and digest == self._digest:
+            self.logger.debug("%s: calendar data did not change", self.name)
+            return previous_data
+        self._digest = digest
+        self._changed = True
+        return data
 
     def _download_data(self, url):
         """Download the calendar data."""
         self.logger.debug("%s: _download_data start", self.name)
+        request = Request(url, headers=self._request_headers(url))
+        previous_data = self._calendar_data
+        self._calendar_data = None
+        self._changed = False
         try:
-            if self._opener is not None:
-                install_opener(self._opener)
-            with urlopen(url, timeout=self.connection_timeout) as conn:
-                self._calendar_data = self._decode_data(conn)
+            # Use our own opener directly; installing it globally would let
+            # concurrent downloads use each other's credentials.
+            opener = urlopen if self._opener is None else self._opener.open
+            with opener(request, timeout=self.connection_timeout) as conn:
+                self._calendar_data = self._decode_data(conn, previous_data)
+                self._save_validators(url, conn.headers)
             self.logger.debug("%s: _download_data done", self.name)
         except HTTPError as http_error:
+            if http_error.code == HTTPStatus.NOT_MODIFIED:
+                self.logger.debug("%s: calendar data not modified", self.name)
+                self._calendar_data = previous_data
+                return
             self.logger.error(
                 "%s: Failed to open url(%s): %s",
                 self.name,
@@ -217,6 +510,40 @@ class CalendarData:
                 "%s: Failed to open url!", self.name, exc_info=True
             )
 
+    def _request_headers(self, url: str) -> dict[str, str]:
+        """Return the headers to send with the request for url."""
+        return {
+            "Accept-Encoding": self._accept_encoding,
+            **self._conditional_headers(url),
+        }
+
+    def _conditional_headers(self, url: str) -> dict[str, str]:
+        """Return the headers for a conditional request for url."""
+        if self._calendar_data is None:
+            return {}
+        return self._validators.get(url, {})
+
+    def _save_validators(self, url: str, headers):
+        """Remember the ETag and Last-Modified headers for url."""
+        self._validators = {}
+        if self._calendar_data is None:
+            return
+        validators = {}
+        if headers.get("ETag"):
+            validators["If-None-Match"] = headers.get("ETag")
+        if headers.get("Last-Modified"):
+            validators["If-Modified-Since"] = headers.get("Last-Modified")
+        if validators:
+            self._validators[url] = validators
+
+    def _should_download(self) -> bool:
+        """Indicate if the data is missing or older than min_update_time."""
+        return (
+            self._calendar_data is None
+            or self._last_download is None
+            or (hanow() - self._last_download) > self._min_update_time
+        )
+
     def _make_url(self):
         """Replace templates in url and encode."""
         now = hanow()
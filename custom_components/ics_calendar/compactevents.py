@@ -0,0 +1,128 @@
+"""Provide CompactEvents class."""
+
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, Iterator, Optional
+
+
+class CompactEvents:
+    """CompactEvents class.
+
+    The CompactEvents class keeps events in columns instead of objects, so
+    a calendar with many events takes little memory.  Starts and ends are
+    kept as seconds since the epoch, with the UTC offset they were given
+    in, in arrays of ints; all day events are kept in a bitset; texts are
+    kept once each, and events refer to them by position.  The events are
+    sorted by start, so the events in a span are found by bisection.
+    """
+
+    def __init__(self, events: Iterable[tuple]):
+        """Construct CompactEvents object.
+
+        :param events: The events, as tuples of start, end, all_day,
+            summary, location, and description; start and end are datetimes
+        :type events: Iterable[tuple]
+        """
+        rows = sorted(
+            (
+                CompactEvents._get_time(start)
+                + CompactEvents._get_time(end)
+                + (all_day, texts)
+                for start, end, all_day, *texts in events
+            ),
+            key=lambda row: (row[0], row[2]),
+        )
+        self.starts = array("q", (row[0] for row in rows))
+        self.ends = array("q", (row[2] for row in rows))
+        self._start_offsets = array("l", (row[1] for row in rows))
+        self._end_offsets = array("l", (row[3] for row in rows))
+        self._all_day = bytearray((len(rows) + 7) // 8)
+        # Each text once, with None first, and the position of the texts of
+        # each event in it
+        self._texts: list[Optional[str]] = [None]
+        positions: dict[Optional[str], int] = {None: 0}
+        self._text_positions = array("L")
+        for index, row in enumerate(rows):
+            if row[4]:
+                self._all_day[index // 8] |= 1 << index % 8
+            for text in row[5]:
+                if text not in positions:
+                    positions[text] = len(self._texts)
+                    self._texts.append(text)
+                self._text_positions.append(positions[text])
+
+    def __len__(self) -> int:
+        """Return the number of events."""
+        return len(self.starts)
+
+    def between(self, start: datetime, end: datetime) -> Iterator[int]:
+        """Iterate over the positions of the events from start to end.
+
+        Only events that start and end from start to end are included.
+        :param start: The start of the span
+        :type start: datetime
+        :param end: The end of the span
+        :type end: datetime
+        :return: The positions, in the order of the starts of the events
+        :rtype: Iterator[int]
+        """
+        first = CompactEvents._get_time(start)[0]
+        last = CompactEvents._get_time(end)[0]
+        for index in range(
+            bisect_left(self.starts, first), bisect_right(self.starts, last)
+        ):
+            if first <= self.ends[index] <= last:
+                yield index
+
+    def is_all_day(self, index: int) -> bool:
+        """Indicate if the event at index is an all day event."""
+        return bool(self._all_day[index // 8] & 1 << index % 8)
+
+    def get_texts(self, index: int) -> Iterator[Optional[str]]:
+        """Get the summary, location, and description of the event at index.
+
+        :param index: The position of the event
+        :type index: int
+        :return: The texts
+        :rtype: Iterator[Optional[str]]
+        """
+        for position in range(index * 3, index * 3 + 3):
+            yield self._texts[self._text_positions[position]]
+
+    def get(self, index: int) -> tuple:
+        """Get the event at index.
+
+        :param index: The position of the event
+        :type index: int
+        :return: The start, end, all_day, summary, location, and
+            description of the event, as given to the constructor
+        :rtype: tuple
+        """
+        return (
+            CompactEvents._make_time(
+                self.starts[index], self._start_offsets[index]
+            ),
+            CompactEvents._make_time(
+                self.ends[index], self._end_offsets[index]
+            ),
+            self.is_all_day(index),
+            *self.get_texts(index),
+        )
+
+    @staticmethod
+    def _get_time(time: datetime) -> tuple[int, int]:
+        """Get the seconds since the epoch, and the UTC offset, of time."""
+        if time.tzinfo is None:
+            time = time.astimezone()
+        return (
+            int(time.timestamp()),
+            int(time.utcoffset().total_seconds()),
+        )
+
+    @staticmethod
+    def _make_time(seconds: int, offset: int) -> datetime:
+        """Make the time returned by _get_time into a datetime again."""
+        return datetime.fromtimestamp(
+            seconds, timezone(timedelta(seconds=offset))
+        )
@@ -22,17 +22,25 @@ from homeassistant.helpers.selector import selector
 from . import (
     CONF_ACCEPT_HEADER,
     CONF_ADV_CONNECT_OPTS,
+    CONF_COMPRESSION,
     CONF_CONNECTION_TIMEOUT,
     CONF_DAYS,
     CONF_DOWNLOAD_INTERVAL,
     CONF_INCLUDE_ALL_DAY,
+    CONF_MAX_BODY_SIZE,
     CONF_OFFSET_HOURS,
+    CONF_PARSE_IN_PROCESS,
     CONF_PARSER,
+    CONF_PERSISTENT_CACHE,
     CONF_REQUIRES_AUTH,
+    CONF_RETAIN_FUTURE_DAYS,
+    CONF_RETAIN_PAST_DAYS,
+    CONF_SERVE_STALE,
     CONF_SET_TIMEOUT,
     CONF_USER_AGENT,
 )
-from .const import DOMAIN
+from .const import DEFAULT_MAX_BODY_SIZE, DOMAIN
+from .getparser import GetParser
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -52,8 +60,21 @@ CALENDAR_OPTS_SCHEMA = vol.Schema(
         vol.Optional(CONF_DOWNLOAD_INTERVAL, default=15): cv.positive_int,
         vol.Optional(CONF_OFFSET_HOURS, default=0): int,
         vol.Optional(CONF_PARSER, default="rie"): selector(
-            {"select": {"options": ["rie", "ics"], "mode": "dropdown"}}
+            {
+                "select": {
+                    "options": GetParser.get_names(),
+                    "mode": "dropdown",
+                }
+            }
         ),
+        vol.Optional(CONF_PERSISTENT_CACHE, default=False): cv.boolean,
+        vol.Optional(
+            CONF_MAX_BODY_SIZE, default=DEFAULT_MAX_BODY_SIZE
+        ): cv.positive_int,
+        vol.Optional(CONF_PARSE_IN_PROCESS, default=False): cv.boolean,
+        vol.Optional(CONF_SERVE_STALE, default=False): cv.boolean,
+        vol.Optional(CONF_RETAIN_PAST_DAYS, default=0): cv.positive_int,
+        vol.Optional(CONF_RETAIN_FUTURE_DAYS, default=0): cv.positive_int,
     }
 )
 
@@ -76,6 +97,7 @@ ADVANCED_CONNECT_OPTS_SCHEMA = vol.Schema(
     {
         vol.Optional(CONF_ACCEPT_HEADER, default=""): cv.string,
         vol.Optional(CONF_USER_AGENT, default=""): cv.string,
+        vol.Optional(CONF_COMPRESSION, default=True): cv.boolean,
         vol.Optional(CONF_SET_TIMEOUT, default=False): cv.boolean,
     }
 )
@@ -2,6 +2,8 @@
 
 VERSION = "5.0.4"
 DOMAIN = "ics_calendar"
+DATA_FEED_REGISTRY = f"{DOMAIN}_feed_registry"
+DATA_PARSER_POOL = f"{DOMAIN}_parser_pool"
 
 CONF_DEVICE_ID = "device_id"
 CONF_CALENDARS = "calendars"
@@ -16,3 +18,16 @@ CONF_CONNECTION_TIMEOUT = "connection_timeout"
 CONF_SET_TIMEOUT = "set_connection_timeout"
 CONF_REQUIRES_AUTH = "requires_auth"
 CONF_ADV_CONNECT_OPTS = "advanced_connection_options"
+CONF_PERSISTENT_CACHE = "persistent_cache"
+CONF_MAX_BODY_SIZE = "max_body_size"
+CONF_COMPRESSION = "compression"
+CONF_PARSE_IN_PROCESS = "parse_in_process"
+CONF_SERVE_STALE = "serve_stale"
+CONF_RETAIN_PAST_DAYS = "retain_past_days"
+CONF_RETAIN_FUTURE_DAYS = "retain_future_days"
+CONF_MAX_DOWNLOADS = "max_downloads"
+CONF_MAX_DOWNLOADS_PER_HOST = "max_downloads_per_host"
+
+DEFAULT_MAX_DOWNLOADS = 8
+DEFAULT_MAX_DOWNLOADS_PER_HOST = 2
+DEFAULT_MAX_BODY_SIZE = 50
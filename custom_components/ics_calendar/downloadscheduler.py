@@ -0,0 +1,169 @@
+"""Provide DownloadScheduler class."""
+
+import asyncio
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from threading import Event, Lock
+from typing import AsyncIterator, Iterator
+from urllib.parse import urlsplit
+from weakref import WeakValueDictionary
+
+from .const import DEFAULT_MAX_DOWNLOADS, DEFAULT_MAX_DOWNLOADS_PER_HOST
+
+
+class DownloadScheduler:
+    """DownloadScheduler class.
+
+    The DownloadScheduler class decides when a download may start.  Downloads
+    of the same URL are serialized, at most max_per_host downloads run against
+    a single host at a time, and at most max_downloads run in total.  Use the
+    slot method as a context manager around a blocking download, or the
+    async_slot method around a download running in the event loop.  Blocking
+    and asynchronous downloads share the same limits.  The slots of URLs and
+    hosts are only kept while a download uses them.
+    """
+
+    def __init__(
+        self,
+        max_downloads: int = DEFAULT_MAX_DOWNLOADS,
+        max_per_host: int = DEFAULT_MAX_DOWNLOADS_PER_HOST,
+    ):
+        """Construct DownloadScheduler object.
+
+        :param max_downloads: The maximum number of concurrent downloads
+        :type max_downloads: int
+        :param max_per_host: The maximum number of concurrent downloads from
+            a single host
+        :type max_per_host: int
+        """
+        if max_downloads < 1 or max_per_host < 1:
+            raise ValueError("Download limits must be at least 1")
+        self.max_downloads = max_downloads
+        self.max_per_host = max_per_host
+        self._lock = Lock()
+        self._url_slots: WeakValueDictionary[str, _Slots] = (
+            WeakValueDictionary()
+        )
+        self._host_slots: WeakValueDictionary[str, _Slots] = (
+            WeakValueDictionary()
+        )
+        self._slots = _Slots(max_downloads)
+
+    @contextmanager
+    def slot(self, url: str) -> Iterator[None]:
+        """Wait until url may be downloaded, and hold the slot until done.
+
+        The slots are always acquired in the same order (URL, host, global),
+        so callers cannot deadlock each other.
+
+        :param url: The URL that will be downloaded
+        :type url: str
+        """
+        url_slot, host_slot = self._get_slots(url)
+        with url_slot, host_slot, self._slots:
+            yield
+
+    @asynccontextmanager
+    async def async_slot(self, url: str) -> AsyncIterator[None]:
+        """Wait until url may be downloaded, and hold the slot until done.
+
+        This must be called from the event loop.
+
+        :param url: The URL that will be downloaded
+        :type url: str
+        """
+        url_slot, host_slot = self._get_slots(url)
+        async with url_slot, host_slot, self._slots:
+            yield
+
+    def _get_slots(self, url: str) -> tuple["_Slots", "_Slots"]:
+        """Return the slots of url and its host."""
+        host = DownloadScheduler._host_key(url)
+        with self._lock:
+            url_slot = self._url_slots.get(url)
+            if url_slot is None:
+                url_slot = _Slots(1)
+                self._url_slots[url] = url_slot
+            host_slot = self._host_slots.get(host)
+            if host_slot is None:
+                host_slot = _Slots(self.max_per_host)
+                self._host_slots[host] = host_slot
+        return url_slot, host_slot
+
+    @staticmethod
+    def _host_key(url: str) -> str:
+        """Return the key used to limit downloads per host."""
+        parts = urlsplit(url)
+        return f"{parts.hostname}:{parts.port}"
+
+
+class _Slots:
+    """A semaphore that threads and event loops can wait for together.
+
+    Threads wait for an Event, and coroutines for a future of their loop.
+    Slots are handed out in the order they were asked for.
+    """
+
+    def __init__(self, value: int):
+        """Construct _Slots object."""
+        self._lock = Lock()
+        self._value = value
+        self._waiters: deque[Event | asyncio.Future] = deque()
+
+    def __enter__(self):
+        """Take a slot, blocking the thread until one is free."""
+        with self._lock:
+            if self._value > 0 and not self._waiters:
+                self._value -= 1
+                return
+            event = Event()
+            self._waiters.append(event)
+        event.wait()
+
+    def __exit__(self, *exc_info):
+        """Give the slot back."""
+        self.release()
+
+    async def __aenter__(self):
+        """Take a slot, waiting in the event loop until one is free."""
+        with self._lock:
+            if self._value > 0 and not self._waiters:
+                self._value -= 1
+                return
+            future = asyncio.get_running_loop().create_future()
+            self._waiters.append(future)
+        try:
+            await future
+        except asyncio.CancelledError:
+            with self._lock:
+                if future in self._waiters:
+                    self._waiters.remove(future)
+                    raise
+            # The slot was handed over; _wake gives it back if it was not
+            # delivered, otherwise it is given back here.
+            if not future.cancelled():
+                self.release()
+            raise
+
+    async def __aexit__(self, *exc_info):
+        """Give the slot back."""
+        self.release()
+
+    def release(self):
+        """Give a slot back, handing it to the first waiter, if any."""
+        with self._lock:
+            if not self._waiters:
+                self._value += 1
+                return
+            waiter = self._waiters.popleft()
+        if isinstance(waiter, Event):
+            waiter.set()
+        else:
+            waiter.get_loop().call_soon_threadsafe(self._wake, waiter)
+
+    def _wake(self, future: asyncio.Future):
+        """Deliver a slot to a waiting coroutine, in its loop."""
+        if future.cancelled():
+            self.release()
+        else:
+            future.set_result(None)
@@ -0,0 +1,57 @@
+"""Provide EventIndex class."""
+
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+from typing import Any, Callable
+
+
+class EventIndex:  # pylint: disable=R0903
+    """EventIndex class.
+
+    The EventIndex class sorts events by their start and end once, so the
+    events overlapping a span can be found by bisection instead of checking
+    every event.  Along with the starts, it keeps the latest end of the
+    events up to each position: every event before the first position whose
+    latest end reaches the span ends before the span starts.  The events
+    keep the order they were given in, unless they are asked for by start.
+    """
+
+    def __init__(self, events: list, key: Callable[[Any], tuple]):
+        """Construct EventIndex object.
+
+        :param events: The events to index
+        :type events: list
+        :param key: A function returning the start and end of an event, as
+            values that can be compared with each other and with the spans
+            passed to between
+        :type key: Callable[[Any], tuple]
+        """
+        self.events: list = list(events)
+        keys = [key(event) for event in self.events]
+        # The positions of the events, sorted by start and end
+        self._order: list[int] = sorted(range(len(keys)), key=keys.__getitem__)
+        self._starts: list = [keys[index][0] for index in self._order]
+        self._latest_ends: list = list(
+            accumulate((keys[index][1] for index in self._order), max)
+        )
+
+    def between(self, start, end, by_start: bool = False) -> list:
+        """Get the events that may overlap the span from start to end.
+
+        Every event that starts at or before end, and ends at or after
+        start, is returned.  Events that end before start may be returned
+        too, when a longer event starts before them.
+
+        :param start: The start of the span
+        :param end: The end of the span
+        :param by_start: If True, sort the events by start and end
+        :type by_start: bool
+        :return: The events
+        :rtype: list
+        """
+        first = bisect_left(self._latest_ends, start)
+        last = bisect_right(self._starts, end)
+        positions = self._order[first:last]
+        if not by_start:
+            positions.sort()
+        return [self.events[index] for index in positions]
@@ -0,0 +1,97 @@
+"""Provide EventSnapshot class."""
+
+from datetime import date, datetime
+from typing import Any, Optional
+
+SNAPSHOT_VERSION = 1
+
+
+class EventSnapshot:
+    """EventSnapshot class.
+
+    The EventSnapshot class holds the events a parser expanded for a time
+    window, in a compact form that can be saved as JSON and loaded again
+    without parsing the calendar.  Each event is a list of values chosen by
+    the parser; dates and datetimes are stored as ISO 8601 strings.  A window
+    of None means the snapshot holds every event of the calendar.
+    """
+
+    def __init__(
+        self,
+        start: Optional[datetime],
+        end: Optional[datetime],
+        events: list[list[Any]],
+    ):
+        """Construct EventSnapshot object.
+
+        :param start: The start of the window the events were expanded for
+        :type start: Optional[datetime]
+        :param end: The end of the window the events were expanded for
+        :type end: Optional[datetime]
+        :param events: The events, as lists of values
+        :type events: list[list[Any]]
+        """
+        self.start = start
+        self.end = end
+        self.events = events
+
+    def as_dict(self) -> dict:
+        """Return the snapshot as a dict that can be saved as JSON.
+
+        :return: The snapshot
+        :rtype: dict
+        """
+        return {
+            "version": SNAPSHOT_VERSION,
+            "start": EventSnapshot.encode_time(self.start),
+            "end": EventSnapshot.encode_time(self.end),
+            "events": self.events,
+        }
+
+    @staticmethod
+    def from_dict(snapshot: dict) -> Optional["EventSnapshot"]:
+        """Return the EventSnapshot saved by as_dict.
+
+        :param snapshot: The dict returned by as_dict
+        :type snapshot: dict
+        :return: The EventSnapshot, or None if snapshot cannot be used
+        :rtype: Optional[EventSnapshot]
+        """
+        if snapshot.get("version") != SNAPSHOT_VERSION:
+            return None
+        try:
+            return EventSnapshot(
+                EventSnapshot.decode_time(snapshot["start"]),
+                EventSnapshot.decode_time(snapshot["end"]),
+                snapshot["events"],
+            )
+        except (KeyError, TypeError, ValueError):
+            return None
+
+    @staticmethod
+    def encode_time(value: Optional[date | datetime]) -> Optional[str]:
+        """Return value as an ISO 8601 string.
+
+        :param value: The date or datetime to encode
+        :type value: Optional[date | datetime]
+        :return: The ISO 8601 string, or None
+        :rtype: Optional[str]
+        """
+        if value is None:
+            return None
+        return value.isoformat()
+
+    @staticmethod
+    def decode_time(value: Optional[str]) -> Optional[date | datetime]:
+        """Return the date or datetime encoded by encode_time.
+
+        :param value: The ISO 8601 string to decode
+        :type value: Optional[str]
+        :return: A date if value has no time, otherwise a datetime
+        :rtype: Optional[date | datetime]
+        """
+        if value is None:
+            return None
+        if len(value) == 10:
+            return date.fromisoformat(value)
+        return datetime.fromisoformat(value)
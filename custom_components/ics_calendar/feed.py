@@ -0,0 +1,402 @@
+"""Provide Feed class."""
+
+import asyncio
+import logging
+from datetime import date, datetime, timedelta
+from typing import Optional
+
+from homeassistant.const import (
+    CONF_NAME,
+    CONF_PASSWORD,
+    CONF_URL,
+    CONF_USERNAME,
+)
+from homeassistant.core import HomeAssistant
+from homeassistant.util.dt import now as hanow
+
+from .calendardata import CalendarData
+from .const import (
+    CONF_ACCEPT_HEADER,
+    CONF_COMPRESSION,
+    CONF_CONNECTION_TIMEOUT,
+    CONF_DAYS,
+    CONF_DOWNLOAD_INTERVAL,
+    CONF_MAX_BODY_SIZE,
+    CONF_PARSE_IN_PROCESS,
+    CONF_PARSER,
+    CONF_PERSISTENT_CACHE,
+    CONF_RETAIN_FUTURE_DAYS,
+    CONF_RETAIN_PAST_DAYS,
+    CONF_SET_TIMEOUT,
+    CONF_USER_AGENT,
+)
+from .feedcache import FeedCache
+from .feedcoordinator import FeedCoordinator
+from .getparser import GetParser
+from .parserpool import ParserPool
+from .retention import Retention
+
+_LOGGER = logging.getLogger(__name__)
+
+# How far before now, and after the days to look ahead, event snapshots reach
+SNAPSHOT_MARGIN = timedelta(days=35)
+
+# How far before now, and after the days to look ahead, events are expanded
+# when parsing in a separate process
+PROCESS_MARGIN = timedelta(days=366)
+
+# The settings that decide what is downloaded, and how it is parsed
+FEED_KEYS = (
+    CONF_URL,
+    CONF_USERNAME,
+    CONF_PASSWORD,
+    CONF_USER_AGENT,
+    CONF_ACCEPT_HEADER,
+    CONF_SET_TIMEOUT,
+    CONF_CONNECTION_TIMEOUT,
+    CONF_DOWNLOAD_INTERVAL,
+    CONF_PARSER,
+    CONF_PERSISTENT_CACHE,
+    CONF_MAX_BODY_SIZE,
+    CONF_COMPRESSION,
+    CONF_PARSE_IN_PROCESS,
+    CONF_RETAIN_PAST_DAYS,
+    CONF_RETAIN_FUTURE_DAYS,
+)
+
+
+class Feed:  # pylint: disable=R0902
+    """Feed class.
+
+    The Feed class downloads and parses a calendar once for every calendar
+    entity that uses it.  The parser is shared; entities pass their own
+    Filter when they get events from it, and must not change its content.
+
+    With parse_in_process, the calendar is parsed by the ParserPool, and the
+    parser only loads the events it returns.  Events outside the window
+    expanded by the ParserPool are still read by parsing the calendar in
+    Home Assistant's process.
+
+    While calendars listen to it, the FeedCoordinator returned by
+    get_coordinator downloads the calendar every download interval.
+
+    With retain_past_days or retain_future_days, the events outside that
+    window are dropped before the calendar is given to the parser.  The
+    calendar is given to the parser again every day, so the window moves
+    along, even if the calendar does not change.
+    """
+
+    def __init__(self, device_data: dict):
+        """Construct Feed object.
+
+        :param device_data: Information about the calendar
+        :type device_data: dict
+        """
+        self.name: str = device_data[CONF_NAME]
+        self.days: int = device_data[CONF_DAYS]
+        self.download_interval = timedelta(
+            minutes=device_data[CONF_DOWNLOAD_INTERVAL]
+        )
+        self._parser_name: str = device_data[CONF_PARSER]
+        self.parser = GetParser.get_parser(self._parser_name)
+        self._persistent_cache: bool = device_data.get(CONF_PERSISTENT_CACHE)
+        self._parse_in_process: bool = device_data.get(CONF_PARSE_IN_PROCESS)
+        self._retention: Optional[Retention] = None
+        if device_data.get(CONF_RETAIN_PAST_DAYS) or device_data.get(
+            CONF_RETAIN_FUTURE_DAYS
+        ):
+            self._retention = Retention(
+                device_data.get(CONF_RETAIN_PAST_DAYS) or 0,
+                device_data.get(CONF_RETAIN_FUTURE_DAYS) or 0,
+            )
+        # The day the events outside the window were last dropped for
+        self._pruned_on: Optional[date] = None
+        # The snapshot the parser was given by the ParserPool, if any
+        self._snapshot: Optional[dict] = None
+        self._device_data = device_data
+        self._feed_cache: FeedCache = None
+        self._coordinator: FeedCoordinator = None
+        self._restored: Optional[bool] = None
+        # The last time the calendar was downloaded, even if the last
+        # download failed
+        self.downloaded_at: Optional[datetime] = None
+        self._lock = asyncio.Lock()
+        # Digests of the downloaded data given to the parser, and of the
+        # cached data
+        self._content_digest: str = None
+        self._cached_digest: str = None
+
+        self.calendar_data = CalendarData(
+            _LOGGER,
+            self.name,
+            device_data[CONF_URL],
+            self.download_interval,
+        )
+
+        self.calendar_data.set_headers(
+            device_data[CONF_USERNAME],
+            device_data[CONF_PASSWORD],
+            device_data[CONF_USER_AGENT],
+            device_data[CONF_ACCEPT_HEADER],
+        )
+
+        if CONF_SET_TIMEOUT in device_data:
+            if device_data[CONF_SET_TIMEOUT]:
+                self.calendar_data.set_timeout(
+                    device_data[CONF_CONNECTION_TIMEOUT]
+                )
+
+        if device_data.get(CONF_COMPRESSION) is False:
+            self.calendar_data.set_compression(False)
+
+        if device_data.get(CONF_MAX_BODY_SIZE):
+            self.calendar_data.set_max_body_size(
+                device_data[CONF_MAX_BODY_SIZE]
+            )
+
+    @property
+    def content_digest(self) -> Optional[str]:
+        """Return the digest of the calendar the parser was given, if any.
+
+        With a retention window, the digest includes the day events outside
+        the window were dropped for, since the parser is given other events
+        when the window moves, even if the download did not change.
+        """
+        if self._content_digest is None or self._pruned_on is None:
+            return self._content_digest
+        return f"{self._content_digest}:{self._pruned_on.isoformat()}"
+
+    @staticmethod
+    def get_key(device_data: dict) -> tuple:
+        """Return the key of the Feed for device_data.
+
+        Calendars with the same key can share a Feed.
+
+        :param device_data: Information about the calendar
+        :type device_data: dict
+        :return: The key
+        :rtype: tuple
+        """
+        return tuple(device_data.get(key) for key in FEED_KEYS)
+
+    def get_coordinator(self, hass: HomeAssistant) -> FeedCoordinator:
+        """Return the FeedCoordinator for this calendar, creating it if needed.
+
+        :param hass: Home Assistant object
+        :type hass: HomeAssistant
+        :return: The FeedCoordinator
+        :rtype: FeedCoordinator
+        """
+        if self._coordinator is None:
+            self._coordinator = FeedCoordinator(hass, self)
+        return self._coordinator
+
+    async def async_shutdown(self):
+        """Stop the FeedCoordinator, if there is one."""
+        if self._coordinator is not None:
+            await self._coordinator.async_shutdown()
+            self._coordinator = None
+
+    def is_due(self) -> bool:
+        """Indicate if the download interval has passed since the download.
+
+        :return: True if the calendar is due to be downloaded again
+        :rtype: bool
+        """
+        return (
+            self.downloaded_at is None
+            or hanow() - self.downloaded_at > self.download_interval
+        )
+
+    async def async_update(self, hass: HomeAssistant) -> bool:
+        """Download the calendar, and parse it if it changed.
+
+        The download runs in the event loop, the parsing runs in the executor.
+        Concurrent calls wait for the first one, instead of downloading again.
+
+        :param hass: Home Assistant object
+        :type hass: HomeAssistant
+        :return: True if the calendar changed, or was given to the parser
+            again for a new window
+        :rtype: bool
+        """
+        async with self._lock:
+            changed = await self.calendar_data.async_download_calendar(hass)
+            self.downloaded_at = (
+                self.calendar_data.get_last_download() or self.downloaded_at
+            )
+            if not changed and not self._is_window_moved():
+                return False
+            _LOGGER.debug("%s: Setting calendar content", self.name)
+            await self._async_set_content(hass)
+            await self._async_save_cache(hass)
+            return True
+
+    async def async_restore(self, hass: HomeAssistant) -> bool:
+        """Restore the calendar from the persistent cache, if enabled.
+
+        The restored calendar is used until the download interval has passed
+        since it was downloaded; the next download then revalidates it.  If
+        an event snapshot was cached with the calendar, the calendar is not
+        parsed until events outside the snapshot are needed.  The cache is
+        only read once; later calls return the same result.
+
+        :param hass: Home Assistant object
+        :type hass: HomeAssistant
+        :return: True if the calendar was restored
+        :rtype: bool
+        """
+        if not self._persistent_cache:
+            return False
+        async with self._lock:
+            if self._restored is None:
+                self._restored = await self._async_restore(hass)
+            return self._restored
+
+    async def _async_restore(self, hass: HomeAssistant) -> bool:
+        """Restore the calendar and event snapshot from the cache."""
+        feed_cache = self._get_feed_cache(hass)
+        if not await feed_cache.async_restore(self.calendar_data):
+            return False
+        self.downloaded_at = self.calendar_data.get_last_download()
+        _LOGGER.debug("%s: Restored calendar from cache", self.name)
+        if await hass.async_add_executor_job(
+            self._restore, feed_cache.snapshot
+        ):
+            return True
+        try:
+            await self._async_set_content(hass)
+        except:  # pylint: disable=W0702
+            _LOGGER.error(
+                "_async_restore: %s: Failed to parse ICS!",
+                self.name,
+                exc_info=True,
+            )
+            return False
+        return True
+
+    async def _async_set_content(self, hass: HomeAssistant):
+        """Give the downloaded calendar to the parser.
+
+        The calendar is parsed by the ParserPool if parse_in_process is set;
+        if that fails, it is parsed in the executor.
+        """
+        if self._parse_in_process and await self._async_set_snapshot(hass):
+            return
+        await hass.async_add_executor_job(self._set_content)
+
+    async def _async_set_snapshot(self, hass: HomeAssistant) -> bool:
+        """Parse the calendar in the ParserPool, and load its events."""
+        digest = self.calendar_data.get_digest()
+        content = await hass.async_add_executor_job(self._get_content)
+        now = hanow()
+        try:
+            snapshot = await ParserPool.get_pool(hass).async_get_snapshot(
+                self._parser_name,
+                content,
+                now - PROCESS_MARGIN,
+                now + timedelta(days=self.days) + PROCESS_MARGIN,
+            )
+        except:  # pylint: disable=W0702
+            _LOGGER.error(
+                "_async_set_snapshot: %s: Failed to parse ICS in worker!",
+                self.name,
+                exc_info=True,
+            )
+            return False
+        if snapshot is None:
+            return False
+        snapshot["digest"] = digest
+        snapshot["parser"] = self._parser_name
+        if not await hass.async_add_executor_job(
+            self.parser.set_snapshot, snapshot, content
+        ):
+            return False
+        self._content_digest = digest
+        self._snapshot = snapshot
+        return True
+
+    async def _async_save_cache(self, hass: HomeAssistant):
+        """Save the calendar and an event snapshot, if they changed."""
+        digest = self._content_digest
+        if (
+            not self._persistent_cache
+            or digest is None
+            or digest == self._cached_digest
+        ):
+            return
+        self._cached_digest = digest
+        snapshot = self._snapshot
+        if snapshot is None:
+            snapshot = await hass.async_add_executor_job(
+                self._get_snapshot, digest
+            )
+        await self._get_feed_cache(hass).async_save(
+            self.calendar_data, snapshot
+        )
+
+    def _get_feed_cache(self, hass: HomeAssistant) -> FeedCache:
+        """Return the FeedCache for this calendar, creating it if needed."""
+        if self._feed_cache is None:
+            self._feed_cache = FeedCache(hass, self._device_data)
+        return self._feed_cache
+
+    def _get_snapshot(self, digest: str) -> Optional[dict]:
+        """Get an event snapshot from the parser, for the cache."""
+        now = hanow()
+        try:
+            snapshot = self.parser.get_snapshot(
+                now - SNAPSHOT_MARGIN,
+                now + timedelta(days=self.days) + SNAPSHOT_MARGIN,
+            )
+        except:  # pylint: disable=W0702
+            _LOGGER.error(
+                "_get_snapshot: %s: Failed to parse ICS!",
+                self.name,
+                exc_info=True,
+            )
+            return None
+        if snapshot is not None:
+            snapshot["digest"] = digest
+            snapshot["parser"] = self._parser_name
+        return snapshot
+
+    def _restore(self, snapshot: Optional[dict]) -> bool:
+        """Load the cached snapshot, if it can be used."""
+        if (
+            snapshot is not None
+            and snapshot.get("parser") == self._parser_name
+            and self.parser.set_snapshot(snapshot, self._get_content())
+        ):
+            _LOGGER.debug("%s: Restored event snapshot", self.name)
+            self._content_digest = snapshot["digest"]
+            self._cached_digest = snapshot["digest"]
+            self._snapshot = None
+            return True
+        return False
+
+    def _set_content(self):
+        """Give the downloaded calendar to the parser."""
+        digest = self.calendar_data.get_digest()
+        self.parser.set_content(self._get_content())
+        self._content_digest = digest
+        self._snapshot = None
+
+    def _get_content(self) -> Optional[str]:
+        """Get the downloaded calendar, without the events outside the window.
+
+        This runs in the executor, since a large calendar takes a while to
+        read.
+        """
+        content = self.calendar_data.get()
+        if self._retention is None or content is None:
+            return content
+        now = hanow()
+        self._pruned_on = now.date()
+        return self._retention.prune(content, now)
+
+    def _is_window_moved(self) -> bool:
+        """Indicate if the window has moved since events were dropped."""
+        return (
+            self._pruned_on is not None and self._pruned_on != hanow().date()
+        )
@@ -0,0 +1,119 @@
+"""Provide FeedCache class."""
+
+import json
+from hashlib import sha256
+from typing import Optional
+
+from homeassistant.const import CONF_PASSWORD, CONF_URL, CONF_USERNAME
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+
+from .calendardata import CalendarData
+from .const import (
+    CONF_ACCEPT_HEADER,
+    CONF_PARSER,
+    CONF_RETAIN_FUTURE_DAYS,
+    CONF_RETAIN_PAST_DAYS,
+    CONF_USER_AGENT,
+    DOMAIN,
+)
+
+FEED_CACHE_VERSION = 1
+
+# The settings that decide what is downloaded, and the snapshot the parser
+# makes of it; calendars that differ in any of them have separate caches
+CACHE_KEYS = (
+    CONF_URL,
+    CONF_USERNAME,
+    CONF_PASSWORD,
+    CONF_USER_AGENT,
+    CONF_ACCEPT_HEADER,
+    CONF_PARSER,
+    CONF_RETAIN_PAST_DAYS,
+    CONF_RETAIN_FUTURE_DAYS,
+)
+
+
+class FeedCache:
+    """FeedCache class.
+
+    The FeedCache class keeps the downloaded data of a CalendarData object in
+    Home Assistant's .storage directory, so it survives a restart.  The
+    cached data includes the HTTP validators and the time of the download,
+    so the calendar can be used right away and revalidated later.  An event
+    snapshot from the parser can be cached along with the data; it is only
+    restored if it was made from the same data.
+    """
+
+    def __init__(self, hass: HomeAssistant, device_data: dict):
+        """Construct FeedCache object.
+
+        :param hass: Home Assistant object
+        :type hass: HomeAssistant
+        :param device_data: Information about the calendar
+        :type device_data: dict
+        """
+        self.url = device_data[CONF_URL]
+        self.snapshot: Optional[dict] = None
+        # URLs often contain secrets, so they are not used as file names.
+        self._store = Store(
+            hass,
+            FEED_CACHE_VERSION,
+            FeedCache.storage_key(device_data),
+            private=True,
+        )
+
+    @staticmethod
+    def storage_key(device_data: dict) -> str:
+        """Return the storage key for the calendar of device_data."""
+        settings = json.dumps([device_data.get(key) for key in CACHE_KEYS])
+        digest = sha256(settings.encode("utf-8")).hexdigest()[:16]
+        return f"{DOMAIN}.feed_{digest}"
+
+    async def async_restore(self, calendar_data: CalendarData) -> bool:
+        """Restore calendar_data from the cache.
+
+        The cached snapshot, if any, is available as the snapshot attribute
+        afterwards.
+
+        :param calendar_data: The CalendarData object to restore
+        :type calendar_data: CalendarData
+        :return: True if cached data was restored
+        :rtype: bool
+        """
+        self.snapshot = None
+        cache_data = await self._store.async_load()
+        if not cache_data or cache_data.get("url") != self.url:
+            return False
+        calendar_data.set_cache_data(cache_data)
+        snapshot = cache_data.get("snapshot")
+        if snapshot and FeedCache._is_snapshot_of(snapshot, calendar_data):
+            self.snapshot = snapshot
+        return calendar_data.get() is not None
+
+    async def async_save(
+        self, calendar_data: CalendarData, snapshot: Optional[dict] = None
+    ):
+        """Save the data of calendar_data in the cache.
+
+        :param calendar_data: The CalendarData object to save
+        :type calendar_data: CalendarData
+        :param snapshot: An event snapshot made from the data, which must
+            include the digest of the data
+        :type snapshot: Optional[dict]
+        """
+        if calendar_data.get() is not None:
+            cache_data = calendar_data.get_cache_data()
+            if snapshot and FeedCache._is_snapshot_of(snapshot, calendar_data):
+                cache_data["snapshot"] = snapshot
+            await self._store.async_save(cache_data)
+
+    async def async_remove(self):
+        """Remove the cached data."""
+        await self._store.async_remove()
+
+    @staticmethod
+    def _is_snapshot_of(snapshot: dict, calendar_data: CalendarData) -> bool:
+        """Indicate if snapshot was made from the data of calendar_data."""
+        digest = calendar_data.get_digest()
+        return digest is not None and snapshot.get("digest") == digest
@@ -0,0 +1,124 @@
+"""Provide FeedCoordinator class."""
+
+import logging
+from datetime import timedelta
+from random import uniform
+from typing import TYPE_CHECKING, Optional
+
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP
+from homeassistant.core import CALLBACK_TYPE, Event, HomeAssistant, callback
+from homeassistant.helpers.debounce import Debouncer
+from homeassistant.helpers.update_coordinator import (
+    DataUpdateCoordinator,
+    UpdateFailed,
+)
+
+if TYPE_CHECKING:
+    from .feed import Feed
+
+_LOGGER = logging.getLogger(__name__)
+
+# The largest fraction of the download interval added to it at random, so
+# calendars with the same download interval do not all refresh together
+JITTER = 0.1
+
+# Added to every interval, so a refresh does not come just before the
+# download interval has passed, and skip the download
+MIN_JITTER = timedelta(seconds=5)
+
+# The time before retrying a failed download; it doubles with every failure
+# in a row, up to the download interval
+RETRY_INTERVAL = timedelta(minutes=1)
+
+# How long refresh requests are gathered before refreshing again
+REQUEST_REFRESH_COOLDOWN = 10
+
+
+class FeedCoordinator(DataUpdateCoordinator[tuple]):
+    """FeedCoordinator class.
+
+    The FeedCoordinator class downloads a Feed every download interval while
+    calendars listen to it, and tells them when the calendar changed or was
+    downloaded again.  Its data is the digest of the calendar given to the
+    parser, and the time it was last downloaded.  Every interval
+    gets a random jitter, so calendars do not all refresh together, and
+    failed downloads are retried sooner, backing off with every failure.
+    Refresh requests made close together are coalesced into one refresh.
+    """
+
+    def __init__(self, hass: HomeAssistant, feed: "Feed"):
+        """Construct FeedCoordinator object.
+
+        :param hass: Home Assistant object
+        :type hass: HomeAssistant
+        :param feed: The Feed to download
+        :type feed: Feed
+        """
+        super().__init__(
+            hass,
+            _LOGGER,
+            # Shared by every calendar using the feed, so it has no entry
+            config_entry=None,
+            name=feed.name,
+            update_interval=feed.download_interval,
+            request_refresh_debouncer=Debouncer(
+                hass,
+                _LOGGER,
+                cooldown=REQUEST_REFRESH_COOLDOWN,
+                immediate=True,
+            ),
+            always_update=False,
+        )
+        self.feed = feed
+        self.failures = 0
+        self._unsub_stop: Optional[CALLBACK_TYPE] = hass.bus.async_listen_once(
+            EVENT_HOMEASSISTANT_STOP, self._async_stop
+        )
+
+    async def async_shutdown(self):
+        """Stop refreshing, and stop listening for Home Assistant to stop."""
+        await super().async_shutdown()
+        if self._unsub_stop is not None:
+            self._unsub_stop()
+            self._unsub_stop = None
+
+    async def _async_stop(self, event: Event):  # pylint: disable=W0613
+        """Stop refreshing when Home Assistant stops."""
+        # The listener is removed once it has been called
+        self._unsub_stop = None
+        await self.async_shutdown()
+
+    async def _async_update_data(self) -> tuple:
+        """Download the calendar, and parse it if it changed.
+
+        :raises UpdateFailed: If the calendar could not be downloaded
+        :return: The digest of the calendar given to the parser, and the
+            time it was last downloaded
+        :rtype: tuple
+        """
+        await self.feed.async_update(self.hass)
+        if self.feed.calendar_data.get() is None:
+            self.failures += 1
+            raise UpdateFailed(f"Failed to download {self.feed.name}")
+        self.failures = 0
+        return self.feed.content_digest, self.feed.downloaded_at
+
+    @callback
+    def _schedule_refresh(self):
+        """Schedule the next refresh, after the next interval."""
+        self.update_interval = self.get_next_interval()
+        super()._schedule_refresh()
+
+    def get_next_interval(self) -> timedelta:
+        """Return the time until the next refresh.
+
+        :return: The download interval, or the time until the next retry,
+            plus a random jitter
+        :rtype: timedelta
+        """
+        interval = self.feed.download_interval
+        if self.failures:
+            interval = min(
+                interval, RETRY_INTERVAL * 2 ** min(self.failures - 1, 16)
+            )
+        return interval * (1 + uniform(0, JITTER)) + MIN_JITTER
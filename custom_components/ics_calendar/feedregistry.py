@@ -0,0 +1,68 @@
+"""Provide FeedRegistry class."""
+
+from homeassistant.core import HomeAssistant
+
+from .const import CONF_DAYS, DATA_FEED_REGISTRY
+from .feed import Feed
+
+
+class FeedRegistry:
+    """FeedRegistry class.
+
+    The FeedRegistry class hands out one Feed for all calendars with the same
+    URL, authentication, headers, and parser settings, so the calendar is only
+    downloaded and parsed once.  There is one FeedRegistry per Home Assistant
+    instance; use get_registry to get it.  Every call to acquire must be
+    matched by a call to async_release.
+    """
+
+    def __init__(self):
+        """Construct FeedRegistry object."""
+        self._feeds: dict[tuple, Feed] = {}
+        self._users: dict[tuple, int] = {}
+
+    @staticmethod
+    def get_registry(hass: HomeAssistant) -> "FeedRegistry":
+        """Return the FeedRegistry of hass, creating it if needed.
+
+        :param hass: Home Assistant object
+        :type hass: HomeAssistant
+        :return: The FeedRegistry
+        :rtype: FeedRegistry
+        """
+        return hass.data.setdefault(DATA_FEED_REGISTRY, FeedRegistry())
+
+    def acquire(self, device_data: dict) -> Feed:
+        """Return the Feed for device_data, creating it if needed.
+
+        :param device_data: Information about the calendar
+        :type device_data: dict
+        :return: The Feed
+        :rtype: Feed
+        """
+        key = Feed.get_key(device_data)
+        feed = self._feeds.get(key)
+        if feed is None:
+            feed = Feed(device_data)
+            self._feeds[key] = feed
+            self._users[key] = 0
+        feed.days = max(feed.days, device_data[CONF_DAYS])
+        self._users[key] += 1
+        return feed
+
+    async def async_release(self, device_data: dict):
+        """Release the Feed returned by acquire for device_data.
+
+        The Feed is shut down and forgotten when the last calendar using it
+        releases it.
+
+        :param device_data: Information about the calendar
+        :type device_data: dict
+        """
+        key = Feed.get_key(device_data)
+        if key not in self._users:
+            return
+        self._users[key] -= 1
+        if self._users[key] == 0:
+            del self._users[key]
+            await self._feeds.pop(key).async_shutdown()
@@ -2,16 +2,27 @@
 
 import re
 from ast import literal_eval
-from typing import List, Optional, Pattern
+from typing import Dict, List, Optional, Pattern, Tuple
 
 from homeassistant.components.calendar import CalendarEvent
 
+# The most results kept; they are all dropped when there are more
+MAX_RESULTS = 4096
+
+# Matches the parts of a pattern that refer to its own groups, including
+# conditions on groups, which would refer to the wrong group once it is
+# combined with other patterns
+_GROUP_REFERENCE = re.compile(r"\\[1-9]|\(\?P=|\\g<|\(\?\(")
+
 
 class Filter:
     """Filter class.
 
     The Filter class is used to filter events according to the exclude and
-    include rules.
+    include rules.  The rules with the same flags are combined into one
+    pattern, so each text is searched once per group of flags, instead of
+    once per rule.  Recurring events repeat the same summary and
+    description, so the result for each is kept.
     """
 
     def __init__(self, exclude: str, include: str):
@@ -22,8 +33,9 @@ class Filter:
         :param include: The include rules
         :type include: str
         """
-        self._exclude = Filter.set_rules(exclude)
-        self._include = Filter.set_rules(include)
+        self._exclude = Filter.combine_rules(Filter.set_rules(exclude))
+        self._include = Filter.combine_rules(Filter.set_rules(include))
+        self._results: Dict[Tuple[str, Optional[str]], bool] = {}
 
     @staticmethod
     def set_rules(rules: str) -> List[Pattern]:
@@ -53,6 +65,41 @@ class Filter:
                     arr.append(re.compile(rule, re.IGNORECASE))
         return arr
 
+    @staticmethod
+    def combine_rules(regexes: List[Pattern]) -> List[Pattern]:
+        """Combine the regular expressions with the same flags into one.
+
+        Regular expressions that refer to their own groups, or that cannot
+        be combined, are kept as they are.
+
+        :param regexes: The regular expressions to combine
+        :type regexes: List[Pattern]
+        :return: A regular expression for each group of flags, and the ones
+            that were not combined
+        :rtype: List[Pattern]
+        """
+        groups: Dict[int, List[Pattern]] = {}
+        combined = []
+        for regex in regexes:
+            if regex.groupindex or _GROUP_REFERENCE.search(regex.pattern):
+                combined.append(regex)
+            else:
+                groups.setdefault(regex.flags, []).append(regex)
+        for flags, group in groups.items():
+            if len(group) == 1:
+                combined += group
+                continue
+            try:
+                combined.append(
+                    re.compile(
+                        "|".join(f"(?:{regex.pattern})" for regex in group),
+                        flags,
+                    )
+                )
+            except re.error:
+                combined += group
+        return combined
+
     def _is_match(
         self, summary: str, description: Optional[str], regexes: List[Pattern]
     ) -> bool:
@@ -109,9 +156,15 @@ class Filter:
         :return: true if the event should be included, otherwise false
         :rtype: bool
         """
-        add_event = not self._is_excluded(summary, description)
-        if not add_event:
-            add_event = self._is_included(summary, description)
+        key = (summary, description)
+        add_event = self._results.get(key)
+        if add_event is None:
+            add_event = not self._is_excluded(summary, description)
+            if not add_event:
+                add_event = self._is_included(summary, description)
+            if len(self._results) >= MAX_RESULTS:
+                self._results = {}
+            self._results[key] = add_event
         return add_event
 
     def filter_event(self, event: CalendarEvent) -> bool:
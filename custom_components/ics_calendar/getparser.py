@@ -1,27 +1,75 @@
 """Provide GetParser class."""
 
+from importlib import import_module
+from threading import Lock
+
 from .icalendarparser import ICalendarParser
-from .parsers.parser_ics import ParserICS
-from .parsers.parser_rie import ParserRIE
 
 
-class GetParser:  # pylint: disable=R0903
+class GetParser:
     """Provide get_parser to return an instance of ICalendarParser.
 
-    The class provides a static method , get_instace, to get a parser instance.
-    The non static methods allow this class to act as an "interface" for the
-    parser classes.
+    The class provides a static method, get_parser, to get a parser instance.
+    Parsers are registered by name, with the module and class that provide
+    them.  A parser module is only imported the first time its parser is
+    requested, so the libraries of parsers that are not used are never
+    loaded.  Other parser backends may be added with register.
     """
 
+    # The parsers by name, as classes, or "module:class" until imported
+    _parsers: dict[str, type[ICalendarParser] | str] = {
+        "rie": ".parsers.parser_rie:ParserRIE",
+        "ics": ".parsers.parser_ics:ParserICS",
+        "fast": ".parsers.parser_fast:ParserFast",
+    }
+    _lock = Lock()
+
+    @staticmethod
+    def register(name: str, parser: type[ICalendarParser] | str):
+        """Register a parser under name.
+
+        :param name: The name of the parser, as used in the configuration
+        :type name: str
+        :param parser: The parser class, or "module:class" to import it from
+            when it is first requested; a module starting with "." is
+            relative to this package
+        :type parser: type[ICalendarParser] | str
+        """
+        with GetParser._lock:
+            GetParser._parsers[name] = parser
+
+    @staticmethod
+    def get_names() -> list[str]:
+        """Get the names of the registered parsers.
+
+        :return: The names, in the order they were registered
+        :rtype: list[str]
+        """
+        return list(GetParser._parsers)
+
+    @staticmethod
+    def get_class(parser: str) -> type[ICalendarParser] | None:
+        """Get the class of the requested parser, importing it if needed.
+
+        :param parser: The name of the parser
+        :type parser: str
+        :return: The parser class, or None if there is no such parser
+        :rtype: type[ICalendarParser] | None
+        """
+        with GetParser._lock:
+            parser_cls = GetParser._parsers.get(parser)
+            if isinstance(parser_cls, str):
+                module_name, class_name = parser_cls.split(":")
+                module = import_module(module_name, __package__)
+                parser_cls = getattr(module, class_name)
+                GetParser._parsers[parser] = parser_cls
+            return parser_cls
+
     @staticmethod
     def get_parser(parser: str, *args) -> ICalendarParser | None:
         """Get an instance of the requested parser."""
-        # parser_cls = ICalendarParser.get_class(parser)
-        # if parser_cls is not None:
-        # return parser_cls(*args)
-        if parser == "rie":
-            return ParserRIE(*args)
-        if parser == "ics":
-            return ParserICS(*args)
+        parser_cls = GetParser.get_class(parser)
+        if parser_cls is not None:
+            return parser_cls(*args)
 
         return None
@@ -20,6 +20,32 @@ class ICalendarParser:
         :type content str
         """
 
+    def get_snapshot(self, start: datetime, end: datetime) -> Optional[dict]:
+        """Get the events from start to end as a snapshot.
+
+        The snapshot can be saved as JSON, and passed to set_snapshot later to
+        avoid parsing the same content again.
+        :param start the start of the window to expand events for
+        :type start datetime
+        :param end the end of the window to expand events for
+        :type end datetime
+        :returns the snapshot, or None if there is no content
+        :rtype dict
+        """
+
+    def set_snapshot(self, snapshot: dict, content: str) -> bool:
+        """Use a snapshot from get_snapshot instead of parsing content.
+
+        Content is only parsed if events outside the window of the snapshot
+        are requested.  This may be called instead of set_content.
+        :param snapshot the snapshot returned by get_snapshot
+        :type snapshot dict
+        :param content the calendar data the snapshot was made from
+        :type content str
+        :returns True if the snapshot can be used
+        :rtype bool
+        """
+
     def set_filter(self, filt: Filter):
         """Set a Filter object to filter events.
 
@@ -27,12 +53,13 @@ class ICalendarParser:
         :type exclude: Filter
         """
 
-    def get_event_list(
+    def get_event_list(  # pylint: disable=R0913,R0917
         self,
         start: datetime,
         end: datetime,
         include_all_day: bool,
         offset_hours: int = 0,
+        filt: Optional[Filter] = None,
     ) -> list[CalendarEvent]:
         """Get a list of events.
 
@@ -46,16 +73,19 @@ class ICalendarParser:
         :type include_all_day boolean
         :param offset_hours the number of hours to offset the event
         :type offset_hours int
+        :param filt the Filter to use instead of the one set with set_filter
+        :type filt Filter
         :returns a list of events, or an empty list
         :rtype list[CalendarEvent]
         """
 
-    def get_current_event(
+    def get_current_event(  # pylint: disable=R0913,R0917
         self,
         include_all_day: bool,
         now: datetime,
         days: int,
         offset_hours: int = 0,
+        filt: Optional[Filter] = None,
     ) -> Optional[CalendarEvent]:
         """Get the current or next event.
 
@@ -69,5 +99,7 @@ class ICalendarParser:
         :type days int
         :param offset_hours the number of hours to offset the event
         :type offset_hours int
+        :param filt the Filter to use instead of the one set with set_filter
+        :type filt Filter
         :returns a CalendarEvent or None
         """
@@ -0,0 +1,189 @@
+"""Provide OccurrenceCache class."""
+
+from datetime import date, datetime, timedelta
+from threading import Lock
+from typing import Callable, Optional
+
+from .eventindex import EventIndex
+
+# The longest span of time occurrences are kept for, besides the window the
+# cache was seeded with
+MAX_SPAN = timedelta(days=400)
+
+
+class OccurrenceCache:  # pylint: disable=R0903
+    """OccurrenceCache class.
+
+    The OccurrenceCache class keeps the occurrences a parser expanded, for
+    the windows of time they were expanded for, so they can be read again
+    without expanding recurring events.  Each occurrence is a tuple that
+    starts with the original start and end of the event.  A request for a
+    window that overlaps cached windows only expands the parts that are not
+    cached yet, and merges them into one window.  The occurrences of each
+    window are kept in an EventIndex, so a request only checks the
+    occurrences near it.  When the cached windows
+    span more than max_span, the ones farthest from the last request are
+    dropped.  Each version of a calendar needs its own OccurrenceCache.
+    """
+
+    def __init__(  # pylint: disable=R0913,R0917
+        self,
+        expand: Callable[[datetime, datetime], list[tuple]],
+        is_in_span: Callable[[datetime, datetime, date, date], bool],
+        key: Callable[[tuple], tuple[datetime, datetime]],
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        occurrences: Optional[list[tuple]] = None,
+    ):
+        """Construct OccurrenceCache object.
+
+        :param expand: A function returning the occurrences of every event
+            from start to end
+        :type expand: Callable[[datetime, datetime], list[tuple]]
+        :param is_in_span: A function indicating if an occurrence with the
+            given start and end is in the span from start to end
+        :type is_in_span: Callable[[datetime, datetime, date, date], bool]
+        :param key: A function returning times with a time zone around the
+            start and end of an occurrence, for the EventIndex
+        :type key: Callable[[tuple], tuple[datetime, datetime]]
+        :param start: The start of the window occurrences is for, if any
+        :type start: Optional[datetime]
+        :param end: The end of the window occurrences is for, if any
+        :type end: Optional[datetime]
+        :param occurrences: Every occurrence from start to end
+        :type occurrences: Optional[list[tuple]]
+        """
+        self._expand = expand
+        self._is_in_span = is_in_span
+        self._key = key
+        # Windows as (start, end, EventIndex), sorted and not overlapping
+        self._windows: list[tuple] = []
+        self._lock = Lock()
+        self.max_span = MAX_SPAN
+        if start is not None:
+            self._windows.append(
+                (start, end, EventIndex(occurrences or [], key))
+            )
+            self.max_span = MAX_SPAN + (end - start)
+
+    def get(
+        self, start: datetime, end: datetime, by_start: bool = False
+    ) -> list[tuple]:
+        """Get the occurrences from start to end.
+
+        :param start: The start of the window
+        :type start: datetime
+        :param end: The end of the window
+        :type end: datetime
+        :param by_start: If True, sort the occurrences by their key, instead
+            of the order they were expanded in
+        :type by_start: bool
+        :return: The occurrences in the window
+        :rtype: list[tuple]
+        """
+        with self._lock:
+            if self._windows and (start.tzinfo is None) != (
+                self._windows[0][0].tzinfo is None
+            ):
+                # Times with and without a time zone cannot be compared
+                self._windows = []
+            window = self._trim(self._add_window(start, end), start, end)
+        return [
+            occurrence
+            for occurrence in window[2].between(
+                start.astimezone(), end.astimezone(), by_start
+            )
+            if self._is_in_span(start, end, occurrence[0], occurrence[1])
+        ]
+
+    def _add_window(self, start: datetime, end: datetime) -> tuple:
+        """Merge the window with the cached windows it overlaps.
+
+        :return: The merged window
+        """
+        for window in self._windows:
+            if window[0] <= start and end <= window[1]:
+                return window
+        overlapping = [
+            window
+            for window in self._windows
+            if window[0] <= end and start <= window[1]
+        ]
+        if overlapping:
+            start = min(start, overlapping[0][0])
+            end = max(end, overlapping[-1][1])
+
+        occurrences: list[tuple] = []
+        cursor = start
+        for window in overlapping:
+            if cursor < window[0]:
+                occurrences += self._expand_outside(
+                    cursor, window[0], overlapping
+                )
+            occurrences += window[2].events
+            cursor = window[1]
+        if cursor < end:
+            occurrences += self._expand_outside(cursor, end, overlapping)
+
+        merged = (start, end, EventIndex(occurrences, self._key))
+        self._windows = [
+            window
+            for window in self._windows
+            if not any(window is other for other in overlapping)
+        ] + [merged]
+        return merged
+
+    def _expand_outside(
+        self, start: datetime, end: datetime, windows: list[tuple]
+    ) -> list[tuple]:
+        """Expand the occurrences from start to end not in windows."""
+        return [
+            occurrence
+            for occurrence in self._expand(start, end)
+            if not any(
+                self._is_in_span(window[0], window[1], *occurrence[:2])
+                for window in windows
+            )
+        ]
+
+    def _trim(self, merged: tuple, start: datetime, end: datetime) -> tuple:
+        """Keep at most max_span of windows, nearest to start and end.
+
+        :param merged: The window that holds start to end
+        :return: The part of merged that is kept
+        """
+        current = merged
+        if current[1] - current[0] > self.max_span:
+            trim_start = max(current[0], min(start, end - self.max_span))
+            trim_end = min(current[1], max(end, trim_start + self.max_span))
+            current = (
+                trim_start,
+                trim_end,
+                EventIndex(
+                    [
+                        occurrence
+                        for occurrence in current[2].events
+                        if self._is_in_span(
+                            trim_start, trim_end, *occurrence[:2]
+                        )
+                    ],
+                    self._key,
+                ),
+            )
+
+        def distance(window: tuple) -> timedelta:
+            return max(window[0] - current[1], current[0] - window[1])
+
+        windows = sorted(
+            (window for window in self._windows if window is not merged),
+            key=distance,
+        )
+        span = current[1] - current[0]
+        kept = [current]
+        for window in windows:
+            span += window[1] - window[0]
+            if span > self.max_span:
+                break
+            kept.append(window)
+        self._windows = sorted(kept, key=lambda window: window[0])
+        return current
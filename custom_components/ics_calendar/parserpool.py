@@ -0,0 +1,125 @@
+"""Provide ParserPool class."""
+
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from typing import Optional
+
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP
+from homeassistant.core import Event, HomeAssistant
+
+from .const import DATA_PARSER_POOL
+from .getparser import GetParser
+
+
+class ParserPool:
+    """ParserPool class.
+
+    The ParserPool class parses calendars in a separate worker process, so
+    parsing a large calendar does not hold the GIL of Home Assistant's
+    process.  The worker returns an event snapshot, which is all the main
+    process has to load.  There is one ParserPool per Home Assistant
+    instance; use get_pool to get it.  The worker is started when it is
+    first needed, and stopped when Home Assistant stops.
+    """
+
+    def __init__(self):
+        """Construct ParserPool object."""
+        self._executor: ProcessPoolExecutor = None
+
+    @staticmethod
+    def get_pool(hass: HomeAssistant) -> "ParserPool":
+        """Return the ParserPool of hass, creating it if needed.
+
+        :param hass: Home Assistant object
+        :type hass: HomeAssistant
+        :return: The ParserPool
+        :rtype: ParserPool
+        """
+        pool = hass.data.get(DATA_PARSER_POOL)
+        if pool is None:
+            pool = ParserPool()
+            hass.data[DATA_PARSER_POOL] = pool
+
+            async def async_shutdown(_: Event):
+                await hass.async_add_executor_job(pool.shutdown)
+
+            hass.bus.async_listen_once(
+                EVENT_HOMEASSISTANT_STOP, async_shutdown
+            )
+        return pool
+
+    @staticmethod
+    def get_snapshot(
+        parser_name: str, content: str, start: datetime, end: datetime
+    ) -> Optional[dict]:
+        """Parse content, and return the events from start to end.
+
+        This runs in the worker process.
+
+        :param parser_name: The name of the parser to use
+        :type parser_name: str
+        :param content: The calendar data
+        :type content: str
+        :param start: The start of the window to expand events for
+        :type start: datetime
+        :param end: The end of the window to expand events for
+        :type end: datetime
+        :return: The snapshot returned by the parser's get_snapshot
+        :rtype: Optional[dict]
+        """
+        parser = GetParser.get_parser(parser_name)
+        parser.set_content(content)
+        return parser.get_snapshot(start, end)
+
+    async def async_get_snapshot(
+        self, parser_name: str, content: str, start: datetime, end: datetime
+    ) -> Optional[dict]:
+        """Parse content in the worker, and return events from start to end.
+
+        If the worker died, it is restarted for the next call.
+
+        :param parser_name: The name of the parser to use
+        :type parser_name: str
+        :param content: The calendar data
+        :type content: str
+        :param start: The start of the window to expand events for
+        :type start: datetime
+        :param end: The end of the window to expand events for
+        :type end: datetime
+        :return: The snapshot returned by the parser's get_snapshot
+        :rtype: Optional[dict]
+        """
+        executor = self._get_executor()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                executor,
+                ParserPool.get_snapshot,
+                parser_name,
+                content,
+                start,
+                end,
+            )
+        except BrokenProcessPool:
+            if self._executor is executor:
+                self._executor = None
+            raise
+
+    def shutdown(self):
+        """Stop the worker process, if it is running."""
+        executor = self._executor
+        self._executor = None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """Return the executor, starting it if needed."""
+        if self._executor is None:
+            # Forking a process with threads is unsafe, so always spawn.
+            self._executor = ProcessPoolExecutor(
+                max_workers=1,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
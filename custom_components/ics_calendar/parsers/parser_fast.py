@@ -0,0 +1,101 @@
+"""Support for fast parser."""
+
+import re
+
+from icalendar import Calendar
+
+from .parser_rie import ParserRIE
+
+# The properties of events that are read; every other one is dropped
+EVENT_PROPERTIES = frozenset(
+    {
+        "SUMMARY",
+        "DTSTART",
+        "DTEND",
+        "DURATION",
+        "RRULE",
+        "RDATE",
+        "EXDATE",
+        "RECURRENCE-ID",
+        "LOCATION",
+        "DESCRIPTION",
+        # Needed to match modified occurrences with their series
+        "UID",
+        "SEQUENCE",
+    }
+)
+
+# The components that are kept, with the components they may be in; None
+# is outside any component, which some calendars do for events
+COMPONENTS = {
+    "VCALENDAR": {None},
+    "VEVENT": {"VCALENDAR", None},
+    "VTIMEZONE": {"VCALENDAR", None},
+    "STANDARD": {"VTIMEZONE"},
+    "DAYLIGHT": {"VTIMEZONE"},
+}
+
+# Matches the name of a property, at the start of a line
+_NAME = re.compile(r"[^:;]*")
+
+# Matches the end of a line; other line breaks Python knows, like U+2028,
+# are text in a property, as they are for icalendar
+_NEWLINE = re.compile(r"\r?\n")
+
+# Matches a line break that folds a line, as icalendar unfolds them
+_FOLD = re.compile(r"(\r?\n)+[ \t]")
+
+
+class ParserFast(ParserRIE):
+    """Provide parser that only parses the parts of a calendar it reads.
+
+    The content is read line by line first, keeping the calendar, its
+    events, and time zones, and only the properties of events that are
+    read.  Alarms, attendees, other components, and other properties are
+    dropped before the rest is parsed, and expanded, like ParserRIE does.
+    """
+
+    @staticmethod
+    def _parse_calendar(content: str) -> Calendar:
+        """Parse the parts of content that are read into a calendar object."""
+        return Calendar.from_ical(ParserFast.strip_content(content))
+
+    @staticmethod
+    def strip_content(content: str) -> str:
+        """Drop the components and properties of content that are not read.
+
+        The lines are unfolded first, as RFC 5545 describes, so every
+        property is kept or dropped as a whole.
+        :param content is the calendar data
+        :type content str
+        :returns the calendar data that is read
+        :rtype str
+        """
+        lines: list[str] = []
+        # The components being read, after None for outside any component;
+        # components that are skipped are ""
+        stack: list[str | None] = [None]
+        for line in filter(None, _NEWLINE.split(_FOLD.sub("", content))):
+            if ParserFast._read_line(line, stack):
+                lines.append(line)
+        return "\r\n".join(lines)
+
+    @staticmethod
+    def _read_line(line: str, stack: list[str | None]) -> bool:
+        """Read an unfolded line, entering or leaving components.
+
+        :returns True if the line is kept
+        """
+        name = _NAME.match(line).group().upper()
+        if name == "BEGIN":
+            component = line[6:].strip().upper()
+            if stack[-1] in COMPONENTS.get(component, ()):
+                stack.append(component)
+            else:
+                stack.append("")
+            return stack[-1] != ""
+        if name == "END":
+            return len(stack) > 1 and stack.pop() != ""
+        return stack[-1] != "" and (
+            stack[-1] != "VEVENT" or name in EVENT_PROPERTIES
+        )
@@ -2,24 +2,38 @@
 
 import re
 from datetime import date, datetime, timedelta
-from typing import Optional, Union
+from typing import Iterator, NamedTuple, Optional, Union
 
 from arrow import Arrow, get as arrowget
 from homeassistant.components.calendar import CalendarEvent
 from ics import Calendar
 
+from ..compactevents import CompactEvents
+from ..eventsnapshot import EventSnapshot
 from ..filter import Filter
 from ..icalendarparser import ICalendarParser
 from ..utility import compare_event_dates
 
 
+class _Event(NamedTuple):
+    """An event from CompactEvents, with the attributes used of Event."""
+
+    begin: Arrow
+    end: Arrow
+    all_day: bool
+    name: Optional[str]
+    location: Optional[str]
+    description: Optional[str]
+
+
 class ParserICS(ICalendarParser):
     """Class to provide parser using ics module."""
 
     def __init__(self):
         """Construct ParserICS."""
         self._re_method = re.compile("^METHOD:.*$", flags=re.MULTILINE)
-        self._calendar = None
+        # The events are kept compact, instead of as the Calendar
+        self._events: Optional[CompactEvents] = None
         self._filter = Filter("", "")
 
     def set_content(self, content: str):
@@ -30,7 +44,66 @@ class ParserICS(ICalendarParser):
         :param content is the calendar data
         :type content str
         """
-        self._calendar = Calendar(re.sub(self._re_method, "", content))
+        calendar = Calendar(re.sub(self._re_method, "", content))
+        events = CompactEvents(
+            (
+                event.begin.datetime,
+                event.end.datetime,
+                event.all_day,
+                event.name,
+                event.location,
+                event.description,
+            )
+            for event in calendar.timeline
+        )
+        self._events = events
+
+    def get_snapshot(self, start: datetime, end: datetime) -> Optional[dict]:
+        """Get the events from start to end as a snapshot.
+
+        The ics parser does not expand recurring events, so the snapshot
+        always holds every event of the calendar.
+        :param start the start of the window to expand events for
+        :type start datetime
+        :param end the end of the window to expand events for
+        :type end datetime
+        :returns the snapshot, or None if there is no content
+        :rtype dict
+        """
+        compact_events = self._events
+        if compact_events is None:
+            return None
+
+        encode = EventSnapshot.encode_time
+        events: list[list] = []
+        for index in range(len(compact_events)):
+            begin, end, *rest = compact_events.get(index)
+            events.append([encode(begin), encode(end), *rest])
+        return EventSnapshot(None, None, events).as_dict()
+
+    def set_snapshot(self, snapshot: dict, content: str) -> bool:
+        """Use a snapshot from get_snapshot instead of parsing content.
+
+        :param snapshot the snapshot returned by get_snapshot
+        :type snapshot dict
+        :param content the calendar data the snapshot was made from
+        :type content str
+        :returns True if the snapshot can be used
+        :rtype bool
+        """
+        event_snapshot = EventSnapshot.from_dict(snapshot)
+        if event_snapshot is None:
+            return False
+        decode = EventSnapshot.decode_time
+        try:
+            events = CompactEvents(
+                (decode(begin), decode(end), *rest)
+                for begin, end, *rest in event_snapshot.events
+            )
+        except (TypeError, ValueError, AttributeError):
+            return False
+        self._events = events
+        return True
 
     def set_filter(self, filt: Filter):
         """Set a Filter object to filter events.
@@ -40,8 +113,13 @@ class ParserICS(ICalendarParser):
         """
         self._filter = filt
 
-    def get_event_list(
-        self, start, end, include_all_day: bool, offset_hours: int = 0
+    def get_event_list(  # pylint: disable=R0913,R0917
+        self,
+        start,
+        end,
+        include_all_day: bool,
+        offset_hours: int = 0,
+        filt: Optional[Filter] = None,
     ) -> list[CalendarEvent]:
         """Get a list of events.
 
@@ -55,49 +133,53 @@ class ParserICS(ICalendarParser):
         :type boolean
         :param offset_hours the number of hours to offset the event
         :type offset_hours int
+        :param filt the Filter to use instead of the one set with set_filter
+        :type filt Filter
         :returns a list of events, or an empty list
         :rtype list[CalendarEvent]
         """
         event_list: list[CalendarEvent] = []
+        filt = filt or self._filter
 
-        if self._calendar is not None:
+        if self._events is not None:
             # ics 0.8 takes datetime not Arrow objects
             # ar_start = start
             # ar_end = end
             ar_start = arrowget(start - timedelta(hours=offset_hours))
             ar_end = arrowget(end - timedelta(hours=offset_hours))
 
-            for event in self._calendar.timeline.included(ar_start, ar_end):
-                if event.all_day and not include_all_day:
-                    continue
+            for event in self._included(
+                ar_start, ar_end, include_all_day, filt
+            ):
                 summary: str = ""
                 # ics 0.8 uses 'summary' reliably, older versions use 'name'
                 # if hasattr(event, "summary"):
                 #    summary = event.summary
                 # elif hasattr(event, "name"):
                 summary = event.name
-                calendar_event: CalendarEvent = CalendarEvent(
-                    summary=summary,
-                    start=ParserICS.get_date(
-                        event.begin, event.all_day, offset_hours
-                    ),
-                    end=ParserICS.get_date(
-                        event.end, event.all_day, offset_hours
-                    ),
-                    location=event.location,
-                    description=event.description,
+                event_list.append(
+                    CalendarEvent(
+                        summary=summary,
+                        start=ParserICS.get_date(
+                            event.begin, event.all_day, offset_hours
+                        ),
+                        end=ParserICS.get_date(
+                            event.end, event.all_day, offset_hours
+                        ),
+                        location=event.location,
+                        description=event.description,
+                    )
                 )
-                if self._filter.filter_event(calendar_event):
-                    event_list.append(calendar_event)
 
         return event_list
 
-    def get_current_event(  # noqa: $701
+    def get_current_event(  # noqa: $701 # pylint: disable=R0913,R0917
         self,
         include_all_day: bool,
         now: datetime,
         days: int,
         offset_hours: int = 0,
+        filt: Optional[Filter] = None,
     ) -> Optional[CalendarEvent]:
         """Get the current or next event.
 
@@ -111,22 +193,23 @@ class ParserICS(ICalendarParser):
         :type int
         :param offset_hours the number of hours to offset the event
         :type int
+        :param filt the Filter to use instead of the one set with set_filter
+        :type filt Filter
         :returns a CalendarEvent or None
         """
-        if self._calendar is None:
+        if self._events is None:
             return None
 
+        filt = filt or self._filter
         temp_event = None
         now = now - timedelta(offset_hours)
         end = now + timedelta(days=days)
-        for event in self._calendar.timeline.included(
-            arrowget(now), arrowget(end)
+        for event in self._included(
+            arrowget(now), arrowget(end), include_all_day, filt
         ):
-            if event.all_day and not include_all_day:
-                continue
-
-            if not self._filter.filter(event.name, event.description):
-                continue
+            if temp_event is not None and event.begin > temp_event.end:
+                # Events come by start, so no later one can replace it
+                break
 
             if temp_event is None or compare_event_dates(
                 now,
@@ -157,6 +240,34 @@ class ParserICS(ICalendarParser):
             description=temp_event.description,
         )
 
+    def _included(
+        self, start: Arrow, stop: Arrow, include_all_day: bool, filt: Filter
+    ) -> Iterator[_Event]:
+        """Iterate over the events from start to stop, in order.
+
+        Events are filtered on their texts in CompactEvents, so only the
+        events that are kept have their times converted to Arrow.
+        :param start the earliest start time of events to return
+        :type Arrow
+        :param stop the latest end time of events to return
+        :type Arrow
+        :param include_all_day if true, all day events will be included.
+        :type boolean
+        :param filt the Filter to use
+        :type filt Filter
+        """
+        events = self._events
+        if events is None:
+            return
+        for index in events.between(start.datetime, stop.datetime):
+            if events.is_all_day(index) and not include_all_day:
+                continue
+            name, _, description = events.get_texts(index)
+            if not filt.filter(name, description):
+                continue
+            begin, end, *rest = events.get(index)
+            yield _Event(arrowget(begin), arrowget(end), *rest)
+
     @staticmethod
     def get_date(
         arw: Arrow, is_all_day: bool, offset_hours: int
@@ -1,15 +1,22 @@
 """Support for recurring_ical_events parser."""
 
-from datetime import date, datetime, timedelta
-from typing import Optional, Union
+import sys
+from datetime import date, datetime, timedelta, timezone, tzinfo
+from threading import RLock
+from typing import Iterator, Optional, Union
 
 import recurring_ical_events as rie
 from homeassistant.components.calendar import CalendarEvent
 from icalendar import Calendar
 
+from ..eventsnapshot import EventSnapshot
 from ..filter import Filter
 from ..icalendarparser import ICalendarParser
-from ..utility import compare_event_dates
+from ..occurrencecache import OccurrenceCache
+from ..utility import compare_event_dates, make_datetime
+
+# More than the difference between any two time zones
+KEY_MARGIN = timedelta(days=2)
 
 
 class ParserRIE(ICalendarParser):
@@ -18,6 +25,11 @@ class ParserRIE(ICalendarParser):
     def __init__(self):
         """Construct ParserRIE."""
         self._calendar = None
+        self._query = None
+        self._occurrences: OccurrenceCache = None
+        self._content: str = None
+        # Events may be read from several threads while content is replaced
+        self._lock = RLock()
         self.oneday = timedelta(days=1)
         self.oneday2 = timedelta(hours=23, minutes=59, seconds=59)
         self._filter = Filter("", "")
@@ -30,7 +42,92 @@ class ParserRIE(ICalendarParser):
         :param content is the calendar data
         :type content str
         """
-        self._calendar = Calendar.from_ical(content)
+        calendar = self._parse_calendar(content)
+        with self._lock:
+            self._calendar = calendar
+            self._query = None
+            self._occurrences = OccurrenceCache(
+                self._expand, ParserRIE._is_in_span, ParserRIE._get_key
+            )
+            self._content = None
+
+    def get_snapshot(self, start: datetime, end: datetime) -> Optional[dict]:
+        """Get the events from start to end as a snapshot.
+
+        The snapshot can be saved as JSON, and passed to set_snapshot later to
+        avoid parsing the same content again.
+        :param start the start of the window to expand events for
+        :type start datetime
+        :param end the end of the window to expand events for
+        :type end datetime
+        :returns the snapshot, or None if there is no content
+        :rtype dict
+        """
+        occurrences = self._occurrences
+        if occurrences is None:
+            return None
+
+        encode = EventSnapshot.encode_time
+        events: list[list] = [
+            [encode(time) for time in occurrence[:4]] + list(occurrence[4:])
+            for occurrence in occurrences.get(start, end)
+        ]
+        return EventSnapshot(
+            start.astimezone(), end.astimezone(), events
+        ).as_dict()
+
+    def set_snapshot(self, snapshot: dict, content: str) -> bool:
+        """Use a snapshot from get_snapshot instead of parsing content.
+
+        Content is only parsed if events outside the window of the snapshot
+        are requested.  This may be called instead of set_content.
+        :param snapshot the snapshot returned by get_snapshot
+        :type snapshot dict
+        :param content the calendar data the snapshot was made from
+        :type content str
+        :returns True if the snapshot can be used
+        :rtype bool
+        """
+        event_snapshot = EventSnapshot.from_dict(snapshot)
+        if event_snapshot is None or event_snapshot.start is None:
+            return False
+        decode = EventSnapshot.decode_time
+        try:
+            event_snapshot.events = [
+                (
+                    decode(raw_start),
+                    decode(raw_end),
+                    decode(start),
+                    decode(end),
+                    ParserRIE._intern(summary),
+                    ParserRIE._intern(location),
+                    ParserRIE._intern(description),
+                )
+                for (
+                    raw_start,
+                    raw_end,
+                    start,
+                    end,
+                    summary,
+                    location,
+                    description,
+                ) in event_snapshot.events
+            ]
+        except (TypeError, ValueError):
+            return False
+        with self._lock:
+            self._calendar = None
+            self._query = None
+            self._occurrences = OccurrenceCache(
+                self._expand,
+                ParserRIE._is_in_span,
+                ParserRIE._get_key,
+                event_snapshot.start,
+                event_snapshot.end,
+                event_snapshot.events,
+            )
+            self._content = content
+        return True
 
     def set_filter(self, filt: Filter):
         """Set a Filter object to filter events.
@@ -40,12 +137,13 @@ class ParserRIE(ICalendarParser):
         """
         self._filter = filt
 
-    def get_event_list(
+    def get_event_list(  # pylint: disable=R0913,R0917
         self,
         start: datetime,
         end: datetime,
         include_all_day: bool,
         offset_hours: int = 0,
+        filt: Optional[Filter] = None,
     ) -> list[CalendarEvent]:
         """Get a list of events.
 
@@ -59,39 +157,49 @@ class ParserRIE(ICalendarParser):
         :type boolean
         :param offset_hours the number of hours to offset the event
         :type offset_hours int
+        :param filt the Filter to use instead of the one set with set_filter
+        :type filt Filter
         :returns a list of events, or an empty list
         :rtype list[CalendarEvent]
         """
         event_list: list[CalendarEvent] = []
+        filt = filt or self._filter
 
-        if self._calendar is not None:
-            for event in rie.of(self._calendar).between(
-                start - timedelta(hours=offset_hours),
-                end - timedelta(hours=offset_hours),
-            ):
-                start, end, all_day = self.is_all_day(event, offset_hours)
-
-                if all_day and not include_all_day:
-                    continue
+        for (
+            event_start,
+            event_end,
+            all_day,
+            summary,
+            location,
+            description,
+        ) in self._get_events(
+            start - timedelta(hours=offset_hours),
+            end - timedelta(hours=offset_hours),
+            offset_hours,
+            filt=filt,
+        ):
+            if all_day and not include_all_day:
+                continue
 
-                calendar_event: CalendarEvent = CalendarEvent(
-                    summary=event.get("SUMMARY"),
-                    start=start,
-                    end=end,
-                    location=event.get("LOCATION"),
-                    description=event.get("DESCRIPTION"),
+            event_list.append(
+                CalendarEvent(
+                    summary=summary,
+                    start=event_start,
+                    end=event_end,
+                    location=location,
+                    description=description,
                 )
-                if self._filter.filter_event(calendar_event):
-                    event_list.append(calendar_event)
+            )
 
         return event_list
 
-    def get_current_event(  # noqa: R701
+    def get_current_event(  # noqa: R701 # pylint: disable=R0913,R0914,R0917
         self,
         include_all_day: bool,
         now: datetime,
         days: int,
         offset_hours: int = 0,
+        filt: Optional[Filter] = None,
     ) -> Optional[CalendarEvent]:
         """Get the current or next event.
 
@@ -105,28 +213,35 @@ class ParserRIE(ICalendarParser):
         :type int
         :param offset_hours the number of hours to offset the event
         :type offset_hours int
+        :param filt the Filter to use instead of the one set with set_filter
+        :type filt Filter
         :returns a CalendarEvent or None
         """
-        if self._calendar is None:
-            return None
-
-        temp_event: CalendarEvent = None
-        temp_start: date | datetime = None
-        temp_end: date | datetime = None
+        filt = filt or self._filter
+        temp_event: tuple = None
+        temp_start: datetime = None
+        temp_end: datetime = None
         temp_all_day: bool = None
         end: datetime = now + timedelta(days=days)
-        for event in rie.of(self._calendar).between(
+        # Events come by their start without the offset, which only moves
+        # events that are not all day
+        slack = timedelta(hours=2 * abs(offset_hours))
+        for event in self._get_events(
             now - timedelta(hours=offset_hours),
             end - timedelta(hours=offset_hours),
+            offset_hours,
+            by_start=True,
+            filt=filt,
         ):
-            start, end, all_day = self.is_all_day(event, offset_hours)
+            all_day = event[2]
+            start = make_datetime(event[0])
+            end = make_datetime(event[1])
 
-            if all_day and not include_all_day:
-                continue
+            if temp_end is not None and start - slack > temp_end:
+                # No later event can replace temp_event
+                break
 
-            if not self._filter.filter(
-                event.get("SUMMARY"), event.get("DESCRIPTION")
-            ):
+            if all_day and not include_all_day:
                 continue
 
             if temp_start is None or compare_event_dates(
@@ -141,13 +256,201 @@ class ParserRIE(ICalendarParser):
             return None
 
         return CalendarEvent(
-            summary=temp_event.get("SUMMARY"),
-            start=temp_start,
-            end=temp_end,
-            location=temp_event.get("LOCATION"),
-            description=temp_event.get("DESCRIPTION"),
+            summary=temp_event[3],
+            start=temp_event[0],
+            end=temp_event[1],
+            location=temp_event[4],
+            description=temp_event[5],
         )
 
+    def _get_events(  # pylint: disable=R0913,R0917
+        self,
+        start: datetime,
+        end: datetime,
+        offset_hours: int,
+        by_start: bool = False,
+        filt: Optional[Filter] = None,
+    ) -> Iterator[tuple]:
+        """Get the events from start to end.
+
+        The events come from the occurrence cache, which only expands the
+        recurring events of the calendar for times it has not seen yet.
+        Events are filtered on their summary and description, before their
+        times are offset.
+        :param start the earliest time of events to return
+        :type start datetime
+        :param end the latest time of events to return
+        :type end datetime
+        :param offset_hours the number of hours to offset the event
+        :type offset_hours int
+        :param by_start if true, the events are sorted by their start
+            without the offset, instead of the order they were expanded in
+        :type by_start bool
+        :param filt the Filter the events must pass, if any
+        :type filt Filter
+        :returns tuples of start, end, all_day, summary, location, and
+            description
+        """
+        occurrences = self._occurrences
+        if occurrences is None:
+            return
+
+        offset = timedelta(hours=offset_hours)
+        for (
+            _,
+            _,
+            event_start,
+            event_end,
+            summary,
+            location,
+            description,
+        ) in occurrences.get(start, end, by_start):
+            if filt is not None and not filt.filter(summary, description):
+                continue
+            all_day = not isinstance(event_start, datetime)
+            if not all_day:
+                event_start = event_start + offset
+                event_end = event_end + offset
+            yield (
+                event_start,
+                event_end,
+                all_day,
+                summary,
+                location,
+                description,
+            )
+
+    def _expand(self, start: datetime, end: datetime) -> list[tuple]:
+        """Expand the events of the calendar from start to end.
+
+        :param start the start of the window to expand events for
+        :type start datetime
+        :param end the end of the window to expand events for
+        :type end datetime
+        :returns tuples of the original start and end, the start and end
+            without an offset, summary, location, and description
+        """
+        query = self._get_query()
+        if query is None:
+            return []
+
+        occurrences: list[tuple] = []
+        for event in query.between(start, end):
+            event_start, event_end, _ = self.is_all_day(event, 0)
+            # The original start and end are needed to select events the
+            # same way recurring_ical_events does.
+            occurrences.append(
+                (
+                    ParserRIE._fix_offset(event.get("DTSTART").dt),
+                    ParserRIE._fix_offset(event.get("DTEND").dt),
+                    event_start,
+                    event_end,
+                    ParserRIE._get_text(event, "SUMMARY"),
+                    ParserRIE._get_text(event, "LOCATION"),
+                    ParserRIE._get_text(event, "DESCRIPTION"),
+                )
+            )
+        return occurrences
+
+    def _get_query(self):
+        """Get the recurring_ical_events query for the calendar.
+
+        The calendar is parsed first if only a snapshot was set.  Concurrent
+        callers wait for the first one, instead of parsing again.
+        :returns the query, or None if there is no content
+        """
+        with self._lock:
+            if self._calendar is None and self._content is not None:
+                self._calendar = self._parse_calendar(self._content)
+                self._content = None
+            if self._query is None and self._calendar is not None:
+                self._query = rie.of(self._calendar)
+            return self._query
+
+    @staticmethod
+    def _parse_calendar(content: str) -> Calendar:
+        """Parse content into a calendar object, for set_content."""
+        return Calendar.from_ical(content)
+
+    @staticmethod
+    def _fix_offset(time: date | datetime) -> date | datetime:
+        """Replace the time zone of time with its UTC offset.
+
+        Comparing times in a time zone from the calendar is slow; the offset
+        is the same as a snapshot stores.
+        """
+        if isinstance(time, datetime) and time.tzinfo is not None:
+            return time.astimezone(timezone(time.utcoffset()))
+        return time
+
+    @staticmethod
+    def _get_key(occurrence: tuple) -> tuple[datetime, datetime]:
+        """Get times around the start and end of an occurrence, to index it.
+
+        Times without a time zone, and dates, are compared in the time zone
+        of the span they are checked against; the key uses the local time
+        zone, and a margin to make up for the difference.
+        """
+        return (
+            ParserRIE._make_comparable(occurrence[0], None).astimezone()
+            - KEY_MARGIN,
+            ParserRIE._make_comparable(occurrence[1], None).astimezone()
+            + KEY_MARGIN,
+        )
+
+    @staticmethod
+    def _get_text(event, name: str) -> Optional[str]:
+        """Get a text property of event as str."""
+        value = event.get(name)
+        return ParserRIE._intern(str(value) if value is not None else None)
+
+    @staticmethod
+    def _intern(text: Optional[str]) -> Optional[str]:
+        """Get the interned copy of text.
+
+        The occurrences of a recurring event, which are kept in the
+        OccurrenceCache, share one copy of each of its texts this way.
+        """
+        return sys.intern(text) if isinstance(text, str) else text
+
+    @staticmethod
+    def _is_in_span(
+        span_start: datetime,
+        span_end: datetime,
+        start: date | datetime,
+        end: date | datetime,
+    ) -> bool:
+        """Indicate if an event is in a span, like recurring_ical_events.
+
+        The first time zone found is used for times without one.
+        """
+        zone: tzinfo = next(
+            (
+                time.tzinfo
+                for time in (span_start, span_end, start, end)
+                if isinstance(time, datetime) and time.tzinfo is not None
+            ),
+            None,
+        )
+        span_start = ParserRIE._make_comparable(span_start, zone)
+        span_end = ParserRIE._make_comparable(span_end, zone)
+        start = ParserRIE._make_comparable(start, zone)
+        end = ParserRIE._make_comparable(end, zone)
+        if start == end:
+            return span_start <= start < span_end
+        return start < span_end and span_start < end
+
+    @staticmethod
+    def _make_comparable(time: date | datetime, zone: tzinfo) -> datetime:
+        """Convert time to a datetime in zone, unless it has a time zone."""
+        if not isinstance(time, datetime):
+            time = datetime(time.year, time.month, time.day)
+        if time.tzinfo is None and zone is not None:
+            if hasattr(zone, "localize"):
+                return zone.localize(time)
+            return time.replace(tzinfo=zone)
+        return time
+
     @staticmethod
     def get_date(date_time) -> Union[datetime, date]:
         """Get datetime with timezone information.
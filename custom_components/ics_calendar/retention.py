@@ -0,0 +1,189 @@
+"""Provide Retention class."""
+
+import re
+from datetime import date, datetime, timedelta
+from typing import Optional
+
+from dateutil.rrule import rrulestr
+from icalendar.prop import vDuration
+
+# Added to each side of the window, since the dates of events are read
+# without their time zones, and times are rounded down to days
+MARGIN = timedelta(days=2)
+
+# The properties of events that decide when they happen
+PROPERTIES = frozenset(
+    {"DTSTART", "DTEND", "DURATION", "RRULE", "RDATE", "RECURRENCE-ID"}
+)
+
+# Matches the name of a property, at the start of a line
+_NAME = re.compile(r"[^:;]*")
+
+# Matches the end of a line; other line breaks Python knows, like U+2028,
+# are text in a property, as they are for icalendar
+_NEWLINE = re.compile(r"\r?\n")
+
+
+class Retention:
+    """Retention class.
+
+    The Retention class drops the events of a calendar that cannot happen
+    in a window of days around now, before the calendar is parsed, so they
+    are never kept in memory.  Events that do not recur are dropped if they
+    end before the window starts, or start after it ends.  Recurring events
+    are dropped the same way, using the end of their last occurrence, which
+    is found from the UNTIL or COUNT of their RRULE.  Events with an RDATE,
+    and events that cannot be read, are always kept.
+    """
+
+    def __init__(self, past_days: int, future_days: int):
+        """Construct Retention object.
+
+        :param past_days: The days before now events are kept for, or 0 to
+            keep every past event
+        :type past_days: int
+        :param future_days: The days after now events are kept for, or 0 to
+            keep every future event
+        :type future_days: int
+        """
+        self.past_days = past_days
+        self.future_days = future_days
+
+    def prune(self, content: str, now: datetime) -> str:
+        """Drop the events of content outside the window around now.
+
+        The content is read line by line; only the lines of events, and the
+        properties that decide when they happen, are looked at.  Lines are
+        ended with CRLF, including the last one if it was ended.
+        :param content: The calendar data
+        :type content: str
+        :param now: The time the window is around
+        :type now: datetime
+        :return: The calendar data, without the events outside the window
+        :rtype: str
+        """
+        start, end = self.get_window(now)
+        lines: list[str] = []
+        event: Optional[_Event] = None
+        for line in _NEWLINE.split(content):
+            if event is None and line.upper().startswith("BEGIN:VEVENT"):
+                event = _Event()
+            if event is None:
+                lines.append(line)
+            elif event.read(line):
+                if event.is_in_window(start, end):
+                    lines += event.lines
+                event = None
+        # An event that does not end is left for the parser to report
+        lines += event.lines if event is not None else []
+        return "\r\n".join(lines)
+
+    def get_window(
+        self, now: datetime
+    ) -> tuple[Optional[date], Optional[date]]:
+        """Get the first and last day of the window around now.
+
+        The days include a margin for time zones.
+        :param now: The time the window is around
+        :type now: datetime
+        :return: The first and last day, or None for no limit
+        :rtype: tuple[Optional[date], Optional[date]]
+        """
+        start: Optional[date] = None
+        end: Optional[date] = None
+        if self.past_days:
+            start = (now - timedelta(days=self.past_days) - MARGIN).date()
+        if self.future_days:
+            end = (now + timedelta(days=self.future_days) + MARGIN).date()
+        return start, end
+
+
+class _Event:
+    """The lines of an event, and the properties that decide when it is."""
+
+    def __init__(self):
+        """Construct _Event object."""
+        self.lines: list[str] = []
+        self.properties: dict[str, str] = {}
+        # How deep in components, from 1 in the event to more in its alarms
+        self._depth = 0
+        self._current: Optional[str] = None
+
+    def read(self, line: str) -> bool:
+        """Add a line to the event.
+
+        :return: True if the line ends the event
+        """
+        self.lines.append(line)
+        if line[:1] in (" ", "\t"):
+            if self._current is not None:
+                self.properties[self._current] += line[1:]
+            return False
+
+        self._current = None
+        name = _NAME.match(line).group().upper()
+        if name == "BEGIN":
+            self._depth += 1
+        elif name == "END":
+            self._depth -= 1
+            return self._depth == 0
+        elif self._depth == 1 and name in PROPERTIES:
+            self._current = name
+            self.properties[name] = line.split(":", 1)[-1]
+        return False
+
+    def is_in_window(self, start: Optional[date], end: Optional[date]):
+        """Indicate if the event may happen from start to end.
+
+        :param start: The first day of the window, or None for no limit
+        :param end: The last day of the window, or None for no limit
+        """
+        if "DTSTART" not in self.properties or "RDATE" in self.properties:
+            return True
+        try:
+            first, last = self._get_span()
+        except (ValueError, TypeError, IndexError):
+            return True
+        return (start is None or last is None or last >= start) and (
+            end is None or first <= end
+        )
+
+    def _get_span(self) -> tuple[date, Optional[date]]:
+        """Get the first day of the event, and the last, if it has one."""
+        first = _parse_date(self.properties["DTSTART"])
+        if "DTEND" in self.properties:
+            duration = _parse_date(self.properties["DTEND"]) - first
+        elif "DURATION" in self.properties:
+            duration = vDuration.from_ical(self.properties["DURATION"])
+        else:
+            duration = timedelta(0)
+
+        last: Optional[date] = first
+        if "RRULE" in self.properties:
+            last = _get_last_start(self.properties["RRULE"], first)
+        if "RECURRENCE-ID" in self.properties:
+            # The occurrence it replaces must be dropped with it
+            moved = _parse_date(self.properties["RECURRENCE-ID"])
+            first = min(first, moved)
+            last = max(last, moved) if last is not None else None
+        return first, last + duration if last is not None else None
+
+
+def _parse_date(value: str) -> date:
+    """Get the day of an iCalendar date or date-time, without time zone."""
+    return date(int(value[0:4]), int(value[4:6]), int(value[6:8]))
+
+
+def _get_last_start(rule: str, first: date) -> Optional[date]:
+    """Get the day of the last occurrence of rule, if it ends."""
+    parts = dict(
+        part.split("=", 1) for part in rule.upper().split(";") if "=" in part
+    )
+    if "UNTIL" in parts:
+        return _parse_date(parts["UNTIL"])
+    if "COUNT" in parts:
+        occurrences = rrulestr(
+            rule, dtstart=datetime(first.year, first.month, first.day)
+        )
+        return occurrences[-1].date()
+    return None
@@ -2,7 +2,10 @@
 
 import json
 import logging
+import time
 from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread
 
 import pytest
 from dateutil import parser as dtparser
@@ -212,6 +215,142 @@ def timeout_config():
     }
 
 
+@pytest.fixture()
+def persistent_cache_config():
+    """Provide fixture for config that uses the persistent cache."""
+    return {
+        DOMAIN: {
+            "calendars": [
+                {
+                    "name": "persistent_cache",
+                    "url": "http://test.local/tests/allday.ics",
+                    "include_all_day": "false",
+                    "days": "1",
+                    "persistent_cache": "true",
+                }
+            ],
+        }
+    }
+
+
+@pytest.fixture()
+def shared_feed_config():
+    """Provide fixture for two calendars that use the same URL."""
+    return {
+        DOMAIN: {
+            "calendars": [
+                {
+                    "name": "all_events",
+                    "url": "http://test.local/tests/allday.ics",
+                    "include_all_day": "true",
+                    "days": "1",
+                },
+                {
+                    "name": "all_day_only",
+                    "url": "http://test.local/tests/allday.ics",
+                    "include_all_day": "true",
+                    "days": "1",
+                    "exclude": "['Not All Day']",
+                    "prefix": "AD: ",
+                },
+            ],
+        }
+    }
+
+
+@pytest.fixture()
+def parse_in_process_config():
+    """Provide fixture for config that parses in a separate process."""
+    return {
+        DOMAIN: {
+            "calendars": [
+                {
+                    "name": "parse_in_process",
+                    "url": "http://test.local/tests/allday.ics",
+                    "include_all_day": "true",
+                    "days": "1",
+                    "parse_in_process": "true",
+                }
+            ],
+        }
+    }
+
+
+# Fixtures for test_calendardata.py
+class StubHTTPRequestHandler(BaseHTTPRequestHandler):
+    """Serve the responses registered with the StubHTTPServer."""
+
+    # Keep connections open between requests, like most servers
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        """Return the response registered for self.path."""
+        self.server.requests.append((self.path, dict(self.headers)))
+        self.server.clients.append(self.client_address)
+        delay, status, headers, body = self.server.responses.get(
+            self.path, (0, HTTPStatus.NOT_FOUND, {}, b"")
+        )
+        time.sleep(delay)
+        if status == HTTPStatus.OK and self._not_modified(headers):
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _not_modified(self, headers):
+        """Indicate if the conditional request headers match headers."""
+        etag = self.headers.get("If-None-Match")
+        if etag is not None:
+            return etag == headers.get("ETag")
+        since = self.headers.get("If-Modified-Since")
+        return since is not None and since == headers.get("Last-Modified")
+
+    def log_message(self, format, *args):  # pylint: disable=W0622
+        """Do not log requests."""
+
+
+class StubHTTPServer(ThreadingHTTPServer):
+    """Local HTTP server returning canned responses."""
+
+    daemon_threads = True
+
+    def __init__(self):
+        """Construct StubHTTPServer listening on a free local port."""
+        super().__init__(("127.0.0.1", 0), StubHTTPRequestHandler)
+        self.responses = {}
+        self.requests = []
+        self.clients = []
+
+    def add_response(
+        self, path, body, delay=0, status=HTTPStatus.OK, headers=None
+    ):
+        """Register the response for path and return its URL."""
+        self.responses[path] = (delay, status, headers or {}, body)
+        return self.url(path)
+
+    def url(self, path):
+        """Return the URL for path on this server."""
+        return f"http://127.0.0.1:{self.server_address[1]}{path}"
+
+
+@pytest.fixture
+def http_stub(socket_enabled):
+    """Provide a local HTTP server running in a background thread."""
+    server = StubHTTPServer()
+    thread = Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
 # Fixtures and methods for test_parsers.py
 def datetime_hook(pairs):
     """Parse datetime values from JSON."""
@@ -241,11 +380,18 @@ def ics_parser():
     return GetParser.get_parser("ics")
 
 
+@pytest.fixture
+def fast_parser():
+    """Fixture for fast parser."""
+    return GetParser.get_parser("fast")
+
+
 @pytest.fixture
 def parser(which_parser, request):
     """Fixture for getting a parser.
 
-    :param which_parser identifies the parser fixture, ParserRIE or ParserICS
+    :param which_parser identifies the parser fixture, ParserRIE,
+        ParserICS, or ParserFast
     :type which_parser str
     :param request the request for the fixture
     :returns an instance of the requested parser
@@ -0,0 +1,138 @@
+"""Test the BodyDecoder class."""
+
+import codecs
+import gzip
+import zlib
+
+import pytest
+
+from custom_components.ics_calendar.bodydecoder import BodyDecoder
+
+TEXT = "BEGIN:VCALENDAR\r\nSUMMARY:Café ☕\r\nEND:VCALENDAR\r\n" * 100
+
+
+def decode(data: bytes, encoding: str = None, chunk_size: int = 7, **kw):
+    """Write data to a BodyDecoder in chunks, and return the text."""
+    decoder = BodyDecoder(encoding, **kw)
+    for i in range(0, len(data), chunk_size):
+        decoder.write(data[i : i + chunk_size])
+    return decoder.close()
+
+
+def raw_deflate(data: bytes) -> bytes:
+    """Return data compressed with deflate, without a zlib header."""
+    compressor = zlib.compressobj(wbits=-zlib.MAX_WBITS)
+    return compressor.compress(data) + compressor.flush()
+
+
+class TestBodyDecoder:
+    """Test BodyDecoder class."""
+
+    @pytest.mark.parametrize(
+        "data",
+        [
+            TEXT.encode("utf-8"),
+            codecs.BOM_UTF8 + TEXT.encode("utf-8"),
+            TEXT.encode("utf-16"),
+            codecs.BOM_UTF16_BE + TEXT.encode("utf-16-be"),
+            TEXT.encode("utf-16-le"),
+            TEXT.encode("utf-16-be"),
+        ],
+        ids=[
+            "utf-8",
+            "utf-8-bom",
+            "utf-16",
+            "utf-16-be-bom",
+            "utf-16-le-no-bom",
+            "utf-16-be-no-bom",
+        ],
+    )
+    @pytest.mark.parametrize("chunk_size", [1, 2, 7, 65536])
+    def test_text(self, data, chunk_size):
+        """Test that text is decoded, whatever the chunk boundaries."""
+        assert decode(data, chunk_size=chunk_size) == TEXT
+
+    @pytest.mark.parametrize(
+        "encoding,data",
+        [
+            ("gzip", gzip.compress(TEXT.encode("utf-8"))),
+            ("x-gzip", gzip.compress(TEXT.encode("utf-8"))),
+            ("deflate", zlib.compress(TEXT.encode("utf-8"))),
+            ("deflate", raw_deflate(TEXT.encode("utf-8"))),
+            ("identity", TEXT.encode("utf-8")),
+            (
+                "deflate, gzip",
+                gzip.compress(zlib.compress(TEXT.encode("utf-8"))),
+            ),
+        ],
+    )
+    def test_content_encoding(self, encoding, data):
+        """Test that the body is uncompressed."""
+        assert decode(data, encoding) == TEXT
+
+    def test_brotli(self):
+        """Test that br is uncompressed if brotli is installed."""
+        brotli = pytest.importorskip("brotli")
+        assert "br" in BodyDecoder.supported_encodings()
+        assert decode(brotli.compress(TEXT.encode("utf-8")), "br") == TEXT
+
+    def test_strips_nul(self):
+        """Test that NUL characters are removed."""
+        assert decode(b"a\0b\0\0c") == "abc"
+        assert decode("abc".encode("utf-16-le"), chunk_size=1) == "abc"
+
+    def test_utf16_without_bom_fallback(self):
+        """Test that a body that is not UTF-8 is decoded as UTF-16.
+
+        The start of the body has no NUL bytes, so only the failure to
+        decode it as UTF-8 shows it is UTF-16.
+        """
+        text = "☕é" + TEXT
+        assert decode(text.encode("utf-16-le"), chunk_size=65536) == text
+
+    def test_empty(self):
+        """Test that an empty body is empty text."""
+        assert decode(b"") == ""
+        assert decode(b"", "gzip") == ""
+
+    def test_digest(self):
+        """Test that the digest is of the uncompressed body."""
+        plain = BodyDecoder()
+        plain.write(TEXT.encode("utf-8"))
+        plain.close()
+        compressed = BodyDecoder("gzip")
+        compressed.write(gzip.compress(TEXT.encode("utf-8")))
+        compressed.close()
+        assert plain.get_digest() == compressed.get_digest()
+
+    @pytest.mark.parametrize(
+        "encoding,data",
+        [
+            (None, b"\xf0\xa4\xad"),
+            ("gzip", b"not gzip data"),
+            ("gzip", gzip.compress(TEXT.encode("utf-8"))[:-10]),
+            ("deflate", b"\xff\xff\xff"),
+        ],
+        ids=["bad-utf-8", "bad-gzip", "truncated-gzip", "bad-deflate"],
+    )
+    def test_bad_data(self, encoding, data):
+        """Test that bad data raises ValueError."""
+        with pytest.raises(ValueError):
+            decode(data, encoding)
+
+    def test_unsupported_encoding(self):
+        """Test that an unknown Content-Encoding raises ValueError."""
+        with pytest.raises(ValueError):
+            BodyDecoder("compress")
+
+    @pytest.mark.parametrize("encoding", [None, "gzip", "deflate"])
+    def test_max_size(self, encoding):
+        """Test that a body larger than max_size raises ValueError."""
+        data = b"X" * 1000000
+        if encoding == "gzip":
+            data = gzip.compress(data)
+        elif encoding == "deflate":
+            data = zlib.compress(data)
+        assert len(decode(data, encoding, max_size=1000000)) == 1000000
+        with pytest.raises(ValueError, match="larger than"):
+            decode(data, encoding, chunk_size=65536, max_size=999999)
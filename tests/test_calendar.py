@@ -1,18 +1,51 @@
 """Test the calendar class."""
 
+import asyncio
 import copy
-from unittest.mock import ANY, Mock, patch
+from concurrent.futures.process import BrokenProcessPool
+from datetime import timedelta
+from unittest.mock import ANY, AsyncMock, Mock, patch
 
 import pytest
 from dateutil import parser as dtparser
 from homeassistant.components.calendar import CalendarEvent
-from homeassistant.const import STATE_OFF, STATE_ON
+from homeassistant.const import (
+    CONF_EXCLUDE,
+    CONF_INCLUDE,
+    CONF_NAME,
+    CONF_PREFIX,
+    CONF_URL,
+    STATE_OFF,
+    STATE_ON,
+)
 from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import issue_registry as ir
 from homeassistant.helpers.template import DATE_STR_FORMAT
 from homeassistant.setup import async_setup_component
 from homeassistant.util import dt as hadt
-
-from custom_components.ics_calendar.const import DOMAIN
+from pytest_homeassistant_custom_component.common import (
+    async_fire_time_changed,
+)
+
+from custom_components.ics_calendar import CONFIG_SCHEMA
+from custom_components.ics_calendar.calendar import (
+    EVENTS_TTL,
+    ICSCalendarData,
+    ICSCalendarEntity,
+)
+from custom_components.ics_calendar.calendardata import CalendarData
+from custom_components.ics_calendar.const import (
+    CONF_DAYS,
+    CONF_INCLUDE_ALL_DAY,
+    CONF_MAX_DOWNLOADS,
+    CONF_MAX_DOWNLOADS_PER_HOST,
+    CONF_OFFSET_HOURS,
+    CONF_SERVE_STALE,
+    DOMAIN,
+)
+from custom_components.ics_calendar.feedcache import FeedCache
+from custom_components.ics_calendar.parserpool import ParserPool
+from custom_components.ics_calendar.parsers.parser_rie import ParserRIE
 
 pytest_plugins = "pytest_homeassistant_custom_component"
 
@@ -109,6 +142,11 @@ def _mocked_event_allday():
     )
 
 
+def _storage_key(config: dict) -> str:
+    """Return the persistent cache key of the first calendar of config."""
+    return FeedCache.storage_key(CONFIG_SCHEMA(config)[DOMAIN]["calendars"][0])
+
+
 def _mocked_calendar_data(file_name):
     """Return contents of file_name."""
     with open(file_name, encoding="utf-8") as file_handle:
@@ -120,7 +158,7 @@ class TestCalendar:
     """Test Calendar class."""
 
     @patch(
-        "custom_components.ics_calendar.calendardata.CalendarData.download_calendar",
+        "custom_components.ics_calendar.calendardata.CalendarData.async_download_calendar",
         return_value=False,
     )
     @patch(
@@ -143,7 +181,27 @@ class TestCalendar:
         assert state.name == "noallday"
 
         mock_event.assert_called_with(
-            include_all_day=False, now=ANY, days=ANY, offset_hours=0
+            include_all_day=False,
+            now=ANY,
+            days=ANY,
+            offset_hours=0,
+            filt=ANY,
+        )
+
+    async def test_download_limits(self, hass, monkeypatch):
+        """Test that the download limits are set for the integration."""
+        monkeypatch.setattr(CalendarData, "download_scheduler", None)
+        assert await async_setup_component(
+            hass,
+            DOMAIN,
+            {DOMAIN: {CONF_MAX_DOWNLOADS: 3, CONF_MAX_DOWNLOADS_PER_HOST: 1}},
+        )
+        scheduler = CalendarData.download_scheduler
+        assert scheduler.max_downloads == 3
+        assert scheduler.max_per_host == 1
+        # Only calendars in configuration.yaml are deprecated
+        assert not ir.async_get(hass).async_get_issue(
+            DOMAIN, "deprecated_yaml_configuration"
         )
 
     @patch(
@@ -152,7 +210,7 @@ class TestCalendar:
         return_value=None,
     )
     @patch(
-        "custom_components.ics_calendar.calendardata.CalendarData.download_calendar",
+        "custom_components.ics_calendar.calendardata.CalendarData.async_download_calendar",
         return_value=False,
     )
     @patch(
@@ -181,9 +239,288 @@ class TestCalendar:
         assert state.name == "allday"
 
         mock_event.assert_called_with(
-            include_all_day=True, now=ANY, days=ANY, offset_hours=0
+            include_all_day=True,
+            now=ANY,
+            days=ANY,
+            offset_hours=0,
+            filt=ANY,
         )
 
+    @patch(
+        "custom_components.ics_calendar.calendardata.CalendarData.async_download_calendar",
+        return_value=False,
+    )
+    @patch(
+        "custom_components.ics_calendar.parsers.parser_rie.ParserRIE"
+        ".set_content",
+    )
+    @patch(
+        "custom_components.ics_calendar.parsers.parser_rie.ParserRIE"
+        ".get_current_event",
+        return_value=_mocked_event(),
+    )
+    async def test_calendar_setup_persistent_cache(
+        self,
+        mock_event,
+        mock_set_content,
+        mock_download,
+        hass,
+        hass_storage,
+        persistent_cache_config,
+    ):
+        """Test that the calendar is restored from the persistent cache."""
+        url = persistent_cache_config[DOMAIN]["calendars"][0]["url"]
+        hass_storage[_storage_key(persistent_cache_config)] = {
+            "version": 1,
+            "minor_version": 1,
+            "key": _storage_key(persistent_cache_config),
+            "data": {
+                "url": url,
+                "data": _mocked_calendar_data("tests/allday.ics"),
+                "digest": None,
+                "validators": {},
+                "last_download": None,
+            },
+        }
+
+        assert await async_setup_component(
+            hass, DOMAIN, persistent_cache_config
+        )
+        await hass.async_block_till_done()
+
+        state = hass.states.get("calendar.persistent_cache")
+        assert state.attributes["message"] == "Test event"
+        mock_set_content.assert_called_once_with(
+            _mocked_calendar_data("tests/allday.ics")
+        )
+
+    @patch(
+        "custom_components.ics_calendar.calendardata.CalendarData.async_download_calendar",
+        return_value=False,
+    )
+    @patch(
+        "custom_components.ics_calendar.parsers.parser_rie.ParserRIE"
+        ".set_content",
+    )
+    @patch(
+        "custom_components.ics_calendar.parsers.parser_rie.ParserRIE"
+        ".get_current_event",
+        return_value=_mocked_event(),
+    )
+    async def test_calendar_setup_persistent_cache_snapshot(
+        self,
+        mock_event,
+        mock_set_content,
+        mock_download,
+        hass,
+        hass_storage,
+        persistent_cache_config,
+    ):
+        """Test that a cached snapshot is used instead of parsing."""
+        url = persistent_cache_config[DOMAIN]["calendars"][0]["url"]
+        hass_storage[_storage_key(persistent_cache_config)] = {
+            "version": 1,
+            "minor_version": 1,
+            "key": _storage_key(persistent_cache_config),
+            "data": {
+                "url": url,
+                "data": _mocked_calendar_data("tests/allday.ics"),
+                "digest": "00ff",
+                "validators": {},
+                "last_download": None,
+                "snapshot": {
+                    "version": 1,
+                    "start": "2022-01-01T00:00:00+00:00",
+                    "end": "2022-02-01T00:00:00+00:00",
+                    "events": [],
+                    "digest": "00ff",
+                    "parser": "rie",
+                },
+            },
+        }
+
+        assert await async_setup_component(
+            hass, DOMAIN, persistent_cache_config
+        )
+        await hass.async_block_till_done()
+
+        state = hass.states.get("calendar.persistent_cache")
+        assert state.attributes["message"] == "Test event"
+        mock_set_content.assert_not_called()
+
+    @patch(
+        "custom_components.ics_calendar.calendardata.CalendarData"
+        ".get_digest",
+        return_value="00ff",
+    )
+    @patch(
+        "custom_components.ics_calendar.calendardata.CalendarData.async_download_calendar",
+        return_value=True,
+    )
+    @patch(
+        "custom_components.ics_calendar.calendardata.CalendarData.get",
+        return_value=_mocked_calendar_data("tests/allday.ics"),
+    )
+    @patch(
+        "custom_components.ics_calendar.parsers.parser_rie.ParserRIE"
+        ".get_current_event",
+        return_value=_mocked_event(),
+    )
+    async def test_download_saves_persistent_cache(
+        self,
+        mock_event,
+        mock_get,
+        mock_download,
+        mock_digest,
+        hass,
+        hass_storage,
+        persistent_cache_config,
+    ):
+        """Test that a changed calendar is saved in the persistent cache."""
+        url = persistent_cache_config[DOMAIN]["calendars"][0]["url"]
+
+        assert await async_setup_component(
+            hass, DOMAIN, persistent_cache_config
+        )
+        await hass.async_block_till_done()
+
+        cache_data = hass_storage[_storage_key(persistent_cache_config)][
+            "data"
+        ]
+        assert cache_data["data"] == _mocked_calendar_data("tests/allday.ics")
+        assert cache_data["snapshot"]["digest"] == "00ff"
+        assert cache_data["snapshot"]["parser"] == "rie"
+
+    @patch(
+        "custom_components.ics_calendar.calendardata.CalendarData.async_download_calendar",
+    )
+    @patch(
+        "custom_components.ics_calendar.calendardata.CalendarData.get",
+        return_value=_mocked_calendar_data("tests/allday.ics"),
+    )
+    async def test_shared_feed(
+        self,
+        mock_get,
+        mock_download,
+        hass,
+        get_api_events,
+        shared_feed_config,
+    ):
+        """Test that calendars with the same URL share downloads and parsing."""
+        downloads = iter([True])
+        mock_download.side_effect = lambda hass: next(downloads, False)
+        with patch.object(
+            ParserRIE,
+            "set_content",
+            autospec=True,
+            side_effect=ParserRIE.set_content,
+        ) as mock_set_content:
+            assert await async_setup_component(
+                hass, DOMAIN, shared_feed_config
+            )
+            await hass.async_block_till_done()
+
+            all_events = await get_api_events("calendar.all_events")
+            all_day_only = await get_api_events("calendar.all_day_only")
+
+        mock_set_content.assert_called_once()
+        assert len(all_events) == 11
+        assert len(all_day_only) == 7
+        assert all(
+            event["summary"].startswith("AD: ") for event in all_day_only
+        )
+        assert not any(
+            event["summary"].startswith("AD: ") for event in all_events
+        )
+
+    @patch(
+        "custom_components.ics_calendar.feed.hanow",
+        return_value=dtparser.parse("2022-01-03T00:00:01Z"),
+    )
+    @patch(
+        "custom_components.ics_calendar.calendardata.CalendarData.async_download_calendar",
+    )
+    @patch(
+        "custom_components.ics_calendar.calendardata.CalendarData.get",
+        return_value=_mocked_calendar_data("tests/allday.ics"),
+    )
+    async def test_parse_in_process(
+        self,
+        mock_get,
+        mock_download,
+        mock_now,
+        hass,
+        get_api_events,
+        parse_in_process_config,
+    ):
+        """Test that events come from the snapshot made by the ParserPool."""
+        downloads = iter([True])
+        mock_download.side_effect = lambda hass: next(downloads, False)
+        snapshot = ParserPool.get_snapshot(
+            "rie",
+            _mocked_calendar_data("tests/allday.ics"),
+            dtparser.parse("2021-01-01T00:00:00Z"),
+            dtparser.parse("2023-01-01T00:00:00Z"),
+        )
+        with (
+            patch.object(
+                ParserPool, "async_get_snapshot", return_value=snapshot
+            ) as mock_get_snapshot,
+            patch.object(ParserRIE, "set_content") as mock_set_content,
+            patch.object(ParserRIE, "_get_query", return_value=None),
+        ):
+            assert await async_setup_component(
+                hass, DOMAIN, parse_in_process_config
+            )
+            await hass.async_block_till_done()
+
+            events = await get_api_events("calendar.parse_in_process")
+
+        mock_get_snapshot.assert_called_once()
+        mock_set_content.assert_not_called()
+        assert len(events) == 11
+
+    @patch(
+        "custom_components.ics_calendar.calendardata.CalendarData.async_download_calendar",
+    )
+    @patch(
+        "custom_components.ics_calendar.calendardata.CalendarData.get",
+        return_value=_mocked_calendar_data("tests/allday.ics"),
+    )
+    async def test_parse_in_process_fallback(
+        self,
+        mock_get,
+        mock_download,
+        hass,
+        get_api_events,
+        parse_in_process_config,
+    ):
+        """Test that the calendar is parsed in the executor if the worker fails."""
+        downloads = iter([True])
+        mock_download.side_effect = lambda hass: next(downloads, False)
+        with (
+            patch.object(
+                ParserPool,
+                "async_get_snapshot",
+                side_effect=BrokenProcessPool(),
+            ),
+            patch.object(
+                ParserRIE,
+                "set_content",
+                autospec=True,
+                side_effect=ParserRIE.set_content,
+            ) as mock_set_content,
+        ):
+            assert await async_setup_component(
+                hass, DOMAIN, parse_in_process_config
+            )
+            await hass.async_block_till_done()
+
+            events = await get_api_events("calendar.parse_in_process")
+
+        mock_set_content.assert_called_once()
+        assert len(events) == 11
+
     @pytest.mark.parametrize("set_tz", ["utc"], indirect=True)
     @patch(
         "custom_components.ics_calendar.calendar.hanow",
@@ -194,7 +531,7 @@ class TestCalendar:
         return_value=dtparser.parse("2021-01-03T00:00:01Z"),
     )
     @patch(
-        "custom_components.ics_calendar.calendardata.CalendarData.download_calendar",
+        "custom_components.ics_calendar.calendardata.CalendarData.async_download_calendar",
         return_value=False,
     )
     @patch(
@@ -240,7 +577,7 @@ class TestCalendar:
             )
 
     @patch(
-        "custom_components.ics_calendar.calendardata.CalendarData.download_calendar",
+        "custom_components.ics_calendar.calendardata.CalendarData.async_download_calendar",
         return_value=False,
     )
     @patch(
@@ -270,11 +607,15 @@ class TestCalendar:
         assert state.name == "negative_offset_hours"
 
         mock_event.assert_called_with(
-            include_all_day=False, now=ANY, days=ANY, offset_hours=-5
+            include_all_day=False,
+            now=ANY,
+            days=ANY,
+            offset_hours=-5,
+            filt=ANY,
         )
 
     @patch(
-        "custom_components.ics_calendar.calendardata.CalendarData.download_calendar",
+        "custom_components.ics_calendar.calendardata.CalendarData.async_download_calendar",
         return_value=False,
     )
     @patch(
@@ -304,7 +645,11 @@ class TestCalendar:
         assert state.name == "positive_offset_hours"
 
         mock_event.assert_called_with(
-            include_all_day=False, now=ANY, days=ANY, offset_hours=5
+            include_all_day=False,
+            now=ANY,
+            days=ANY,
+            offset_hours=5,
+            filt=ANY,
         )
 
     @patch(
@@ -313,7 +658,7 @@ class TestCalendar:
         return_value=None,
     )
     @patch(
-        "custom_components.ics_calendar.calendardata.CalendarData.download_calendar",
+        "custom_components.ics_calendar.calendardata.CalendarData.async_download_calendar",
         return_value=False,
     )
     @patch(
@@ -353,7 +698,7 @@ class TestCalendar:
         return_value=None,
     )
     @patch(
-        "custom_components.ics_calendar.calendardata.CalendarData.download_calendar",
+        "custom_components.ics_calendar.calendardata.CalendarData.async_download_calendar",
         return_value=False,
     )
     @patch(
@@ -393,7 +738,7 @@ class TestCalendar:
         return_value=None,
     )
     @patch(
-        "custom_components.ics_calendar.calendardata.CalendarData.download_calendar",
+        "custom_components.ics_calendar.calendardata.CalendarData.async_download_calendar",
         return_value=False,
     )
     @patch(
@@ -433,7 +778,7 @@ class TestCalendar:
         return_value=None,
     )
     @patch(
-        "custom_components.ics_calendar.calendardata.CalendarData.download_calendar",
+        "custom_components.ics_calendar.calendardata.CalendarData.async_download_calendar",
         return_value=False,
     )
     @patch(
@@ -475,7 +820,7 @@ class TestCalendar:
         return_value=dtparser.parse("2021-01-03T00:00:01Z"),
     )
     @patch(
-        "custom_components.ics_calendar.calendardata.CalendarData.download_calendar",
+        "custom_components.ics_calendar.calendardata.CalendarData.async_download_calendar",
         return_value=True,
     )
     @patch(
@@ -532,7 +877,7 @@ class TestCalendar:
         return_value=dtparser.parse("2022-01-01T00:00:01"),
     )
     @patch(
-        "custom_components.ics_calendar.calendardata.CalendarData.download_calendar",
+        "custom_components.ics_calendar.calendardata.CalendarData.async_download_calendar",
         return_value=False,
     )
     @patch(
@@ -599,7 +944,7 @@ class TestCalendar:
         return_value=dtparser.parse("2022-01-03T00:00:01"),
     )
     @patch(
-        "custom_components.ics_calendar.calendardata.CalendarData.download_calendar",
+        "custom_components.ics_calendar.calendardata.CalendarData.async_download_calendar",
         return_value=False,
     )
     @patch(
@@ -663,7 +1008,7 @@ class TestCalendar:
         return_value=dtparser.parse("2022-01-03T00:00:01"),
     )
     @patch(
-        "custom_components.ics_calendar.calendardata.CalendarData.download_calendar",
+        "custom_components.ics_calendar.calendardata.CalendarData.async_download_calendar",
         return_value=False,
     )
     @patch(
@@ -710,7 +1055,7 @@ class TestCalendar:
         return_value=dtparser.parse("2022-01-03T00:00:01"),
     )
     @patch(
-        "custom_components.ics_calendar.calendardata.CalendarData.download_calendar",
+        "custom_components.ics_calendar.calendardata.CalendarData.async_download_calendar",
         return_value=False,
     )
     @patch(
@@ -774,7 +1119,7 @@ class TestCalendar:
         return_value=dtparser.parse("2022-01-03T00:00:01Z"),
     )
     @patch(
-        "custom_components.ics_calendar.calendardata.CalendarData.download_calendar",
+        "custom_components.ics_calendar.calendardata.CalendarData.async_download_calendar",
         return_value=False,
     )
     @patch(
@@ -813,7 +1158,7 @@ class TestCalendar:
         return_value=dtparser.parse("2022-01-03T00:00:01Z"),
     )
     @patch(
-        "custom_components.ics_calendar.calendardata.CalendarData.download_calendar",
+        "custom_components.ics_calendar.calendardata.CalendarData.async_download_calendar",
         return_value=False,
     )
     @patch(
@@ -845,7 +1190,7 @@ class TestCalendar:
         assert len(events) == 0
 
     @patch(
-        "custom_components.ics_calendar.calendardata.CalendarData.download_calendar",
+        "custom_components.ics_calendar.calendardata.CalendarData.async_download_calendar",
         return_value=False,
     )
     @patch(
@@ -881,3 +1226,290 @@ class TestCalendar:
                 target={"entity_id": "calendar.noallday"},
                 blocking=True,
             )
+
+    @patch(
+        "custom_components.ics_calendar.calendardata.CalendarData.async_download_calendar",
+        return_value=False,
+    )
+    @patch(
+        "custom_components.ics_calendar.calendardata.CalendarData.get",
+        return_value=_mocked_calendar_data("tests/allday.ics"),
+    )
+    @patch(
+        "custom_components.ics_calendar.parsers.parser_rie.ParserRIE"
+        ".get_event_list",
+    )
+    @patch(
+        "custom_components.ics_calendar.parsers.parser_rie.ParserRIE"
+        ".get_current_event",
+    )
+    async def test_transition(
+        self,
+        mock_event,
+        mock_event_list,
+        mock_get,
+        mock_download,
+        hass,
+        freezer,
+        noallday_config,
+    ):
+        """Test that the state changes when the next event starts."""
+        now = hadt.now()
+        event = CalendarEvent(
+            summary="Test event",
+            start=now + timedelta(minutes=10),
+            end=now + timedelta(minutes=20),
+        )
+        mock_event.side_effect = lambda **kwargs: copy.deepcopy(event)
+        mock_event_list.return_value = [event]
+
+        assert await async_setup_component(hass, DOMAIN, noallday_config)
+        await hass.async_block_till_done()
+        assert hass.states.get("calendar.noallday").state == STATE_OFF
+        assert mock_event.call_count == 1
+
+        freezer.move_to(event.start + timedelta(seconds=1))
+        async_fire_time_changed(hass)
+        await hass.async_block_till_done()
+        assert hass.states.get("calendar.noallday").state == STATE_ON
+        assert mock_event.call_count == 2
+        mock_download.assert_called_once()
+
+
+class TestICSCalendarData:
+    """Test ICSCalendarData class."""
+
+    @staticmethod
+    def _make_data(
+        feed: Mock, serve_stale: bool = False, prefix: str = ""
+    ) -> ICSCalendarData:
+        """Return ICSCalendarData using feed."""
+        data = ICSCalendarData(
+            {
+                CONF_NAME: "test",
+                CONF_DAYS: 1,
+                CONF_OFFSET_HOURS: 0,
+                CONF_INCLUDE_ALL_DAY: True,
+                CONF_PREFIX: prefix,
+                CONF_EXCLUDE: "",
+                CONF_INCLUDE: "",
+                CONF_SERVE_STALE: serve_stale,
+            }
+        )
+        data._feed = feed  # pylint: disable=W0212
+        return data
+
+    @staticmethod
+    def _make_feed(event: CalendarEvent, events: list) -> Mock:
+        """Return a Feed Mock whose parser returns event and events."""
+        feed = Mock()
+        feed.content_digest = "digest"
+        feed.parser.get_current_event.side_effect = (
+            lambda **kwargs: copy.deepcopy(event)
+        )
+        feed.parser.get_event_list.return_value = events
+        return feed
+
+    @pytest.mark.parametrize(
+        ("summary", "start", "expected"),
+        [
+            # The next event starts first
+            (
+                "Test event",
+                timedelta(hours=-1),
+                timedelta(hours=1, minutes=30),
+            ),
+            # The event starts first
+            ("Test event", timedelta(minutes=30), timedelta(minutes=30)),
+            # The offset is reached first
+            ("Test event !!-15", timedelta(hours=1), timedelta(minutes=45)),
+            # The offset was reached, and the next event starts first
+            ("Test event !!-15", timedelta(0), timedelta(hours=1, minutes=30)),
+        ],
+    )
+    @patch("custom_components.ics_calendar.calendar.hanow")
+    def test_next_transition(self, mock_now, summary, start, expected):
+        """Test the next transition is the first change after now."""
+        now = hadt.now()
+        mock_now.return_value = now
+        event = CalendarEvent(
+            summary=summary, start=now + start, end=now + timedelta(hours=2)
+        )
+        later = CalendarEvent(
+            summary="Later event",
+            start=now + timedelta(hours=1, minutes=30),
+            end=now + timedelta(hours=3),
+        )
+        data = self._make_data(self._make_feed(event, [event, later]))
+        assert data._update(data._feed)  # pylint: disable=W0212
+        assert data.next_transition == now + expected
+
+    @patch("custom_components.ics_calendar.calendar.hanow")
+    def test_next_transition_no_events(self, mock_now):
+        """Test an event days from now is looked for without events."""
+        now = hadt.now()
+        mock_now.return_value = now
+        data = self._make_data(self._make_feed(None, []))
+        assert not data._update(data._feed)  # pylint: disable=W0212
+        assert data.next_transition == now + timedelta(days=1)
+
+    @patch("custom_components.ics_calendar.calendar.hanow")
+    async def test_update_skipped(self, mock_now, hass):
+        """Test the event is only looked for at transitions or changes."""
+        now = hadt.now()
+        mock_now.return_value = now
+        event = CalendarEvent(
+            summary="Test event", start=now, end=now + timedelta(hours=1)
+        )
+        feed = self._make_feed(event, [event])
+        data = self._make_data(feed)
+
+        await data.async_update_event(hass)
+        await data.async_update_event(hass)
+        assert feed.parser.get_current_event.call_count == 1
+
+        feed.content_digest = "changed"
+        await data.async_update_event(hass)
+        assert feed.parser.get_current_event.call_count == 2
+
+        mock_now.return_value = now + timedelta(hours=1)
+        await data.async_update_event(hass)
+        assert feed.parser.get_current_event.call_count == 3
+
+    async def test_get_events_waits_for_download(self, hass):
+        """Test that events are read after the download by default."""
+        feed = self._make_feed(None, [])
+        feed.async_update = AsyncMock()
+        data = self._make_data(feed)
+        now = hadt.now()
+        await data.async_get_events(hass, now, now + timedelta(days=1))
+        feed.async_update.assert_awaited_once_with(hass)
+        feed.get_coordinator.assert_not_called()
+
+    @pytest.mark.parametrize("is_due", [True, False])
+    async def test_get_events_serve_stale(self, hass, is_due):
+        """Test that stale events are served while refreshing if due."""
+        event = CalendarEvent(
+            summary="Test event",
+            start=hadt.now(),
+            end=hadt.now() + timedelta(hours=1),
+        )
+        feed = self._make_feed(None, [event])
+        feed.async_update = AsyncMock()
+        feed.is_due.return_value = is_due
+        coordinator = feed.get_coordinator.return_value
+        coordinator.async_request_refresh = AsyncMock()
+        data = self._make_data(feed, serve_stale=True)
+
+        now = hadt.now()
+        events = await data.async_get_events(
+            hass, now, now + timedelta(days=1)
+        )
+        await hass.async_block_till_done()
+        assert [event.summary for event in events] == ["Test event"]
+        feed.async_update.assert_not_called()
+        assert coordinator.async_request_refresh.await_count == int(is_due)
+
+    async def test_get_events_serve_stale_first_download(self, hass):
+        """Test that the first download is waited for with serve_stale."""
+        feed = self._make_feed(None, [])
+        feed.content_digest = None
+        feed.async_update = AsyncMock()
+        data = self._make_data(feed, serve_stale=True)
+        now = hadt.now()
+        await data.async_get_events(hass, now, now + timedelta(days=1))
+        feed.async_update.assert_awaited_once_with(hass)
+
+    async def test_get_events_coalesced(self, hass):
+        """Test that concurrent requests share one download and expansion."""
+        feed = self._make_feed(None, [])
+        feed.async_update = AsyncMock()
+        data = self._make_data(feed)
+        now = hadt.now()
+        results = await asyncio.gather(
+            *(
+                data.async_get_events(hass, now, now + timedelta(days=1))
+                for _ in range(5)
+            )
+        )
+        assert results == [[]] * 5
+        feed.async_update.assert_awaited_once_with(hass)
+        feed.parser.get_event_list.assert_called_once()
+
+    @patch("custom_components.ics_calendar.calendar.monotonic")
+    async def test_get_events_cached(self, mock_monotonic, hass):
+        """Test that events are reused until they expire or change."""
+        mock_monotonic.return_value = 0
+        feed = self._make_feed(None, [])
+        feed.async_update = AsyncMock()
+        data = self._make_data(feed)
+        now = hadt.now()
+        for _ in range(2):
+            await data.async_get_events(hass, now, now + timedelta(days=1))
+        assert feed.parser.get_event_list.call_count == 1
+        assert feed.async_update.await_count == 2
+
+        feed.content_digest = "changed"
+        await data.async_get_events(hass, now, now + timedelta(days=1))
+        assert feed.parser.get_event_list.call_count == 2
+
+        mock_monotonic.return_value = EVENTS_TTL
+        await data.async_get_events(hass, now, now + timedelta(days=1))
+        assert feed.parser.get_event_list.call_count == 3
+
+        await data.async_get_events(hass, now, now + timedelta(days=2))
+        assert feed.parser.get_event_list.call_count == 4
+
+    async def test_get_events_prefix_shared(self, hass):
+        """Test that occurrences with one summary share the prefixed one."""
+        now = hadt.now()
+        events = [
+            CalendarEvent(
+                summary="".join(["Stand", "up"]),
+                start=now + timedelta(days=day),
+                end=now + timedelta(days=day, minutes=15),
+            )
+            for day in range(3)
+        ]
+        feed = self._make_feed(None, events)
+        feed.async_update = AsyncMock()
+        data = self._make_data(feed, prefix="Work: ")
+        result = await data.async_get_events(
+            hass, now, now + timedelta(days=3)
+        )
+        assert [event.summary for event in result] == ["Work: Standup"] * 3
+        assert result[0].summary is result[1].summary is result[2].summary
+
+    @patch("custom_components.ics_calendar.calendar.hanow")
+    def test_stale_age(self, mock_now):
+        """Test the stale age is the time since the last download."""
+        now = hadt.now()
+        mock_now.return_value = now
+        feed = self._make_feed(None, [])
+        feed.downloaded_at = None
+        data = self._make_data(feed, serve_stale=True)
+        assert data.get_stale_age() is None
+
+        feed.downloaded_at = now - timedelta(minutes=20)
+        assert data.get_stale_age() == 1200
+
+
+class TestICSCalendarEntity:
+    """Test ICSCalendarEntity class."""
+
+    async def test_no_update_after_remove(self, hass):
+        """Test that a calendar update after removal is ignored."""
+        with patch("custom_components.ics_calendar.calendar.ICSCalendarData"):
+            entity = ICSCalendarEntity(
+                "calendar.test",
+                {CONF_NAME: "test", CONF_URL: "http://127.0.0.1/test.ics"},
+            )
+        entity.hass = hass
+        entity.data.async_release = AsyncMock()
+        entity.data.async_update_event = AsyncMock()
+        await entity.async_will_remove_from_hass()
+        entity.data.async_release.assert_awaited_once()
+
+        entity._handle_feed_update()  # pylint: disable=W0212
+        await hass.async_block_till_done()
+        entity.data.async_update_event.assert_not_awaited()
@@ -1,6 +1,10 @@
 """Test the CalendarData class."""
 
+import asyncio
 import email
+import gzip
+import time
+import urllib.request
 from datetime import timedelta
 from io import BytesIO
 from unittest.mock import patch
@@ -8,9 +12,15 @@ from urllib.error import ContentTooShortError, HTTPError, URLError
 from urllib.request import HTTPHandler, build_opener, install_opener
 from urllib.response import addinfourl
 
+import httpx
+import pytest
 from dateutil import parser as dtparser
 
+from custom_components.ics_calendar.bodydecoder import BodyDecoder
 from custom_components.ics_calendar.calendardata import CalendarData
+from custom_components.ics_calendar.downloadscheduler import (
+    DownloadScheduler,
+)
 
 BINARY_CALENDAR_DATA = b"calendar data"
 BINARY_CALENDAR_DATA_2 = b"2 calendar data"
@@ -51,6 +61,44 @@ BAD_DEFLATE_CALENDAR_DATA = (
 TEST_URL = "http://127.0.0.1/test/allday.ics"
 TEST_TEMPLATE_URL = "http://127.0.0.1/test/{year}/{month}/allday.ics"
 TEST_TEMPLATE_URL_REPLACED = "http://127.0.0.1/test/2022/01/allday.ics"
+ETAG = '"v1"'
+LAST_MODIFIED = "Sat, 01 Jan 2022 00:00:00 GMT"
+SLOW_FEED_DELAY = 0.5
+SLOW_FEED_COUNT = 5
+
+
+async def async_download_all(calendars: list[CalendarData]) -> float:
+    """Call async_download_calendar for each calendar at the same time.
+
+    :return: The number of seconds until every download finished
+    :rtype: float
+    """
+    async with httpx.AsyncClient() as client:
+        with patch(
+            "custom_components.ics_calendar.calendardata.get_async_client",
+            return_value=client,
+        ):
+            start = time.monotonic()
+            await asyncio.gather(
+                *(cal.async_download_calendar(None) for cal in calendars)
+            )
+            return time.monotonic() - start
+
+
+def make_slow_feeds(logger, http_stub) -> list[CalendarData]:
+    """Return CalendarData objects for slow feeds on http_stub."""
+    calendars = []
+    for i in range(SLOW_FEED_COUNT):
+        url = http_stub.add_response(
+            f"/slow{i}.ics", BINARY_CALENDAR_DATA, delay=SLOW_FEED_DELAY
+        )
+        calendar_data = CalendarData(
+            logger, f"{CALENDAR_NAME}{i}", url, timedelta(minutes=5)
+        )
+        # Use a private opener, so mocks installed globally are not used.
+        calendar_data.set_headers("", "", "Mozilla/5.0", "")
+        calendars.append(calendar_data)
+    return calendars
 
 
 def set_calendar_data(calendar_data: CalendarData, data: str):
@@ -77,6 +125,79 @@ Content-length: {len(data)}
     return resp
 
 
+class MockStream(httpx.AsyncByteStream):
+    """Stream data in chunks, like a response from a server."""
+
+    def __init__(self, data: bytes, chunk_size: int = 4):
+        """Construct MockStream object."""
+        self._data = data
+        self._chunk_size = chunk_size
+
+    async def __aiter__(self):
+        """Yield the data in chunks."""
+        for i in range(0, len(self._data), self._chunk_size):
+            yield self._data[i : i + self._chunk_size]
+
+
+def mock_client(handler) -> httpx.AsyncClient:
+    """Return an httpx client that calls handler for every request.
+
+    The body of the response from handler is streamed to the client.
+    """
+
+    def streaming_handler(request: httpx.Request) -> httpx.Response:
+        response = handler(request)
+        return httpx.Response(
+            response.status_code,
+            headers=response.headers,
+            stream=MockStream(b"".join(response.stream)),
+        )
+
+    return httpx.AsyncClient(transport=httpx.MockTransport(streaming_handler))
+
+
+def patch_async_client(handler):
+    """Patch get_async_client to return mock_client(handler)."""
+    return patch(
+        "custom_components.ics_calendar.calendardata.get_async_client",
+        return_value=mock_client(handler),
+    )
+
+
+def challenge_handler(scheme: str):
+    """Return a handler that requires the given authentication scheme."""
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        auth = request.headers.get("Authorization", "")
+        if auth.startswith(scheme):
+            return httpx.Response(200, content=BINARY_CALENDAR_DATA)
+        challenge = f'{scheme} realm="test"'
+        if scheme == "Digest":
+            challenge += ', nonce="abc", qop="auth"'
+        return httpx.Response(401, headers={"WWW-Authenticate": challenge})
+
+    return handler
+
+
+def conditional_handler(requests: list):
+    """Return a handler that supports ETag and Last-Modified."""
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        if (
+            request.headers.get("If-None-Match") == ETAG
+            or request.headers.get("If-Modified-Since") == LAST_MODIFIED
+        ):
+            return httpx.Response(304)
+        return httpx.Response(
+            200,
+            content=BINARY_CALENDAR_DATA,
+            headers={"ETag": ETAG, "Last-Modified": LAST_MODIFIED},
+        )
+
+    return handler
+
+
 class MockHTTPHandlerContentTooShortError(HTTPHandler):
     """Mock HTTPHandler with a ContentTooShortError."""
 
@@ -173,6 +294,14 @@ class MockHTTPGzipHandlerBadDeflate(HTTPHandler):
         return mock_response(req, BAD_DEFLATE_CALENDAR_DATA, "gzip")
 
 
+class MockHTTPHandlerUnknownEncoding(HTTPHandler):
+    """Mock HTTPHandler that returns data with an unknown encoding."""
+
+    def http_open(self, req):
+        """Provide http_open to return data with an unknown encoding."""
+        return mock_response(req, BINARY_CALENDAR_DATA, "unknown")
+
+
 class MockHTTPHandler2(HTTPHandler):
     """Mock HTTPHandler that returns BINARY_CALENDAR_DATA_2."""
 
@@ -471,6 +600,17 @@ class TestCalendarData:
         calendar_data.download_calendar()
         assert calendar_data.get() is None
 
+    def test_download_calendar_unknown_encoding(self, logger, caplog):
+        """Test that an unknown encoding is reported as a decode error."""
+        calendar_data = CalendarData(
+            logger, CALENDAR_NAME, TEST_URL, timedelta(minutes=5)
+        )
+        install_opener(build_opener(MockHTTPHandlerUnknownEncoding))
+        assert not calendar_data.download_calendar()
+        assert calendar_data.get() is None
+        assert "Failed to decode data" in caplog.text
+        assert "Unsupported Content-Encoding: unknown" in caplog.text
+
     def test_download_calendar_bad_deflate(self, logger):
         """Test that None is cached for BadDeflate.
 
@@ -580,6 +720,25 @@ class TestCalendarData:
         assert calendar_data.download_calendar()
         assert calendar_data.get() == CALENDAR_DATA_2
 
+    @patch(
+        "custom_components.ics_calendar.calendardata.hanow",
+        return_value=dtparser.parse("2022-01-01T00:00:00"),
+    )
+    def test_get_last_download(self, mock_hanow, logger):
+        """Test get_last_download is the time data was last downloaded."""
+        calendar_data = CalendarData(
+            logger,
+            CALENDAR_NAME,
+            TEST_URL,
+            timedelta(minutes=5),
+        )
+        assert calendar_data.get_last_download() is None
+
+        opener = build_opener(MockHTTPHandler)
+        install_opener(opener)
+        assert calendar_data.download_calendar()
+        assert calendar_data.get_last_download() == mock_hanow.return_value
+
     @patch(
         "custom_components.ics_calendar.calendardata.hanow",
         return_value=dtparser.parse("2022-01-01T00:00:00"),
@@ -623,3 +782,453 @@ class TestCalendarData:
         install_opener(opener)
         assert calendar_data.download_calendar()
         assert calendar_data.get() == timeout_str
+
+    async def test_slow_feeds_download_in_parallel(
+        self, logger, http_stub, monkeypatch
+    ):
+        """Test that slow feeds take about as long as the slowest one."""
+        monkeypatch.setattr(
+            CalendarData,
+            "download_scheduler",
+            DownloadScheduler(SLOW_FEED_COUNT, SLOW_FEED_COUNT),
+        )
+        calendars = make_slow_feeds(logger, http_stub)
+
+        elapsed = await async_download_all(calendars)
+
+        for calendar_data in calendars:
+            assert calendar_data.get() == CALENDAR_DATA
+        assert elapsed < 2 * SLOW_FEED_DELAY
+
+    @pytest.mark.parametrize(
+        ("max_downloads", "max_per_host"),
+        [(SLOW_FEED_COUNT, 1), (1, SLOW_FEED_COUNT)],
+    )
+    async def test_slow_feeds_honor_limits(
+        self, logger, http_stub, monkeypatch, max_downloads, max_per_host
+    ):
+        """Test that downloads from one host, and in total, are limited."""
+        monkeypatch.setattr(
+            CalendarData,
+            "download_scheduler",
+            DownloadScheduler(max_downloads, max_per_host),
+        )
+        calendars = make_slow_feeds(logger, http_stub)
+
+        elapsed = await async_download_all(calendars)
+
+        for calendar_data in calendars:
+            assert calendar_data.get() == CALENDAR_DATA
+        assert elapsed >= SLOW_FEED_COUNT * SLOW_FEED_DELAY
+
+    async def test_same_url_downloads_once(
+        self, logger, http_stub, monkeypatch
+    ):
+        """Test that concurrent calls for one calendar download once."""
+        monkeypatch.setattr(
+            CalendarData, "download_scheduler", DownloadScheduler()
+        )
+        url = http_stub.add_response(
+            "/once.ics", BINARY_CALENDAR_DATA, delay=SLOW_FEED_DELAY
+        )
+        calendar_data = CalendarData(
+            logger, CALENDAR_NAME, url, timedelta(minutes=5)
+        )
+        calendar_data.set_headers("", "", "Mozilla/5.0", "")
+
+        await async_download_all([calendar_data] * 3)
+
+        assert calendar_data.get() == CALENDAR_DATA
+        assert len(http_stub.requests) == 1
+
+    async def test_async_download_calendar(self, logger):
+        """Test async_download_calendar sets cache from the mocked client."""
+        calendar_data = CalendarData(
+            logger, CALENDAR_NAME, TEST_URL, timedelta(minutes=5)
+        )
+        with patch_async_client(
+            lambda request: httpx.Response(200, content=BINARY_CALENDAR_DATA)
+        ):
+            assert await calendar_data.async_download_calendar(None)
+            assert not await calendar_data.async_download_calendar(None)
+        assert calendar_data.get() == CALENDAR_DATA
+
+    async def test_async_downloads_reuse_connection(self, logger, http_stub):
+        """Test that downloads from the same host share a connection."""
+        urls = [
+            http_stub.add_response(f"/keepalive{i}.ics", BINARY_CALENDAR_DATA)
+            for i in range(2)
+        ]
+        async with httpx.AsyncClient() as client:
+            with patch(
+                "custom_components.ics_calendar.calendardata.get_async_client",
+                return_value=client,
+            ):
+                for url in urls:
+                    calendar_data = CalendarData(
+                        logger, CALENDAR_NAME, url, timedelta(minutes=5)
+                    )
+                    assert await calendar_data.async_download_calendar(None)
+        assert len(http_stub.clients) == 2
+        assert http_stub.clients[0] == http_stub.clients[1]
+
+    def test_download_calendar_keeps_global_opener(self, logger, http_stub):
+        """Test that download_calendar does not install its opener."""
+        url = http_stub.add_response("/private.ics", BINARY_CALENDAR_DATA)
+        calendar_data = CalendarData(
+            logger, CALENDAR_NAME, url, timedelta(minutes=5)
+        )
+        calendar_data.set_headers("username", "password", "Mozilla/5.0", "")
+        global_opener = urllib.request._opener  # pylint: disable=W0212
+        assert calendar_data.download_calendar()
+        assert urllib.request._opener is global_opener  # pylint: disable=W0212
+
+    async def test_async_download_calendar_sends_headers(self, logger):
+        """Test async_download_calendar sends user agent and accept header."""
+        requests = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            requests.append(request)
+            return httpx.Response(200, content=UTF16_BOM_LE_CALENDAR_DATA)
+
+        calendar_data = CalendarData(
+            logger, CALENDAR_NAME, TEST_URL, timedelta(minutes=5)
+        )
+        calendar_data.set_headers("", "", "Mozilla/5.0", "text/calendar")
+        with patch_async_client(handler):
+            assert await calendar_data.async_download_calendar(None)
+        assert calendar_data.get() == CALENDAR_DATA
+        assert requests[0].headers["User-agent"] == "Mozilla/5.0"
+        assert requests[0].headers["Accept"] == "text/calendar"
+
+    @pytest.mark.parametrize(
+        "compression,accept_encoding",
+        [
+            (True, ", ".join(BodyDecoder.supported_encodings())),
+            (False, "identity"),
+        ],
+    )
+    async def test_async_download_calendar_sends_accept_encoding(
+        self, logger, compression, accept_encoding
+    ):
+        """Test async_download_calendar asks for compressed data."""
+        requests = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            requests.append(request)
+            return httpx.Response(200, content=BINARY_CALENDAR_DATA)
+
+        calendar_data = CalendarData(
+            logger, CALENDAR_NAME, TEST_URL, timedelta(minutes=5)
+        )
+        calendar_data.set_compression(compression)
+        with patch_async_client(handler):
+            assert await calendar_data.async_download_calendar(None)
+        assert requests[0].headers["Accept-Encoding"] == accept_encoding
+
+    def test_download_calendar_accepts_gzip(self, logger, http_stub):
+        """Test download_calendar asks for and uncompresses gzip data."""
+        url = http_stub.add_response(
+            "/gzip.ics",
+            GZIP_CALENDAR_DATA,
+            headers={"Content-Encoding": "gzip"},
+        )
+        calendar_data = CalendarData(
+            logger, CALENDAR_NAME, url, timedelta(minutes=5)
+        )
+        calendar_data.set_headers("", "", "Mozilla/5.0", "")
+        assert calendar_data.download_calendar()
+        assert calendar_data.get() == CALENDAR_DATA
+        assert "gzip" in http_stub.requests[0][1]["Accept-Encoding"]
+
+    async def test_async_download_calendar_interprets_gzip(self, logger):
+        """Test async_download_calendar uncompresses gzip data."""
+        calendar_data = CalendarData(
+            logger, CALENDAR_NAME, TEST_URL, timedelta(minutes=5)
+        )
+        with patch_async_client(
+            lambda request: httpx.Response(
+                200,
+                content=GZIP_CALENDAR_DATA,
+                headers={"Content-Encoding": "gzip"},
+            )
+        ):
+            assert await calendar_data.async_download_calendar(None)
+        assert calendar_data.get() == CALENDAR_DATA
+
+    async def test_async_download_calendar_bad_gzip(self, logger):
+        """Test that None is cached for bad gzip data."""
+        calendar_data = CalendarData(
+            logger, CALENDAR_NAME, TEST_URL, timedelta(minutes=5)
+        )
+        with patch_async_client(
+            lambda request: httpx.Response(
+                200,
+                content=BAD_GZIP_CALENDAR_DATA,
+                headers={"Content-Encoding": "gzip"},
+            )
+        ):
+            assert not await calendar_data.async_download_calendar(None)
+        assert calendar_data.get() is None
+
+    async def test_async_download_calendar_unknown_encoding(
+        self, logger, caplog
+    ):
+        """Test that an unknown encoding is reported as a decode error."""
+        calendar_data = CalendarData(
+            logger, CALENDAR_NAME, TEST_URL, timedelta(minutes=5)
+        )
+        with patch_async_client(
+            lambda request: httpx.Response(
+                200,
+                content=BINARY_CALENDAR_DATA,
+                headers={"Content-Encoding": "unknown"},
+            )
+        ):
+            assert not await calendar_data.async_download_calendar(None)
+        assert calendar_data.get() is None
+        assert "Failed to decode data" in caplog.text
+        assert "Unsupported Content-Encoding: unknown" in caplog.text
+
+    async def test_async_download_calendar_max_body_size(self, logger):
+        """Test that None is cached for data larger than max_body_size."""
+        calendar_data = CalendarData(
+            logger, CALENDAR_NAME, TEST_URL, timedelta(minutes=5)
+        )
+        calendar_data.set_max_body_size(1)
+        assert calendar_data.max_body_size == 1024 * 1024
+        with patch_async_client(
+            lambda request: httpx.Response(
+                200,
+                content=gzip.compress(b"X" * (1024 * 1024 + 1)),
+                headers={"Content-Encoding": "gzip"},
+            )
+        ):
+            assert not await calendar_data.async_download_calendar(None)
+        assert calendar_data.get() is None
+
+    async def test_async_download_calendar_basic_auth(self, logger):
+        """Test async_download_calendar answers a Basic challenge."""
+        calendar_data = CalendarData(
+            logger, CALENDAR_NAME, TEST_URL, timedelta(minutes=5)
+        )
+        calendar_data.set_headers("username", "password", "", "")
+        with patch_async_client(challenge_handler("Basic")):
+            assert await calendar_data.async_download_calendar(None)
+        assert calendar_data.get() == CALENDAR_DATA
+
+    async def test_async_download_calendar_digest_auth(self, logger):
+        """Test async_download_calendar answers a Digest challenge."""
+        calendar_data = CalendarData(
+            logger, CALENDAR_NAME, TEST_URL, timedelta(minutes=5)
+        )
+        calendar_data.set_headers("username", "password", "", "")
+        with patch_async_client(challenge_handler("Digest")):
+            assert await calendar_data.async_download_calendar(None)
+        assert calendar_data.get() == CALENDAR_DATA
+
+    async def test_async_download_calendar_no_auth(self, logger):
+        """Test that None is cached if the server requires credentials."""
+        calendar_data = CalendarData(
+            logger, CALENDAR_NAME, TEST_URL, timedelta(minutes=5)
+        )
+        with patch_async_client(challenge_handler("Basic")):
+            assert not await calendar_data.async_download_calendar(None)
+        assert calendar_data.get() is None
+
+    async def test_async_download_calendar_request_error(self, logger):
+        """Test that None is cached if the request fails."""
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            raise httpx.ConnectError("bad url", request=request)
+
+        calendar_data = CalendarData(
+            logger, CALENDAR_NAME, TEST_URL, timedelta(minutes=5)
+        )
+        with patch_async_client(handler):
+            assert not await calendar_data.async_download_calendar(None)
+        assert calendar_data.get() is None
+
+    async def test_async_download_calendar_has_timeout(self, logger):
+        """Test that the timeout is passed to the client."""
+        timeouts = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            timeouts.append(request.extensions["timeout"])
+            return httpx.Response(200, content=BINARY_CALENDAR_DATA)
+
+        calendar_data = CalendarData(
+            logger, CALENDAR_NAME, TEST_URL, timedelta(minutes=5)
+        )
+        calendar_data.set_timeout(1.5)
+        with patch_async_client(handler):
+            assert await calendar_data.async_download_calendar(None)
+        assert timeouts[0]["connect"] == 1.5
+        assert timeouts[0]["read"] == 1.5
+
+    @patch(
+        "custom_components.ics_calendar.calendardata.hanow",
+        return_value=dtparser.parse("2022-01-01T00:00:00"),
+    )
+    def test_download_calendar_not_modified(
+        self, mock_hanow, logger, http_stub
+    ):
+        """Test that a 304 response keeps the previous data."""
+        mock_hanow.side_effect = [
+            dtparser.parse("2022-01-01T00:00:00"),
+            dtparser.parse("2022-01-01T00:00:00"),
+            dtparser.parse("2022-01-01T00:05:05"),
+            dtparser.parse("2022-01-01T00:05:05"),
+            dtparser.parse("2022-01-01T00:05:05"),
+        ]
+        url = http_stub.add_response(
+            "/etag.ics", BINARY_CALENDAR_DATA, headers={"ETag": ETAG}
+        )
+        calendar_data = CalendarData(
+            logger, CALENDAR_NAME, url, timedelta(minutes=5)
+        )
+        calendar_data.set_headers("", "", "Mozilla/5.0", "")
+
+        assert calendar_data.download_calendar()
+        assert not calendar_data.download_calendar()
+
+        assert calendar_data.get() == CALENDAR_DATA
+        assert "If-None-Match" not in http_stub.requests[0][1]
+        assert http_stub.requests[1][1]["If-None-Match"] == ETAG
+
+    @patch(
+        "custom_components.ics_calendar.calendardata.hanow",
+        return_value=dtparser.parse("2022-01-01T00:00:00"),
+    )
+    async def test_async_download_calendar_not_modified(
+        self, mock_hanow, logger
+    ):
+        """Test that a 304 response keeps the previous data."""
+        mock_hanow.side_effect = [
+            dtparser.parse("2022-01-01T00:00:00"),
+            dtparser.parse("2022-01-01T00:00:00"),
+            dtparser.parse("2022-01-01T00:05:05"),
+            dtparser.parse("2022-01-01T00:05:05"),
+            dtparser.parse("2022-01-01T00:05:05"),
+        ]
+        requests = []
+        calendar_data = CalendarData(
+            logger, CALENDAR_NAME, TEST_URL, timedelta(minutes=5)
+        )
+        with patch_async_client(conditional_handler(requests)):
+            assert await calendar_data.async_download_calendar(None)
+            assert not await calendar_data.async_download_calendar(None)
+
+        assert calendar_data.get() == CALENDAR_DATA
+        assert "If-None-Match" not in requests[0].headers
+        assert requests[1].headers["If-None-Match"] == ETAG
+        assert requests[1].headers["If-Modified-Since"] == LAST_MODIFIED
+
+    async def test_async_download_calendar_no_validators_without_data(
+        self, logger
+    ):
+        """Test that validators are not sent if there is no data to keep."""
+        requests = []
+        calendar_data = CalendarData(
+            logger, CALENDAR_NAME, TEST_URL, timedelta(minutes=5)
+        )
+        with patch_async_client(conditional_handler(requests)):
+            assert await calendar_data.async_download_calendar(None)
+            set_calendar_data(calendar_data, None)
+            assert await calendar_data.async_download_calendar(None)
+
+        assert "If-None-Match" not in requests[1].headers
+        assert calendar_data.get() == CALENDAR_DATA
+
+    @patch(
+        "custom_components.ics_calendar.calendardata.hanow",
+        return_value=dtparser.parse("2022-01-01T00:00:00"),
+    )
+    def test_download_same_data_is_not_a_change(self, mock_hanow, logger):
+        """Test that downloading identical data is not reported as changed."""
+        mock_hanow.side_effect = [
+            dtparser.parse("2022-01-01T00:00:00"),
+            dtparser.parse("2022-01-01T00:00:00"),
+            dtparser.parse("2022-01-01T00:05:05"),
+            dtparser.parse("2022-01-01T00:05:05"),
+            dtparser.parse("2022-01-01T00:05:05"),
+            dtparser.parse("2022-01-01T00:10:10"),
+            dtparser.parse("2022-01-01T00:10:10"),
+            dtparser.parse("2022-01-01T00:10:10"),
+        ]
+        calendar_data = CalendarData(
+            logger, CALENDAR_NAME, TEST_URL, timedelta(minutes=5)
+        )
+        assert calendar_data.get_digest() is None
+        install_opener(build_opener(MockHTTPHandler))
+        assert calendar_data.download_calendar()
+        assert calendar_data.changed_since_last()
+        digest = calendar_data.get_digest()
+
+        assert not calendar_data.download_calendar()
+        assert not calendar_data.changed_since_last()
+        assert calendar_data.get() == CALENDAR_DATA
+        assert calendar_data.get_digest() == digest
+
+        install_opener(build_opener(MockHTTPHandler2))
+        assert calendar_data.download_calendar()
+        assert calendar_data.changed_since_last()
+        assert calendar_data.get() == CALENDAR_DATA_2
+        assert calendar_data.get_digest() != digest
+
+    @patch(
+        "custom_components.ics_calendar.calendardata.hanow",
+        return_value=dtparser.parse("2022-01-01T00:00:00"),
+    )
+    async def test_async_download_same_data_after_error(
+        self, mock_hanow, logger
+    ):
+        """Test that data is reported as changed after a failed download."""
+        responses = [
+            httpx.Response(200, content=BINARY_CALENDAR_DATA),
+            httpx.Response(500),
+            httpx.Response(200, content=BINARY_CALENDAR_DATA),
+        ]
+        calendar_data = CalendarData(
+            logger, CALENDAR_NAME, TEST_URL, timedelta(minutes=5)
+        )
+        with patch_async_client(lambda request: responses.pop(0)):
+            assert await calendar_data.async_download_calendar(None)
+            mock_hanow.return_value = dtparser.parse("2022-01-01T00:05:05")
+            assert not await calendar_data.async_download_calendar(None)
+            assert calendar_data.get() is None
+            assert calendar_data.get_digest() is None
+            assert await calendar_data.async_download_calendar(None)
+        assert calendar_data.get() == CALENDAR_DATA
+
+    @patch(
+        "custom_components.ics_calendar.calendardata.hanow",
+        return_value=dtparser.parse("2022-01-01T00:00:00+00:00"),
+    )
+    async def test_set_cache_data_revalidates(self, mock_hanow, logger):
+        """Test that restored data is revalidated after the interval."""
+        requests = []
+        calendar_data = CalendarData(
+            logger, CALENDAR_NAME, TEST_URL, timedelta(minutes=5)
+        )
+        with patch_async_client(conditional_handler(requests)):
+            assert await calendar_data.async_download_calendar(None)
+        cache_data = calendar_data.get_cache_data()
+
+        restored = CalendarData(
+            logger, CALENDAR_NAME, TEST_URL, timedelta(minutes=5)
+        )
+        restored.set_cache_data(cache_data)
+        assert restored.get() == CALENDAR_DATA
+        assert restored.get_digest() == calendar_data.get_digest()
+        assert not restored.changed_since_last()
+        with patch_async_client(conditional_handler(requests)):
+            assert not await restored.async_download_calendar(None)
+            assert len(requests) == 1
+            mock_hanow.return_value = dtparser.parse(
+                "2022-01-01T00:05:05+00:00"
+            )
+            assert not await restored.async_download_calendar(None)
+
+        assert requests[1].headers["If-None-Match"] == ETAG
+        assert restored.get() == CALENDAR_DATA
@@ -0,0 +1,67 @@
+"""Test the CompactEvents class."""
+
+from datetime import datetime, timedelta, timezone
+
+from custom_components.ics_calendar.compactevents import CompactEvents
+
+BERLIN = timezone(timedelta(hours=2))
+UTC = timezone.utc
+
+
+def make_event(hour: int, hours: int, summary: str, tz=UTC) -> tuple:
+    """Return an event starting at hour on 2022-06-01, lasting hours."""
+    start = datetime(2022, 6, 1, hour, tzinfo=tz)
+    return (
+        start,
+        start + timedelta(hours=hours),
+        False,
+        summary,
+        None,
+        "Description",
+    )
+
+
+class TestCompactEvents:
+    """Test CompactEvents class."""
+
+    def test_get(self):
+        """Test that events come back as given, sorted by start."""
+        events = [
+            make_event(12, 1, "Later", BERLIN),
+            (*make_event(0, 24, "All day")[:2], True, "All day", "Home", None),
+        ]
+        compact = CompactEvents(events)
+        assert len(compact) == 2
+        assert compact.get(0) == events[1]
+        assert compact.get(1) == events[0]
+        assert compact.get(1)[0].utcoffset() == timedelta(hours=2)
+        assert compact.is_all_day(0)
+        assert not compact.is_all_day(1)
+        assert list(compact.get_texts(1)) == ["Later", None, "Description"]
+
+    def test_between(self):
+        """Test that only events that start and end in the span are found."""
+        compact = CompactEvents(
+            [
+                make_event(8, 1, "Before"),
+                make_event(9, 4, "Past the end"),
+                make_event(10, 1, "In"),
+                make_event(11, 1, "Also in"),
+                make_event(13, 1, "After"),
+            ]
+        )
+        start = datetime(2022, 6, 1, 9, tzinfo=UTC)
+        end = datetime(2022, 6, 1, 12, tzinfo=UTC)
+        assert [
+            next(compact.get_texts(index))
+            for index in compact.between(start, end)
+        ] == ["In", "Also in"]
+
+    def test_texts_are_kept_once(self):
+        """Test that a text used by many events is stored once."""
+        compact = CompactEvents(
+            make_event(hour, 1, "Same") for hour in range(10)
+        )
+        # None, the summary, and the description
+        assert len(compact._texts) == 3  # pylint: disable=W0212
+        assert len(compact.starts) == len(compact.ends) == 10
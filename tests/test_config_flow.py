@@ -19,13 +19,20 @@ from homeassistant.data_entry_flow import FlowResultType
 from custom_components.ics_calendar import (
     CONF_ACCEPT_HEADER,
     CONF_ADV_CONNECT_OPTS,
+    CONF_COMPRESSION,
     CONF_CONNECTION_TIMEOUT,
     CONF_DAYS,
     CONF_DOWNLOAD_INTERVAL,
     CONF_INCLUDE_ALL_DAY,
+    CONF_MAX_BODY_SIZE,
     CONF_OFFSET_HOURS,
+    CONF_PARSE_IN_PROCESS,
     CONF_PARSER,
+    CONF_PERSISTENT_CACHE,
     CONF_REQUIRES_AUTH,
+    CONF_RETAIN_FUTURE_DAYS,
+    CONF_RETAIN_PAST_DAYS,
+    CONF_SERVE_STALE,
     CONF_SET_TIMEOUT,
     CONF_USER_AGENT,
     DOMAIN,
@@ -419,6 +426,12 @@ class TestICSCalendarConfigFlow:
             CONF_OFFSET_HOURS: 0,
             CONF_PARSER: "rie",
             CONF_PREFIX: "",
+            CONF_PERSISTENT_CACHE: False,
+            CONF_MAX_BODY_SIZE: 50,
+            CONF_PARSE_IN_PROCESS: False,
+            CONF_SERVE_STALE: False,
+            CONF_RETAIN_PAST_DAYS: 0,
+            CONF_RETAIN_FUTURE_DAYS: 0,
         }
         expected = {
             "context": {"source": "user"},
@@ -576,6 +589,12 @@ class TestICSCalendarConfigFlow:
             CONF_OFFSET_HOURS: 0,
             CONF_PARSER: "rie",
             CONF_PREFIX: "",
+            CONF_PERSISTENT_CACHE: False,
+            CONF_MAX_BODY_SIZE: 50,
+            CONF_PARSE_IN_PROCESS: False,
+            CONF_SERVE_STALE: False,
+            CONF_RETAIN_PAST_DAYS: 0,
+            CONF_RETAIN_FUTURE_DAYS: 0,
             CONF_USERNAME: "username",
             CONF_PASSWORD: "password",
         }
@@ -674,6 +693,12 @@ class TestICSCalendarConfigFlow:
             CONF_OFFSET_HOURS: 0,
             CONF_PARSER: "rie",
             CONF_PREFIX: "",
+            CONF_PERSISTENT_CACHE: False,
+            CONF_MAX_BODY_SIZE: 50,
+            CONF_PARSE_IN_PROCESS: False,
+            CONF_SERVE_STALE: False,
+            CONF_RETAIN_PAST_DAYS: 0,
+            CONF_RETAIN_FUTURE_DAYS: 0,
             CONF_USER_AGENT: "user-agent",
             CONF_ACCEPT_HEADER: "accept",
             CONF_SET_TIMEOUT: True,
@@ -748,7 +773,14 @@ class TestICSCalendarConfigFlow:
             CONF_OFFSET_HOURS: 0,
             CONF_PARSER: "rie",
             CONF_PREFIX: "",
+            CONF_PERSISTENT_CACHE: False,
+            CONF_MAX_BODY_SIZE: 50,
+            CONF_PARSE_IN_PROCESS: False,
+            CONF_SERVE_STALE: False,
+            CONF_RETAIN_PAST_DAYS: 0,
+            CONF_RETAIN_FUTURE_DAYS: 0,
             CONF_USER_AGENT: "user-agent",
+            CONF_COMPRESSION: True,
             CONF_ACCEPT_HEADER: "accept",
             CONF_SET_TIMEOUT: False,
         }
@@ -845,7 +877,14 @@ class TestICSCalendarConfigFlow:
             CONF_OFFSET_HOURS: 0,
             CONF_PARSER: "rie",
             CONF_PREFIX: "",
+            CONF_PERSISTENT_CACHE: False,
+            CONF_MAX_BODY_SIZE: 50,
+            CONF_PARSE_IN_PROCESS: False,
+            CONF_SERVE_STALE: False,
+            CONF_RETAIN_PAST_DAYS: 0,
+            CONF_RETAIN_FUTURE_DAYS: 0,
             CONF_USER_AGENT: "user-agent",
+            CONF_COMPRESSION: True,
             CONF_ACCEPT_HEADER: "accept",
             CONF_SET_TIMEOUT: True,
             CONF_CONNECTION_TIMEOUT: 50,
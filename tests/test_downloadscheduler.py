@@ -0,0 +1,119 @@
+"""Test the DownloadScheduler class."""
+
+import asyncio
+from threading import Event, Thread
+
+import pytest
+
+from custom_components.ics_calendar.downloadscheduler import (
+    DownloadScheduler,
+)
+
+
+class TestDownloadScheduler:
+    """Test the DownloadScheduler class."""
+
+    def test_invalid_limits(self):
+        """Test that limits below 1 are rejected."""
+        with pytest.raises(ValueError):
+            DownloadScheduler(0, 1)
+        with pytest.raises(ValueError):
+            DownloadScheduler(1, 0)
+
+    def test_same_url_is_serialized(self):
+        """Test that a URL cannot be downloaded twice at the same time."""
+        scheduler = DownloadScheduler(4, 4)
+        result = []
+
+        def other():
+            with scheduler.slot("http://a.local/cal.ics"):
+                result.append("other")
+
+        with scheduler.slot("http://a.local/cal.ics"):
+            thread = Thread(target=other)
+            thread.start()
+            thread.join(0.2)
+            assert thread.is_alive()
+            result.append("first")
+        thread.join()
+        assert result == ["first", "other"]
+
+    def test_other_hosts_are_not_blocked(self):
+        """Test that a full host does not block other hosts."""
+        scheduler = DownloadScheduler(4, 1)
+        result = []
+
+        def other():
+            with scheduler.slot("http://b.local/cal.ics"):
+                result.append("other")
+
+        with scheduler.slot("http://a.local/cal.ics"):
+            thread = Thread(target=other)
+            thread.start()
+            thread.join(1)
+            assert not thread.is_alive()
+            result.append("first")
+        assert result == ["other", "first"]
+
+    def test_locks_are_released(self):
+        """Test that the slots of a URL are dropped when it is downloaded."""
+        scheduler = DownloadScheduler(1, 1)
+        url_slots = scheduler._url_slots  # pylint: disable=W0212
+        with scheduler.slot("http://a.local/cal.ics"):
+            assert len(url_slots) == 1
+        assert not url_slots
+        assert not scheduler._host_slots  # pylint: disable=W0212
+
+    async def test_async_locks_are_released(self):
+        """Test that the slots of a URL are dropped the same way in async."""
+        scheduler = DownloadScheduler(1, 1)
+        url_slots = scheduler._url_slots  # pylint: disable=W0212
+        async with scheduler.async_slot("http://a.local/cal.ics"):
+            assert len(url_slots) == 1
+        assert not url_slots
+        assert not scheduler._host_slots  # pylint: disable=W0212
+
+    async def test_blocking_and_async_share_limits(self):
+        """Test that a blocking download holds a slot async ones wait for."""
+        scheduler = DownloadScheduler(1, 1)
+        result = []
+        done = Event()
+
+        def blocking():
+            with scheduler.slot("http://a.local/cal.ics"):
+                result.append("blocking")
+                done.wait()
+
+        async def other():
+            async with scheduler.async_slot("http://b.local/cal.ics"):
+                result.append("async")
+
+        thread = Thread(target=blocking)
+        thread.start()
+        while not result:
+            await asyncio.sleep(0.01)
+        task = asyncio.create_task(other())
+        await asyncio.sleep(0.2)
+        assert result == ["blocking"]
+        done.set()
+        await asyncio.wait_for(task, 1)
+        thread.join()
+        assert result == ["blocking", "async"]
+
+    async def test_cancelled_wait_keeps_slots(self):
+        """Test that a download cancelled while waiting takes no slot."""
+        scheduler = DownloadScheduler(1, 1)
+
+        async def other():
+            async with scheduler.async_slot("http://b.local/cal.ics"):
+                pass
+
+        async with scheduler.async_slot("http://a.local/cal.ics"):
+            task = asyncio.create_task(other())
+            await asyncio.sleep(0.05)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+        await asyncio.wait_for(other(), 1)
+        with scheduler.slot("http://c.local/cal.ics"):
+            pass
@@ -0,0 +1,51 @@
+"""Test the EventIndex class."""
+
+import random
+
+import pytest
+
+from custom_components.ics_calendar.eventindex import EventIndex
+
+
+def overlaps(event: tuple, start: int, end: int) -> bool:
+    """Indicate if event starts at or before end, and ends at or after start."""
+    return event[0] <= end and start <= event[1]
+
+
+@pytest.fixture
+def events() -> list[tuple]:
+    """Return events of random length, as (start, end, name)."""
+    generator = random.Random(42)
+    events = []
+    for number in range(500):
+        start = generator.randrange(0, 1000)
+        length = generator.choice([0, 1, 5, 20, 300])
+        events.append((start, start + length, f"event {number}"))
+    return events
+
+
+class TestEventIndex:
+    """Test EventIndex class."""
+
+    @pytest.mark.parametrize(
+        "start,end", [(0, 0), (100, 110), (500, 500), (990, 2000), (-5, -1)]
+    )
+    def test_between(self, events, start, end):
+        """Test that every overlapping event is found, in its order."""
+        index = EventIndex(events, lambda event: event[:2])
+        found = index.between(start, end)
+        assert [event for event in found if overlaps(event, start, end)] == [
+            event for event in events if overlaps(event, start, end)
+        ]
+        assert found == [event for event in events if event in found]
+
+    def test_between_by_start(self, events):
+        """Test that events can be sorted by start and end."""
+        index = EventIndex(events, lambda event: event[:2])
+        found = index.between(100, 200, by_start=True)
+        assert found == sorted(found, key=lambda event: event[:2])
+        assert len(found) < len(events)
+
+    def test_empty(self):
+        """Test that an empty index finds nothing."""
+        assert not EventIndex([], lambda event: event[:2]).between(0, 10)
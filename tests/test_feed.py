@@ -0,0 +1,126 @@
+"""Test the Feed class."""
+
+from datetime import timedelta
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from dateutil import parser as dtparser
+from homeassistant.const import (
+    CONF_NAME,
+    CONF_PASSWORD,
+    CONF_URL,
+    CONF_USERNAME,
+)
+
+from custom_components.ics_calendar.calendardata import CalendarData
+from custom_components.ics_calendar.const import (
+    CONF_ACCEPT_HEADER,
+    CONF_DAYS,
+    CONF_DOWNLOAD_INTERVAL,
+    CONF_PARSER,
+    CONF_RETAIN_FUTURE_DAYS,
+    CONF_RETAIN_PAST_DAYS,
+    CONF_USER_AGENT,
+)
+from custom_components.ics_calendar.feed import Feed
+
+CONTENT = "\r\n".join(
+    [
+        "BEGIN:VCALENDAR",
+        "BEGIN:VEVENT",
+        "SUMMARY:Old",
+        "DTSTART:20100101T100000Z",
+        "END:VEVENT",
+        "BEGIN:VEVENT",
+        "SUMMARY:Recent",
+        "DTSTART:20220101T100000Z",
+        "END:VEVENT",
+        "END:VCALENDAR",
+    ]
+)
+
+
+@pytest.fixture
+def device_data() -> dict:
+    """Return the description of a calendar keeping 30 days of events."""
+    return {
+        CONF_NAME: "calendar",
+        CONF_URL: "http://127.0.0.1/test/retention.ics",
+        CONF_USERNAME: "",
+        CONF_PASSWORD: "",
+        CONF_USER_AGENT: "",
+        CONF_ACCEPT_HEADER: "",
+        CONF_DOWNLOAD_INTERVAL: 15,
+        CONF_PARSER: "rie",
+        CONF_DAYS: 1,
+        CONF_RETAIN_PAST_DAYS: 30,
+        CONF_RETAIN_FUTURE_DAYS: 0,
+    }
+
+
+@patch.object(CalendarData, "get_digest", return_value="digest")
+@patch.object(CalendarData, "get", return_value=CONTENT)
+@patch("custom_components.ics_calendar.feed.hanow")
+class TestFeed:
+    """Test Feed class."""
+
+    async def test_retention(
+        self, mock_now, mock_get, mock_digest, hass, device_data
+    ):
+        """Test that events outside the window are not parsed."""
+        mock_now.return_value = dtparser.parse("2022-01-15T00:00:00Z")
+        feed = Feed(device_data)
+        with patch.object(
+            CalendarData, "async_download_calendar", return_value=True
+        ):
+            assert await feed.async_update(hass)
+        events = feed.parser.get_event_list(
+            dtparser.parse("2000-01-01T00:00:00Z"),
+            dtparser.parse("2030-01-01T00:00:00Z"),
+            True,
+        )
+        assert [event.summary for event in events] == ["Recent"]
+
+    async def test_retention_window_moves(
+        self, mock_now, mock_get, mock_digest, hass, device_data
+    ):
+        """Test that the calendar is given to the parser again every day."""
+        now = dtparser.parse("2022-01-15T00:00:00Z")
+        mock_now.return_value = now
+        feed = Feed(device_data)
+        with patch.object(
+            CalendarData, "async_download_calendar", return_value=True
+        ):
+            await feed.async_update(hass)
+        digest = feed.content_digest
+        with (
+            patch.object(
+                CalendarData, "async_download_calendar", return_value=False
+            ),
+            patch.object(feed.parser, "set_content") as mock_set_content,
+        ):
+            assert not await feed.async_update(hass)
+            assert feed.content_digest == digest
+            mock_now.return_value = now + timedelta(days=1)
+            assert await feed.async_update(hass)
+            mock_set_content.assert_called_once()
+        # Events found for the old window must not be used for the new one
+        assert feed.content_digest != digest
+
+
+class TestFeedDownload:
+    """Test downloading the calendar of a Feed."""
+
+    async def test_file_url(self, hass, device_data):
+        """Test that a calendar with a file URI is read."""
+        device_data[CONF_URL] = Path("tests/allday.ics").resolve().as_uri()
+        device_data[CONF_RETAIN_PAST_DAYS] = 0
+        feed = Feed(device_data)
+        assert await feed.async_update(hass)
+        assert feed.calendar_data.get().startswith("BEGIN:VCALENDAR")
+        assert feed.parser.get_event_list(
+            dtparser.parse("2000-01-01T00:00:00Z"),
+            dtparser.parse("2030-01-01T00:00:00Z"),
+            True,
+        )
@@ -0,0 +1,122 @@
+"""Test the FeedCoordinator class."""
+
+from datetime import timedelta
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP
+
+from custom_components.ics_calendar.feedcoordinator import (
+    MIN_JITTER,
+    FeedCoordinator,
+)
+
+
+@pytest.fixture
+def feed() -> Mock:
+    """Return a Feed Mock with a download interval of 15 minutes."""
+    feed = Mock()
+    feed.name = "calendar"
+    feed.download_interval = timedelta(minutes=15)
+    feed.async_update = AsyncMock(return_value=True)
+    feed.calendar_data.get.return_value = "BEGIN:VCALENDAR"
+    feed.content_digest = "digest"
+    return feed
+
+
+class TestFeedCoordinator:
+    """Test FeedCoordinator class."""
+
+    async def test_refresh(self, hass, feed):
+        """Test that the data is the digest of the downloaded calendar."""
+        coordinator = FeedCoordinator(hass, feed)
+        await coordinator.async_refresh()
+        assert coordinator.last_update_success
+        assert coordinator.data == ("digest", feed.downloaded_at)
+        feed.async_update.assert_called_once_with(hass)
+
+    @patch(
+        "custom_components.ics_calendar.feedcoordinator.uniform",
+        return_value=0.1,
+    )
+    async def test_jitter(self, mock_uniform, hass, feed):
+        """Test that the download interval gets a jitter."""
+        coordinator = FeedCoordinator(hass, feed)
+        assert coordinator.get_next_interval() == (
+            timedelta(minutes=16, seconds=30) + MIN_JITTER
+        )
+        mock_uniform.assert_called_once_with(0, 0.1)
+
+    @patch(
+        "custom_components.ics_calendar.feedcoordinator.uniform",
+        return_value=0,
+    )
+    async def test_backoff(self, mock_uniform, hass, feed):
+        """Test that failed downloads are retried later every time."""
+        feed.calendar_data.get.return_value = None
+        coordinator = FeedCoordinator(hass, feed)
+        intervals = []
+        for _ in range(6):
+            await coordinator.async_refresh()
+            intervals.append(coordinator.get_next_interval() - MIN_JITTER)
+        assert not coordinator.last_update_success
+        assert intervals == [
+            timedelta(minutes=minutes) for minutes in (1, 2, 4, 8, 15, 15)
+        ]
+
+        feed.calendar_data.get.return_value = "BEGIN:VCALENDAR"
+        await coordinator.async_refresh()
+        assert coordinator.last_update_success
+        assert coordinator.get_next_interval() - MIN_JITTER == timedelta(
+            minutes=15
+        )
+
+    async def test_coalesce(self, hass, feed):
+        """Test that refresh requests close together are coalesced."""
+        coordinator = FeedCoordinator(hass, feed)
+        remove_listener = coordinator.async_add_listener(Mock())
+        await coordinator.async_request_refresh()
+        await coordinator.async_request_refresh()
+        await coordinator.async_request_refresh()
+        feed.async_update.assert_called_once_with(hass)
+        remove_listener()
+
+    async def test_listeners(self, hass, feed):
+        """Test that listeners are called when the calendar is downloaded."""
+        coordinator = FeedCoordinator(hass, feed)
+        listener = Mock()
+        remove_listener = coordinator.async_add_listener(listener)
+        await coordinator.async_refresh()
+        await coordinator.async_refresh()
+        listener.assert_called_once()
+
+        feed.content_digest = "changed"
+        await coordinator.async_refresh()
+        assert listener.call_count == 2
+
+        feed.downloaded_at = "later"
+        await coordinator.async_refresh()
+        assert listener.call_count == 3
+        remove_listener()
+
+    async def test_shutdown_stops_listening(self, hass, feed):
+        """Test that a shut down coordinator stops listening for the stop."""
+        listeners = hass.bus.async_listeners().get(EVENT_HOMEASSISTANT_STOP, 0)
+        coordinator = FeedCoordinator(hass, feed)
+        assert (
+            hass.bus.async_listeners()[EVENT_HOMEASSISTANT_STOP]
+            == listeners + 1
+        )
+        await coordinator.async_shutdown()
+        assert (
+            hass.bus.async_listeners().get(EVENT_HOMEASSISTANT_STOP, 0)
+            == listeners
+        )
+
+    async def test_shutdown_on_stop(self, hass, feed):
+        """Test that refreshing stops when Home Assistant stops."""
+        coordinator = FeedCoordinator(hass, feed)
+        hass.bus.async_fire(EVENT_HOMEASSISTANT_STOP)
+        await hass.async_block_till_done()
+        await coordinator.async_refresh()
+        feed.async_update.assert_not_called()
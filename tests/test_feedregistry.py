@@ -0,0 +1,109 @@
+"""Test the FeedRegistry class."""
+
+from unittest.mock import patch
+
+import pytest
+from homeassistant.const import (
+    CONF_EXCLUDE,
+    CONF_INCLUDE,
+    CONF_NAME,
+    CONF_PASSWORD,
+    CONF_PREFIX,
+    CONF_URL,
+    CONF_USERNAME,
+)
+
+from custom_components.ics_calendar.const import (
+    CONF_ACCEPT_HEADER,
+    CONF_DAYS,
+    CONF_DOWNLOAD_INTERVAL,
+    CONF_INCLUDE_ALL_DAY,
+    CONF_OFFSET_HOURS,
+    CONF_PARSER,
+    CONF_RETAIN_PAST_DAYS,
+    CONF_USER_AGENT,
+)
+from custom_components.ics_calendar.feedregistry import FeedRegistry
+
+
+@pytest.fixture
+def device_data() -> dict:
+    """Return the description of a calendar."""
+    return {
+        CONF_NAME: "calendar",
+        CONF_URL: "http://127.0.0.1/test/allday.ics",
+        CONF_USERNAME: "",
+        CONF_PASSWORD: "",
+        CONF_USER_AGENT: "",
+        CONF_ACCEPT_HEADER: "",
+        CONF_DOWNLOAD_INTERVAL: 15,
+        CONF_PARSER: "rie",
+        CONF_DAYS: 1,
+        CONF_INCLUDE_ALL_DAY: False,
+        CONF_OFFSET_HOURS: 0,
+        CONF_PREFIX: "",
+        CONF_INCLUDE: "",
+        CONF_EXCLUDE: "",
+    }
+
+
+class TestFeedRegistry:
+    """Test FeedRegistry class."""
+
+    def test_get_registry(self, hass):
+        """Test that hass has one registry."""
+        assert FeedRegistry.get_registry(hass) is FeedRegistry.get_registry(
+            hass
+        )
+
+    def test_same_feed(self, device_data):
+        """Test that calendars differing only per entity share a Feed."""
+        registry = FeedRegistry()
+        feed = registry.acquire(device_data)
+        other = {
+            **device_data,
+            CONF_NAME: "other",
+            CONF_PREFIX: "Other: ",
+            CONF_INCLUDE: "['a']",
+            CONF_EXCLUDE: "['b']",
+            CONF_INCLUDE_ALL_DAY: True,
+            CONF_OFFSET_HOURS: 2,
+            CONF_DAYS: 5,
+        }
+        assert registry.acquire(other) is feed
+        assert feed.days == 5
+
+    @pytest.mark.parametrize(
+        "key,value",
+        [
+            (CONF_URL, "http://127.0.0.1/test/other.ics"),
+            (CONF_USERNAME, "user"),
+            (CONF_PASSWORD, "password"),
+            (CONF_USER_AGENT, "agent"),
+            (CONF_ACCEPT_HEADER, "text/calendar"),
+            (CONF_PARSER, "ics"),
+            (CONF_RETAIN_PAST_DAYS, 30),
+        ],
+    )
+    def test_other_feed(self, device_data, key, value):
+        """Test that calendars downloaded differently do not share a Feed."""
+        registry = FeedRegistry()
+        feed = registry.acquire(device_data)
+        assert registry.acquire({**device_data, key: value}) is not feed
+
+    async def test_release(self, hass, device_data):
+        """Test that a Feed is shut down and forgotten after the last release."""
+        registry = FeedRegistry()
+        feed = registry.acquire(device_data)
+        coordinator = feed.get_coordinator(hass)
+        assert registry.acquire(device_data) is feed
+        await registry.async_release(device_data)
+        assert registry.acquire(device_data) is feed
+        await registry.async_release(device_data)
+        with patch.object(
+            coordinator, "async_shutdown", wraps=coordinator.async_shutdown
+        ) as mock_shutdown:
+            await registry.async_release(device_data)
+            mock_shutdown.assert_awaited_once()
+        await registry.async_release(device_data)
+        assert registry.acquire(device_data) is not feed
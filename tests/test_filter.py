@@ -1,5 +1,7 @@
 """Test the Filter class."""
 
+from unittest.mock import patch
+
 import pytest
 from dateutil import parser as dtparser
 from homeassistant.components.calendar import CalendarEvent
@@ -158,3 +160,51 @@ ion""",
         """Test that filter works if description is None."""
         filt = Filter("['exclude']", "['include']")
         assert filt.filter("summary", None) is True
+
+    def test_filter_combines_rules_with_same_flags(self) -> None:
+        """Test that rules with the same flags are combined into one."""
+        filt = Filter("['blue', 'green', '/red/i', '/um/', '/^desc/']", "")
+        assert len(filt._exclude) == 2  # pylint: disable=W0212
+        assert filt.filter("summary", "description") is False
+        assert filt.filter("GREEN", None) is False
+        assert filt.filter("Red", None) is False
+        assert filt.filter("yellow", "a description") is True
+
+    def test_filter_keeps_rules_with_group_references(self) -> None:
+        """Test that rules referring to their own groups still match."""
+        filt = Filter("['/(s)\\\\1/', '/(m)\\\\1/', '/(?P<x>u)(?P=x)/']", "")
+        assert len(filt._exclude) == 3  # pylint: disable=W0212
+        assert filt.filter("missing", None) is False
+        assert filt.filter("summary", None) is False
+        assert filt.filter("vacuum", None) is False
+        assert filt.filter("mis", None) is True
+
+    def test_filter_keeps_rules_with_group_conditions(self) -> None:
+        """Test that rules with conditions on their groups still match."""
+        filt = Filter(
+            "['/(q)z/', '/(a)?(?(1)b|c)/', '/(?P<y>e)?(?(y)f|g)/']", ""
+        )
+        assert len(filt._exclude) == 3  # pylint: disable=W0212
+        assert filt.filter("ab", None) is False
+        assert filt.filter("ef", None) is False
+        assert filt.filter("a", None) is True
+
+    def test_filter_keeps_rules_that_cannot_be_combined(self) -> None:
+        """Test that rules with global flags are kept as they are."""
+        filt = Filter("['/(?x) s u m/', '/crip/']", "")
+        assert len(filt._exclude) == 2  # pylint: disable=W0212
+        assert filt.filter("summary", None) is False
+        assert filt.filter("other", "description") is False
+
+    def test_filter_results_are_kept(self) -> None:
+        """Test that the result for the same text is only found once."""
+        filt = Filter("['um']", "['crip']")
+        with patch.object(
+            filt,
+            "_is_excluded",
+            wraps=filt._is_excluded,  # pylint: disable=W0212
+        ) as mock_excluded:
+            for _ in range(3):
+                assert filt.filter("summary", "description") is True
+            assert filt.filter("other", "description") is True
+            assert mock_excluded.call_count == 2
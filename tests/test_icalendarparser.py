@@ -1,7 +1,11 @@
 """Test the icalendarparser class."""
 
+import subprocess
+import sys
+
 from custom_components.ics_calendar.getparser import GetParser
 from custom_components.ics_calendar.icalendarparser import ICalendarParser
+from custom_components.ics_calendar.parsers.parser_rie import ParserRIE
 
 
 class TestICalendarParser:
@@ -11,7 +15,38 @@ class TestICalendarParser:
         """Test that get_parser returns parsers of ICalendarParser."""
         assert isinstance(GetParser.get_parser("rie"), ICalendarParser)
         assert isinstance(GetParser.get_parser("ics"), ICalendarParser)
+        assert isinstance(GetParser.get_parser("fast"), ICalendarParser)
 
     def test_get_parser_returns_None(self):
         """Test that get_parser returns None for non-existing parser."""
         assert GetParser.get_parser("unknown") is None
+
+    def test_get_names(self):
+        """Test that the built-in parsers are registered."""
+        assert GetParser.get_names()[:2] == ["rie", "ics"]
+
+    def test_register(self):
+        """Test that registered parsers are imported when requested."""
+        GetParser.register(
+            "test",
+            "custom_components.ics_calendar.parsers.parser_rie:ParserRIE",
+        )
+        try:
+            assert "test" in GetParser.get_names()
+            assert isinstance(GetParser.get_parser("test"), ParserRIE)
+            assert GetParser.get_class("test") is ParserRIE
+        finally:
+            GetParser._parsers.pop("test")  # pylint: disable=W0212
+
+    def test_parsers_are_imported_when_requested(self):
+        """Test that importing GetParser does not import the parsers."""
+        code = (
+            "import sys\n"
+            "from custom_components.ics_calendar.getparser import GetParser\n"
+            "name = 'custom_components.ics_calendar.parsers.parser_ics'\n"
+            "assert name not in sys.modules\n"
+            "assert 'ics' not in sys.modules\n"
+            "GetParser.get_parser('ics')\n"
+            "assert name in sys.modules\n"
+        )
+        subprocess.run([sys.executable, "-c", code], check=True)
@@ -0,0 +1,151 @@
+"""Test the OccurrenceCache class."""
+
+from datetime import datetime, timedelta, timezone
+from unittest.mock import Mock
+
+from custom_components.ics_calendar.occurrencecache import OccurrenceCache
+
+BASE = datetime(2022, 1, 1, tzinfo=timezone.utc)
+
+
+def day(number: int) -> datetime:
+    """Return the time number days after BASE."""
+    return BASE + timedelta(days=number)
+
+
+def is_in_span(span_start, span_end, start, end) -> bool:
+    """Indicate if an occurrence is in a span."""
+    return start < span_end and span_start < end
+
+
+# A daily event lasting 12 hours, and one lasting 5 days every 10 days
+OCCURRENCES = [
+    (day(number), day(number) + timedelta(hours=12), "daily")
+    for number in range(-1000, 1000)
+] + [
+    (day(number), day(number + 5), "long") for number in range(-1000, 1000, 10)
+]
+
+
+def key(occurrence: tuple) -> tuple:
+    """Return the start and end of an occurrence."""
+    return occurrence[0], occurrence[1]
+
+
+def make_cache(*args) -> tuple[OccurrenceCache, Mock]:
+    """Return an OccurrenceCache of OCCURRENCES, and its expand Mock."""
+    expand = Mock(
+        side_effect=lambda start, end: [
+            occurrence
+            for occurrence in OCCURRENCES
+            if is_in_span(start, end, occurrence[0], occurrence[1])
+        ]
+    )
+    return OccurrenceCache(expand, is_in_span, key, *args), expand
+
+
+def expected(start: datetime, end: datetime) -> list:
+    """Return the occurrences from start to end, sorted."""
+    return sorted(
+        occurrence
+        for occurrence in OCCURRENCES
+        if is_in_span(start, end, occurrence[0], occurrence[1])
+    )
+
+
+class TestOccurrenceCache:
+    """Test OccurrenceCache class."""
+
+    def test_covered_window(self):
+        """Test that a cached window is not expanded again."""
+        cache, expand = make_cache()
+        assert sorted(cache.get(day(0), day(30))) == expected(day(0), day(30))
+        assert sorted(cache.get(day(5), day(10))) == expected(day(5), day(10))
+        assert sorted(cache.get(day(0), day(30))) == expected(day(0), day(30))
+        expand.assert_called_once_with(day(0), day(30))
+
+    def test_sliding_window(self):
+        """Test that only the edges that are not cached are expanded."""
+        cache, expand = make_cache()
+        cache.get(day(0), day(30))
+        expand.reset_mock()
+
+        assert sorted(cache.get(day(-3), day(33))) == expected(
+            day(-3), day(33)
+        )
+        assert [call.args for call in expand.call_args_list] == [
+            (day(-3), day(0)),
+            (day(30), day(33)),
+        ]
+
+    def test_disjoint_windows(self):
+        """Test that separate windows are kept, and merged when filled."""
+        cache, expand = make_cache()
+        cache.get(day(0), day(10))
+        cache.get(day(100), day(110))
+        expand.reset_mock()
+
+        cache.get(day(2), day(8))
+        cache.get(day(102), day(108))
+        expand.assert_not_called()
+
+        assert sorted(cache.get(day(5), day(105))) == expected(
+            day(5), day(105)
+        )
+        expand.assert_called_once_with(day(10), day(100))
+
+    def test_seeded_window(self):
+        """Test that the window the cache was seeded with is used."""
+        cache, expand = make_cache(day(0), day(30), expected(day(0), day(30)))
+        assert sorted(cache.get(day(1), day(2))) == expected(day(1), day(2))
+        expand.assert_not_called()
+
+    def test_max_span(self):
+        """Test that the windows farthest from the last request are dropped."""
+        cache, expand = make_cache()
+        cache.max_span = timedelta(days=100)
+        cache.get(day(0), day(10))
+        cache.get(day(-500), day(-490))
+        cache.get(day(40), day(130))
+        expand.reset_mock()
+
+        cache.get(day(50), day(60))
+        cache.get(day(0), day(10))
+        expand.assert_not_called()
+        cache.get(day(-500), day(-490))
+        expand.assert_called_once_with(day(-500), day(-490))
+
+    def test_sliding_max_span(self):
+        """Test that a window moving forward keeps at most max_span."""
+        cache, expand = make_cache()
+        cache.max_span = timedelta(days=100)
+        for number in range(0, 200, 10):
+            assert sorted(cache.get(day(number), day(number + 30))) == (
+                expected(day(number), day(number + 30))
+            )
+        expand.reset_mock()
+
+        cache.get(day(130), day(220))
+        expand.assert_not_called()
+        cache.get(day(0), day(10))
+        expand.assert_called_once_with(day(0), day(10))
+
+    def test_by_start(self):
+        """Test that occurrences keep their order, unless sorted by start."""
+        cache, _ = make_cache()
+        occurrences = cache.get(day(0), day(30))
+        assert occurrences == [
+            occurrence
+            for occurrence in OCCURRENCES
+            if is_in_span(day(0), day(30), occurrence[0], occurrence[1])
+        ]
+        assert cache.get(day(0), day(30), by_start=True) == sorted(
+            occurrences, key=key
+        )
+
+    def test_naive_times(self):
+        """Test that naive and aware windows do not mix."""
+        naive = day(0).replace(tzinfo=None)
+        cache = OccurrenceCache(Mock(return_value=[]), is_in_span, key)
+        assert not cache.get(day(0), day(1))
+        assert not cache.get(naive, naive + timedelta(days=1))
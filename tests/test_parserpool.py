@@ -0,0 +1,63 @@
+"""Test the ParserPool class."""
+
+from concurrent.futures.process import BrokenProcessPool
+from unittest.mock import Mock, patch
+
+import pytest
+from dateutil import parser as dtparser
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP
+
+from custom_components.ics_calendar.parserpool import ParserPool
+
+START = dtparser.parse("2022-01-01T00:00:00+00:00")
+END = dtparser.parse("2022-01-08T00:00:00+00:00")
+
+
+@pytest.fixture
+def content() -> str:
+    """Return the contents of allday.ics."""
+    with open("tests/allday.ics", encoding="utf-8") as file_handle:
+        return file_handle.read()
+
+
+class TestParserPool:
+    """Test ParserPool class."""
+
+    def test_get_pool(self, hass):
+        """Test that hass has one pool."""
+        assert ParserPool.get_pool(hass) is ParserPool.get_pool(hass)
+
+    @pytest.mark.parametrize("parser", ["rie", "ics"])
+    def test_get_snapshot(self, parser, content):
+        """Test that the worker returns a snapshot of the window."""
+        snapshot = ParserPool.get_snapshot(parser, content, START, END)
+        assert len(snapshot["events"]) == 11
+
+    async def test_async_get_snapshot(self, hass, content):
+        """Test that the calendar is parsed in a worker process."""
+        pool = ParserPool()
+        try:
+            snapshot = await pool.async_get_snapshot(
+                "rie", content, START, END
+            )
+        finally:
+            await hass.async_add_executor_job(pool.shutdown)
+        assert snapshot == ParserPool.get_snapshot("rie", content, START, END)
+
+    async def test_broken_pool(self):
+        """Test that a broken worker is replaced on the next call."""
+        pool = ParserPool()
+        executor = Mock()
+        executor.submit.side_effect = BrokenProcessPool()
+        pool._executor = executor  # pylint: disable=W0212
+        with pytest.raises(BrokenProcessPool):
+            await pool.async_get_snapshot("rie", "", START, END)
+        assert pool._executor is None  # pylint: disable=W0212
+
+    async def test_shutdown_on_stop(self, hass):
+        """Test that the worker is stopped when Home Assistant stops."""
+        pool = ParserPool.get_pool(hass)
+        with patch.object(pool, "shutdown") as mock_shutdown:
+            hass.bus.async_fire(EVENT_HOMEASSISTANT_STOP)
+            await hass.async_block_till_done()
+        mock_shutdown.assert_called_once()
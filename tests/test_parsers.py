@@ -1,12 +1,17 @@
 """Test the parsers, especially for past issues."""
 
-from unittest.mock import Mock
+import json
+import operator
+from datetime import timedelta
+from unittest.mock import Mock, patch
 
 import ics
 import pytest
 from dateutil import parser as dtparser
 from homeassistant.util import dt as hadt
 
+from custom_components.ics_calendar.getparser import GetParser
+
 
 class TestParsers:
     """Test the parsers, especially for past issues."""
@@ -15,6 +20,7 @@ class TestParsers:
         "which_parser",
         [
             "rie_parser",
+            "fast_parser",
             "ics_parser",
         ],
     )
@@ -32,6 +38,7 @@ class TestParsers:
         "which_parser",
         [
             "rie_parser",
+            "fast_parser",
             "ics_parser",
         ],
     )
@@ -55,6 +62,7 @@ class TestParsers:
         "which_parser",
         [
             "rie_parser",
+            "fast_parser",
             # ics_parser fails due to time zone problems
             pytest.param("ics_parser", marks=pytest.mark.xfail),
         ],
@@ -76,6 +84,7 @@ class TestParsers:
         "which_parser",
         [
             "rie_parser",
+            "fast_parser",
             # ics_parser fails due to time zone problems
             pytest.param("ics_parser", marks=pytest.mark.xfail),
         ],
@@ -95,6 +104,7 @@ class TestParsers:
         "which_parser",
         [
             "rie_parser",
+            "fast_parser",
             "ics_parser",
         ],
     )
@@ -111,6 +121,7 @@ class TestParsers:
         "which_parser",
         [
             "rie_parser",
+            "fast_parser",
             "ics_parser",
         ],
     )
@@ -130,6 +141,7 @@ class TestParsers:
         "which_parser",
         [
             "rie_parser",
+            "fast_parser",
             pytest.param(
                 "ics_parser",
                 # ICS 0.8 uses a different class hierarchy for ParseError
@@ -153,6 +165,7 @@ class TestParsers:
         "which_parser",
         [
             "rie_parser",
+            "fast_parser",
             # ics parser doesn't handle recurring events
             pytest.param("ics_parser", marks=pytest.mark.xfail),
         ],
@@ -173,6 +186,7 @@ class TestParsers:
         "which_parser",
         [
             "rie_parser",
+            "fast_parser",
             pytest.param("ics_parser", marks=pytest.mark.xfail),
         ],
     )
@@ -192,6 +206,7 @@ class TestParsers:
         "which_parser",
         [
             "rie_parser",
+            "fast_parser",
             "ics_parser",
         ],
     )
@@ -211,6 +226,7 @@ class TestParsers:
         "which_parser",
         [
             "rie_parser",
+            "fast_parser",
             "ics_parser",
         ],
     )
@@ -229,6 +245,7 @@ class TestParsers:
         "which_parser",
         [
             "rie_parser",
+            "fast_parser",
             "ics_parser",
         ],
     )
@@ -237,7 +254,7 @@ class TestParsers:
         """Test if still fixed, issue 34."""
         parser.set_content(calendar_data)
         filt = Mock()
-        filt.filter_event.return_value = False
+        filt.filter.return_value = False
         parser.set_filter(filt)
         event_list = parser.get_event_list(
             dtparser.parse("2021-01-01T00:00:00"),
@@ -250,6 +267,33 @@ class TestParsers:
         "which_parser",
         [
             "rie_parser",
+            "fast_parser",
+            "ics_parser",
+        ],
+    )
+    @pytest.mark.parametrize("file_name", ["issue34.ics"])
+    def test_filter_before_creating_events(self, parser, calendar_data):
+        """Test that excluded events are not made into CalendarEvents."""
+        parser.set_content(calendar_data)
+        filt = Mock()
+        filt.filter.return_value = False
+        module = type(parser).get_event_list.__module__
+        with patch(f"{module}.CalendarEvent") as mock_event:
+            event_list = parser.get_event_list(
+                dtparser.parse("2021-01-01T00:00:00"),
+                dtparser.parse("2021-12-31T23:59:59"),
+                True,
+                filt=filt,
+            )
+        pytest.helpers.assert_event_list_size(0, event_list)
+        mock_event.assert_not_called()
+        filt.filter.assert_called()
+
+    @pytest.mark.parametrize(
+        "which_parser",
+        [
+            "rie_parser",
+            "fast_parser",
             # ics parser fails on floating events before 0.8.0
             pytest.param("ics_parser", marks=pytest.mark.xfail),
         ],
@@ -270,6 +314,7 @@ class TestParsers:
         "which_parser",
         [
             "rie_parser",
+            "fast_parser",
             "ics_parser",
         ],
     )
@@ -289,6 +334,7 @@ class TestParsers:
         "which_parser",
         [
             "rie_parser",
+            "fast_parser",
             "ics_parser",
         ],
     )
@@ -309,6 +355,7 @@ class TestParsers:
         "which_parser",
         [
             "rie_parser",
+            "fast_parser",
             "ics_parser",
         ],
     )
@@ -324,6 +371,7 @@ class TestParsers:
         "which_parser",
         [
             "rie_parser",
+            "fast_parser",
             "ics_parser",
         ],
     )
@@ -341,6 +389,7 @@ class TestParsers:
         "which_parser",
         [
             "rie_parser",
+            "fast_parser",
             # ics parser fails on floating events before 0.8.0
             pytest.param("ics_parser", marks=pytest.mark.xfail),
         ],
@@ -361,6 +410,7 @@ class TestParsers:
         "which_parser",
         [
             "rie_parser",
+            "fast_parser",
             "ics_parser",
         ],
     )
@@ -382,6 +432,7 @@ class TestParsers:
         "which_parser",
         [
             "rie_parser",
+            "fast_parser",
             "ics_parser",
         ],
     )
@@ -403,6 +454,7 @@ class TestParsers:
         "which_parser",
         [
             "rie_parser",
+            "fast_parser",
             "ics_parser",
         ],
     )
@@ -426,6 +478,7 @@ class TestParsers:
         "which_parser",
         [
             "rie_parser",
+            "fast_parser",
             "ics_parser",
         ],
     )
@@ -449,6 +502,7 @@ class TestParsers:
         "which_parser",
         [
             "rie_parser",
+            "fast_parser",
             "ics_parser",
         ],
     )
@@ -466,3 +520,255 @@ class TestParsers:
         event_list = [current_event]
         pytest.helpers.assert_event_list_size(1, event_list)
         pytest.helpers.compare_event_list(expected_data, event_list)
+
+    @pytest.mark.parametrize(
+        "which_parser",
+        [
+            "rie_parser",
+            "fast_parser",
+            "ics_parser",
+        ],
+    )
+    @pytest.mark.parametrize(
+        "file_name,start",
+        [
+            ("allday.ics", "2022-01-01T00:00:00"),
+            ("issue17.ics", "2020-09-14T00:00:00-04:00"),
+            ("issue43.ics", "2022-02-27T00:00:00-05:00"),
+        ],
+    )
+    def test_snapshot(self, parser, calendar_data, start):
+        """Test that a snapshot gives the same events as the calendar."""
+        start = dtparser.parse(start)
+        end = start + timedelta(days=15)
+        parser.set_content(calendar_data)
+        snapshot = json.loads(
+            json.dumps(
+                parser.get_snapshot(
+                    start - timedelta(days=31), end + timedelta(days=31)
+                )
+            )
+        )
+        restored = type(parser)()
+        assert restored.set_snapshot(snapshot, calendar_data)
+
+        assert len(parser.get_event_list(start, end, True)) > 0
+        for include_all_day, offset_hours in [(True, 0), (False, 2)]:
+            assert restored.get_event_list(
+                start, end, include_all_day, offset_hours
+            ) == parser.get_event_list(
+                start, end, include_all_day, offset_hours
+            )
+            assert restored.get_current_event(
+                include_all_day, start, 3, offset_hours
+            ) == parser.get_current_event(
+                include_all_day, start, 3, offset_hours
+            )
+
+    @pytest.mark.parametrize("which_parser", ["rie_parser", "fast_parser"])
+    @pytest.mark.parametrize("file_name", ["issue17.ics"])
+    def test_snapshot_outside_window(self, parser, calendar_data):
+        """Test that content is parsed for events outside the snapshot."""
+        start = dtparser.parse("2020-09-14T00:00:00-04:00")
+        end = dtparser.parse("2020-09-29T23:59:59-04:00")
+        parser.set_content(calendar_data)
+        snapshot = parser.get_snapshot(start, start + timedelta(days=1))
+        restored = type(parser)()
+        assert restored.set_snapshot(snapshot, calendar_data)
+
+        event_list = restored.get_event_list(start, end, True)
+        pytest.helpers.assert_event_list_size(25, event_list)
+        assert event_list == parser.get_event_list(start, end, True)
+
+    @pytest.mark.parametrize("which_parser", ["rie_parser", "fast_parser"])
+    @pytest.mark.parametrize("file_name", ["issue17.ics"])
+    def test_overlapping_windows(self, parser, calendar_data):
+        """Test that cached occurrences give the same events as expanding."""
+        start = dtparser.parse("2020-09-14T00:00:00-04:00")
+        parser.set_content(calendar_data)
+        for days in [0, 10, -5, 40, 3]:
+            window_start = start + timedelta(days=days)
+            window_end = window_start + timedelta(days=15)
+            fresh = type(parser)()
+            fresh.set_content(calendar_data)
+            assert sorted(
+                parser.get_event_list(window_start, window_end, True),
+                key=str,
+            ) == sorted(
+                fresh.get_event_list(window_start, window_end, True),
+                key=str,
+            )
+
+    @pytest.mark.parametrize("which_parser", ["rie_parser", "fast_parser"])
+    @pytest.mark.parametrize("file_name", ["issue17.ics"])
+    def test_occurrences_share_texts(self, parser, calendar_data):
+        """Test that the occurrences of an event share its texts."""
+        start = dtparser.parse("2020-09-14T00:00:00-04:00")
+        end = start + timedelta(days=15)
+        parser.set_content(calendar_data)
+        restored = type(parser)()
+        assert restored.set_snapshot(
+            json.loads(json.dumps(parser.get_snapshot(start, end))),
+            calendar_data,
+        )
+        for source in [parser, restored]:
+            event_list = source.get_event_list(start, end, True)
+            texts: dict[tuple, tuple] = {}
+            for event in event_list:
+                event_texts = (event.summary, event.description)
+                shared = texts.setdefault(event_texts, event_texts)
+                assert all(map(operator.is_, event_texts, shared))
+            # Some events recur in the window
+            assert len(texts) < len(event_list)
+
+    @pytest.mark.parametrize(
+        "which_parser",
+        [
+            "rie_parser",
+            "fast_parser",
+            "ics_parser",
+        ],
+    )
+    @pytest.mark.parametrize(
+        "snapshot",
+        [
+            {},
+            {"version": 0, "start": None, "end": None, "events": []},
+            {"version": 1, "start": None, "end": None, "events": [[1, 2]]},
+            {"version": 1, "start": "x", "end": None, "events": []},
+        ],
+    )
+    def test_snapshot_invalid(self, parser, snapshot):
+        """Test that unusable snapshots are rejected."""
+        assert not parser.set_snapshot(snapshot, "")
+        assert (
+            parser.get_snapshot(
+                dtparser.parse("2022-01-01T00:00:00+00:00"),
+                dtparser.parse("2022-01-02T00:00:00+00:00"),
+            )
+            is None
+        )
+
+    def test_fast_parser_strips_content(self):
+        """Test that the fast parser only keeps what is read."""
+        content = "\r\n".join(
+            [
+                "BEGIN:VCALENDAR",
+                "X-WR-TIMEZONE:Europe/Berlin",
+                "BEGIN:VTIMEZONE",
+                "TZID:Europe/Berlin",
+                "BEGIN:STANDARD",
+                "TZOFFSETTO:+0100",
+                "END:STANDARD",
+                "END:VTIMEZONE",
+                "BEGIN:VEVENT",
+                "SUMMARY:A long",
+                "  summary",
+                "ATTENDEE;CN=Someone:mailto:someone@example.com",
+                " ,mailto:other@example.com",
+                "X-MICROSOFT-CDO-BUSYSTATUS:BUSY",
+                "BEGIN:VALARM",
+                "SUMMARY:Alarm",
+                "END:VALARM",
+                "dtstart:20220101T100000",
+                "END:VEVENT",
+                "BEGIN:VTODO",
+                "SUMMARY:Todo",
+                "BEGIN:VEVENT",
+                "END:VEVENT",
+                "END:VTODO",
+                "END:VCALENDAR",
+                "",
+            ]
+        )
+        assert GetParser.get_class("fast").strip_content(content) == (
+            "\r\n".join(
+                [
+                    "BEGIN:VCALENDAR",
+                    "X-WR-TIMEZONE:Europe/Berlin",
+                    "BEGIN:VTIMEZONE",
+                    "TZID:Europe/Berlin",
+                    "BEGIN:STANDARD",
+                    "TZOFFSETTO:+0100",
+                    "END:STANDARD",
+                    "END:VTIMEZONE",
+                    "BEGIN:VEVENT",
+                    "SUMMARY:A long summary",
+                    "dtstart:20220101T100000",
+                    "END:VEVENT",
+                    "END:VCALENDAR",
+                ]
+            )
+        )
+
+    def test_fast_parser_unfolds_lines(self):
+        """Test that folded lines are read with the property they continue."""
+        content = "\r\n".join(
+            [
+                "BEGIN:VCALENDAR",
+                "BEGIN:VEVENT",
+                "UID:1",
+                "SUMMARY:Meeting",
+                "DTSTART:20220101T100000Z",
+                "ATTENDEE;CN=Someone:mailto:someone@example.com",
+                " ,mailto:other@example.com",
+                "DESCRIPTION:A long",
+                "  description",
+                "\tcontinued",
+                "X-ALT-DESC;FMTTYPE=text/html:<p>Other",
+                " </p>",
+                "END:VEVENT",
+                "END:VCALENDAR",
+                "",
+            ]
+        )
+        assert GetParser.get_class("fast").strip_content(content) == (
+            "\r\n".join(
+                [
+                    "BEGIN:VCALENDAR",
+                    "BEGIN:VEVENT",
+                    "UID:1",
+                    "SUMMARY:Meeting",
+                    "DTSTART:20220101T100000Z",
+                    "DESCRIPTION:A long descriptioncontinued",
+                    "END:VEVENT",
+                    "END:VCALENDAR",
+                ]
+            )
+        )
+        start = dtparser.parse("2022-01-01T00:00:00+00:00")
+        end = start + timedelta(days=1)
+        events = []
+        for name in ["rie", "fast"]:
+            parser = GetParser.get_parser(name)
+            parser.set_content(content)
+            events.append(parser.get_event_list(start, end, True))
+        assert events[0] == events[1]
+
+    def test_fast_parser_keeps_other_line_breaks(self):
+        """Test that only CRLF and LF end lines for the fast parser."""
+        content = "\r\n".join(
+            [
+                "BEGIN:VCALENDAR",
+                "BEGIN:VEVENT",
+                "UID:1",
+                "SUMMARY:Page\x0cbreak",
+                "DESCRIPTION:First second\x85third\x1cfourth",
+                "DTSTART:20220101T100000Z",
+                "DTEND:20220101T110000Z",
+                "END:VEVENT",
+                "END:VCALENDAR",
+                "",
+            ]
+        )
+        start = dtparser.parse("2022-01-01T00:00:00+00:00")
+        end = start + timedelta(days=1)
+        events = []
+        for name in ["rie", "fast"]:
+            parser = GetParser.get_parser(name)
+            parser.set_content(content)
+            events.append(parser.get_event_list(start, end, True))
+        assert events[0] == events[1]
+        assert [(event.summary, event.description) for event in events[1]] == [
+            ("Page\x0cbreak", "First second\x85third\x1cfourth")
+        ]
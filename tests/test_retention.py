@@ -0,0 +1,121 @@
+"""Test the Retention class."""
+
+from datetime import datetime, timezone
+
+import pytest
+
+from custom_components.ics_calendar.retention import Retention
+
+NOW = datetime(2022, 6, 15, 12, tzinfo=timezone.utc)
+
+
+def calendar(*events: list[str]) -> str:
+    """Return a calendar with events, each given as its properties."""
+    lines = ["BEGIN:VCALENDAR", "VERSION:2.0"]
+    for number, properties in enumerate(events):
+        lines += ["BEGIN:VEVENT", f"UID:{number}", *properties, "END:VEVENT"]
+    return "\r\n".join(lines + ["END:VCALENDAR"])
+
+
+def kept(retention: Retention, *events: list[str]) -> list[str]:
+    """Return the UIDs of the events retention keeps."""
+    return [
+        line[4:]
+        for line in retention.prune(calendar(*events), NOW).splitlines()
+        if line.startswith("UID:")
+    ]
+
+
+class TestRetention:
+    """Test Retention class."""
+
+    @pytest.mark.parametrize(
+        ("properties", "expected"),
+        [
+            # Ends before the window
+            (["DTSTART:20220101T100000Z", "DTEND:20220101T110000Z"], False),
+            # Ends in the window
+            (
+                ["DTSTART;VALUE=DATE:20220501", "DTEND;VALUE=DATE:20220520"],
+                True,
+            ),
+            # Lasts into the window
+            (["DTSTART:20220101T100000", "DURATION:P140D"], True),
+            # Starts after the window
+            (["DTSTART;TZID=Europe/Berlin:20220801T100000"], False),
+            # Starts in the window
+            (["DTSTART;TZID=Europe/Berlin:20220701T100000"], True),
+            # Repeats until before the window
+            (
+                ["DTSTART:20200101T100000", "RRULE:FREQ=DAILY;UNTIL=20220101"],
+                False,
+            ),
+            # Repeats until in the window
+            (
+                ["DTSTART:20200101T100000", "RRULE:FREQ=DAILY;UNTIL=20220601"],
+                True,
+            ),
+            # Repeats a number of times, ending before the window
+            (["DTSTART:20200101T100000", "RRULE:FREQ=WEEKLY;COUNT=10"], False),
+            # Repeats a number of times, into the window
+            (["DTSTART:20200101T100000", "RRULE:FREQ=MONTHLY;COUNT=40"], True),
+            # Repeats forever
+            (["DTSTART:20100101T100000", "RRULE:FREQ=YEARLY"], True),
+            # Has extra dates
+            (["DTSTART:20100101T100000", "RDATE:20220601T100000"], True),
+            # Replaces an occurrence in the window
+            (
+                ["DTSTART:20220101T100000", "RECURRENCE-ID:20220610T100000"],
+                True,
+            ),
+            # Cannot be read
+            (["DTSTART:yesterday"], True),
+        ],
+    )
+    def test_prune(self, properties, expected):
+        """Test that events outside the window are dropped."""
+        retention = Retention(30, 30)
+        assert kept(retention, properties) == (["0"] if expected else [])
+
+    def test_no_limit(self):
+        """Test that a side with 0 days is not limited."""
+        old = ["DTSTART:20000101T100000Z"]
+        later = ["DTSTART:20300101T100000Z"]
+        assert kept(Retention(0, 30), old, later) == ["0"]
+        assert kept(Retention(30, 0), old, later) == ["1"]
+
+    def test_folded_and_nested_properties(self):
+        """Test that folded properties are read, and alarms are not."""
+        retention = Retention(30, 30)
+        assert (
+            kept(
+                retention,
+                [
+                    "DTSTART:20200101T100000",
+                    "RRULE:FREQ=DAILY;",
+                    " UNTIL=20220101",
+                    "BEGIN:VALARM",
+                    "DURATION:P1000D",
+                    "END:VALARM",
+                ],
+            )
+            == []
+        )
+
+    def test_keeps_everything_else(self):
+        """Test that lines outside events, and kept events, are unchanged."""
+        content = calendar(["DTSTART:20220615T100000Z", "SUMMARY:Kept"])
+        assert Retention(30, 30).prune(content, NOW) == content
+
+    def test_keeps_other_line_breaks(self):
+        """Test that only CRLF and LF end lines, and the last end is kept."""
+        content = calendar(
+            [
+                "DTSTART:20220615T100000Z",
+                "DESCRIPTION:One\u2028two\x0cthree\x85four\x1cfive",
+            ]
+        )
+        retention = Retention(30, 30)
+        assert retention.prune(content + "\r\n", NOW) == content + "\r\n"
+        lf_content = content.replace("\r\n", "\n")
+        assert retention.prune(lf_content, NOW) == content